@@ -0,0 +1,235 @@
+import contextvars
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+# Client (remote address) of the request being served, set by the route class
+current_client: contextvars.ContextVar[str] = contextvars.ContextVar("current_client", default="unknown")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries its HTTP status and Retry-After seconds."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After in whole seconds, at least 1."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate tokens per second, up to burst.
+
+    Requests are charged their full size. One larger than burst is admitted
+    once the bucket is full and leaves it in debt (negative tokens), so the
+    next request waits until the excess has been paid back at rate.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        # now may predate the bucket (read before a new client's bucket was made)
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait(self, amount: float, reserve: float = 0.0, now: Optional[float] = None) -> float:
+        """
+        Seconds until amount tokens can be taken while leaving reserve in the
+        bucket (0.0 if they can be taken now). Nothing is taken.
+
+        An amount larger than burst - reserve only needs the bucket full
+        (down to the reserve); any debt is paid back first.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        needed = min(amount, self.burst - reserve) + reserve
+        return max(0.0, needed - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Charge amount tokens, going into debt if there are fewer."""
+        self.tokens -= amount
+
+
+class AdmissionController:
+    """
+    Decides, before a request submits simulator work, whether it may run.
+
+    Each request is checked against:
+    - a limit on requests running simulator work at once (503 when reached)
+    - a global token bucket of shots per second (503 when empty)
+    - a token bucket per client (429 when empty), charged the request's
+      shots but at least request_cost, for the fixed cost of a request
+
+    Interactive requests (a single shot) may use the whole global budget.
+    Bulk requests may only use bulk_share of the concurrency limit and of
+    the shot bucket, so under load batches are shed first while single
+    flips keep flowing. Rejections are immediate, with Retry-After set to
+    when the bucket will have refilled enough. Nothing is queued.
+
+    Everything runs on the event loop, so the counters are plain attributes.
+
+    Args:
+        shots_per_second: Global shot budget (burst: one second's worth, 0 disables)
+        max_concurrent: Requests running simulator work at once (0 disables)
+        client_rate: Shots per second per client (0 disables)
+        client_burst: Bucket size per client
+        request_cost: Shots every request is charged at least, per client
+        bulk_share: Share of the global limits open to bulk requests
+        max_clients: Client buckets kept; the least recently seen are dropped
+    """
+
+    def __init__(self, shots_per_second: float = 2_000_000, max_concurrent: int = 64,
+                 client_rate: float = 100_000, client_burst: float = 200_000, request_cost: int = 100,
+                 bulk_share: float = 0.75, max_clients: int = 10_000, enabled: bool = True):
+        self.enabled = enabled
+        self.max_concurrent = max_concurrent
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.request_cost = request_cost
+        self.bulk_share = bulk_share
+        self.max_clients = max_clients
+        self.shots = TokenBucket(shots_per_second, shots_per_second) if shots_per_second > 0 else None
+        self._clients: OrderedDict = OrderedDict()
+
+        self.in_flight = 0
+        self.in_flight_bulk = 0
+        self.admitted = 0
+        self.rejected_client = 0
+        self.rejected_overload = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """
+        Configure from QUANTUM_ADMISSION (on/off), QUANTUM_SHOTS_PER_SECOND,
+        QUANTUM_MAX_CONCURRENT_JOBS, QUANTUM_CLIENT_SHOTS_PER_SECOND,
+        QUANTUM_CLIENT_BURST, QUANTUM_REQUEST_COST and QUANTUM_BULK_SHARE.
+        """
+        return cls(
+            enabled=os.environ.get("QUANTUM_ADMISSION", "on") != "off",
+            shots_per_second=float(os.environ.get("QUANTUM_SHOTS_PER_SECOND", 2_000_000)),
+            max_concurrent=int(os.environ.get("QUANTUM_MAX_CONCURRENT_JOBS", 64)),
+            client_rate=float(os.environ.get("QUANTUM_CLIENT_SHOTS_PER_SECOND", 100_000)),
+            client_burst=float(os.environ.get("QUANTUM_CLIENT_BURST", 200_000)),
+            request_cost=int(os.environ.get("QUANTUM_REQUEST_COST", 100)),
+            bulk_share=float(os.environ.get("QUANTUM_BULK_SHARE", 0.75)),
+        )
+
+    def _client_bucket(self, client: str) -> TokenBucket:
+        bucket = self._clients.get(client)
+        if bucket is None:
+            bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst)
+            if len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+        return bucket
+
+    @property
+    def bulk_limit(self) -> Optional[float]:
+        """
+        Most shots a bulk request can be admitted with from full buckets:
+        the client burst and the bulk share of the shot bucket, whichever is
+        smaller (None when nothing limits it).
+        """
+        limits = []
+        if self.enabled and self.client_rate > 0:
+            limits.append(self.client_burst)
+        if self.enabled and self.shots is not None:
+            limits.append(self.shots.burst * self.bulk_share)
+        return min(limits) if limits else None
+
+    def acquire(self, client: str, shots: int) -> Callable[[], None]:
+        """
+        Admit a request for shots shots, or raise AdmissionRejected.
+
+        Returns:
+            Function that releases the request's concurrency slot (idempotent)
+
+        Raises:
+            AdmissionRejected: 429 if the client is over its quota, 503 if
+                the service is saturated for this request's priority
+        """
+        if not self.enabled:
+            return lambda: None
+
+        bulk = shots > 1
+        share = self.bulk_share if bulk else 1.0
+        if self.max_concurrent > 0 and self.in_flight >= self.max_concurrent * share:
+            self.rejected_overload += 1
+            raise AdmissionRejected(
+                503, f"Too many simulations in progress ({self.in_flight}); try again shortly", 1.0
+            )
+
+        now = time.monotonic()
+        if self.shots is not None:
+            reserve = self.shots.burst * (1 - share)
+            wait = self.shots.wait(shots, reserve, now)
+            if wait > 0:
+                self.rejected_overload += 1
+                raise AdmissionRejected(503, "Simulator shot budget exhausted; try again shortly", wait)
+
+        if self.client_rate > 0:
+            client_bucket = self._client_bucket(client)
+            cost = max(shots, self.request_cost)
+            wait = client_bucket.wait(cost, now=now)
+            if wait > 0:
+                self.rejected_client += 1
+                raise AdmissionRejected(429, "Too many shots requested by this client; slow down", wait)
+            client_bucket.take(cost)
+        if self.shots is not None:
+            self.shots.take(shots)
+
+        self.admitted += 1
+        self.in_flight += 1
+        self.in_flight_bulk += bulk
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.in_flight -= 1
+                self.in_flight_bulk -= bulk
+
+        return release
+
+    @contextmanager
+    def admit(self, client: str, shots: int) -> Iterator[None]:
+        """Hold an admission slot for the duration of the block."""
+        release = self.acquire(client, shots)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self) -> Dict:
+        """Limits, current load and admit/reject counters."""
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "in_flight_bulk": self.in_flight_bulk,
+            "max_concurrent": self.max_concurrent,
+            "bulk_share": self.bulk_share,
+            "shots_per_second": self.shots.rate if self.shots is not None else 0,
+            "shot_tokens": round(self.shots.tokens) if self.shots is not None else None,
+            "client_shots_per_second": self.client_rate,
+            "client_burst": self.client_burst,
+            "request_cost": self.request_cost,
+            "clients": len(self._clients),
+            "admitted": self.admitted,
+            "rejected_client": self.rejected_client,
+            "rejected_overload": self.rejected_overload,
+        }
@@ -0,0 +1,382 @@
+"""
+Latency and throughput benchmarks for QuantumService and the HTTP API.
+
+Usage:
+    python benchmark.py                               # run, print a table
+    python benchmark.py --output benchmarks.json      # also save a baseline
+    python benchmark.py --compare benchmarks.json     # flag regressions (exit 1)
+    python benchmark.py --suite service --quick       # fewer iterations
+
+Every QuantumService method is timed in-process across SHOT_COUNTS, and
+every FastAPI route is timed through an in-process ASGI client (no network),
+so the HTTP numbers include validation, the worker pool, coalescing and
+serialization but not a socket.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+SHOT_COUNTS = [1, 10, 100, 1000, 10000]
+
+# Percentile latency that may grow by this fraction before it counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+class Budget(NamedTuple):
+    """How long each benchmark case runs."""
+    warmup: int        # Untimed calls before measuring
+    min_iterations: int
+    max_iterations: int
+    min_seconds: float  # Keep measuring until both minimums are met
+
+
+FULL = Budget(warmup=3, min_iterations=30, max_iterations=2000, min_seconds=1.0)
+QUICK = Budget(warmup=1, min_iterations=10, max_iterations=200, min_seconds=0.2)
+
+
+# ==================== Measurement ====================
+
+def summarize(latencies: List[float], wall_seconds: float, shots: Optional[int]) -> Dict:
+    """p50/p95/p99 latency in milliseconds plus calls (and shots) per second."""
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    summary = {
+        "iterations": len(latencies),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "calls_per_sec": round(len(latencies) / wall_seconds, 2),
+    }
+    if shots is not None:
+        summary["shots_per_sec"] = round(len(latencies) * shots / wall_seconds, 2)
+    return summary
+
+
+def measure(call: Callable[[], object], budget: Budget, shots: Optional[int] = None) -> Dict:
+    for _ in range(budget.warmup):
+        call()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < budget.max_iterations:
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+        if len(latencies) >= budget.min_iterations and time.perf_counter() - started >= budget.min_seconds:
+            break
+    return summarize(latencies, time.perf_counter() - started, shots)
+
+
+async def measure_async(call: Callable[[], Awaitable], budget: Budget, shots: Optional[int] = None) -> Dict:
+    for _ in range(budget.warmup):
+        await call()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < budget.max_iterations:
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+        if len(latencies) >= budget.min_iterations and time.perf_counter() - started >= budget.min_seconds:
+            break
+    return summarize(latencies, time.perf_counter() - started, shots)
+
+
+# ==================== QuantumService ====================
+
+def service_cases(service) -> Dict[str, tuple]:
+    """Benchmark name -> (call, shots) for every QuantumService method."""
+    from circuit_registry import CircuitRegistry
+
+    cases = {
+        "service.quantum_coin_flip": (service.quantum_coin_flip, 1),
+        "service.double_coin_flip": (service.double_coin_flip, 1),
+        "service.bell_state_measure": (lambda: service.bell_state_measure("phi_plus"), 1),
+        "service.measure_qubit": (lambda: service.measure_qubit("equal", "x"), 1),
+        "service.get_single_circuit_diagram": (service.get_single_circuit_diagram, None),
+        "service.get_double_circuit_diagram": (service.get_double_circuit_diagram, None),
+        "service.get_bell_state_circuit_diagram": (
+            lambda: service.get_bell_state_circuit_diagram("phi_plus"), None
+        ),
+    }
+    for shots in SHOT_COUNTS:
+        cases.update({
+            f"service.quantum_coin_flip_batch[shots={shots}]": (
+                lambda shots=shots: service.quantum_coin_flip_batch(shots), shots
+            ),
+            f"service.double_coin_flip_batch[shots={shots}]": (
+                lambda shots=shots: service.double_coin_flip_batch(shots), shots
+            ),
+            f"service.multi_coin_flip_batch[n=8,shots={shots}]": (
+                lambda shots=shots: service.multi_coin_flip_batch(8, shots), shots
+            ),
+            f"service.bell_state_batch[shots={shots}]": (
+                lambda shots=shots: service.bell_state_batch("phi_plus", shots), shots
+            ),
+            f"service.entangled_state_batch[ghz,n=100,shots={shots}]": (
+                lambda shots=shots: service.entangled_state_batch("ghz", 100, shots), shots
+            ),
+            f"service.measure_qubit_batch[shots={shots}]": (
+                lambda shots=shots: service.measure_qubit_batch("biased_0", "z", shots), shots
+            ),
+            f"service.measure_qubit_matrix[shots={shots}]": (
+                lambda shots=shots: service.measure_qubit_matrix(shots=shots), shots
+            ),
+            f"service.measure_qubit_sweep[points=100,shots={shots}]": (
+                lambda shots=shots: service.measure_qubit_sweep(list(np.linspace(0, 2 * np.pi, 100)), shots=shots),
+                100 * shots
+            ),
+            f"service.chsh_experiment[shots={shots}]": (
+                lambda shots=shots: service.chsh_experiment("phi_plus", shots=shots), 4 * shots
+            ),
+            f"service.convergence_curve[shots={shots}]": (
+                lambda shots=shots: service.convergence_curve(CircuitRegistry.coin_key("double"), shots), shots
+            ),
+        })
+    return cases
+
+
+def run_service_suite(budget: Budget, backend: str, only: str,
+                      progress: Callable[[str], None]) -> Dict[str, Dict]:
+    from quantum_service import QuantumService
+
+    service = QuantumService(backend=backend)
+    service.warm_up("reservoir")
+
+    results = {}
+    for name, (call, shots) in service_cases(service).items():
+        if only not in name:
+            continue
+        progress(name)
+        results[name] = measure(call, budget, shots)
+    return results
+
+
+# ==================== HTTP API ====================
+
+def http_cases() -> Dict[str, tuple]:
+    """Benchmark name -> (route, HTTP method, URL, JSON body, shots)."""
+    cases = {}
+
+    def add(route: str, url: Optional[str] = None, body: Optional[Dict] = None,
+            shots: Optional[int] = None, suffix: str = "") -> None:
+        method, path = route.split(" ", 1)
+        cases[f"http.{route}{suffix}"] = (route, method, url or path, body, shots)
+
+    add("GET /")
+    add("GET /health/live")
+    add("GET /health/ready")
+    add("GET /api/startup-report")
+    add("GET /api/coalescing/stats")
+    add("GET /api/cache/stats")
+    add("GET /api/outcome-pool/stats")
+    add("GET /api/admission/stats")
+    add("GET /api/flip-stream/stats")
+    add("GET /api/simulator-profiles")
+    add("GET /metrics")
+    add("GET /api/bell-states/info")
+    add("GET /api/quantum-circuit")
+    add("GET /api/double-quantum-circuit")
+    add("GET /api/bell-state-circuit/{state}", "/api/bell-state-circuit/phi_plus")
+    add("GET /api/diagrams/{name}", "/api/diagrams/measure_equal_x?format=text")
+    add("GET /api/lessons/{lesson}/diagrams", "/api/lessons/measurement/diagrams")
+    add("POST /api/quantum-coin-flip", shots=1)
+    add("POST /api/double-coin-flip", shots=1)
+    add("POST /api/bell-state-measure", body={"state": "phi_plus"}, shots=1)
+    add("POST /api/measure-qubit", body={"state": "equal", "basis": "x"}, shots=1)
+
+    for shots in SHOT_COUNTS:
+        suffix = f"[shots={shots}]"
+        add("POST /api/quantum-coin-flip-batch", body={"shots": shots}, shots=shots, suffix=suffix)
+        add("POST /api/double-coin-flip-batch", body={"shots": shots}, shots=shots, suffix=suffix)
+        add("POST /api/multi-coin-flip-batch", body={"n_qubits": 8, "shots": shots},
+            shots=shots, suffix=suffix)
+        add("POST /api/bell-state-batch", body={"state": "phi_plus", "shots": shots},
+            shots=shots, suffix=suffix)
+        add("POST /api/entangled-state-batch", body={"state": "ghz", "n_qubits": 100, "shots": shots},
+            shots=shots, suffix=suffix)
+        add("POST /api/measure-qubit-batch", body={"state": "biased_0", "basis": "z", "shots": shots},
+            shots=shots, suffix=suffix)
+        add("POST /api/measure-qubit-matrix", body={"shots": shots}, shots=shots, suffix=suffix)
+        add("POST /api/measure-qubit-sweep", body={"points": 100, "shots": shots}, shots=100 * shots, suffix=suffix)
+        add("POST /api/quantum-coin-flip-batch/stream", body={"shots": shots}, shots=shots, suffix=suffix)
+        add("POST /api/double-coin-flip-batch/stream", body={"shots": shots}, shots=shots, suffix=suffix)
+        add("POST /api/bell-state-chsh", body={"state": "phi_plus", "shots": shots}, shots=4 * shots, suffix=suffix)
+        add("POST /api/bell-state-batch/stream", body={"state": "phi_plus", "shots": shots},
+            shots=shots, suffix=suffix)
+        add("POST /api/measure-qubit-batch/stream", body={"state": "equal", "basis": "x", "shots": shots},
+            shots=shots, suffix=suffix)
+        add("POST /api/quantum-coin-flip-batch/convergence", body={"shots": shots}, shots=shots, suffix=suffix)
+        add("POST /api/double-coin-flip-batch/convergence", body={"shots": shots}, shots=shots, suffix=suffix)
+        add("POST /api/bell-state-batch/convergence", body={"state": "phi_plus", "shots": shots},
+            shots=shots, suffix=suffix)
+        add("POST /api/measure-qubit-batch/convergence", body={"state": "biased_0", "basis": "z", "shots": shots},
+            shots=shots, suffix=suffix)
+        # Same seed on every call, so all but the first are result-cache hits
+        add("POST /api/quantum-coin-flip-batch", body={"shots": shots, "seed": 42}, shots=shots,
+            suffix=f"[shots={shots},seeded]")
+    return cases
+
+
+def uncovered_routes(app, cases: Dict[str, tuple]) -> List[str]:
+    """API routes that no HTTP benchmark case exercises."""
+    from fastapi.routing import APIRoute
+
+    covered = {route for route, *_ in cases.values()}
+    return sorted(
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+        if f"{method} {route.path}" not in covered
+    )
+
+
+async def run_http_suite(budget: Budget, only: str, progress: Callable[[str], None]) -> Dict[str, Dict]:
+    import httpx
+
+    # Every call comes from one client as fast as it can: measure latency, not load shedding
+    os.environ.setdefault("QUANTUM_ADMISSION", "off")
+    import main
+
+    cases = http_cases()
+    for route in uncovered_routes(main.app, cases):
+        progress(f"warning: no benchmark for {route}")
+
+    results = {}
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            while not main.startup.ready:
+                if main.startup.error:
+                    raise RuntimeError(f"Warm-up failed: {main.startup.error}")
+                await asyncio.sleep(0.1)
+
+            for name, (_, method, url, body, shots) in cases.items():
+                if only not in name:
+                    continue
+                progress(name)
+
+                async def call(method=method, url=url, body=body):
+                    response = await client.request(method, url, json=body)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text}")
+
+                results[name] = await measure_async(call, budget, shots)
+    return results
+
+
+# ==================== Baseline Comparison ====================
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[Dict]:
+    """
+    Compare results against a baseline.
+
+    A case regresses when its p50 or p95 latency grew by more than
+    threshold (0.25 = 25%). Cases missing from either side are skipped.
+
+    Returns:
+        One entry per compared case, with its p50/p95 ratios and verdict
+    """
+    rows = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        p50_ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1.0
+        p95_ratio = result["p95_ms"] / before["p95_ms"] if before["p95_ms"] else 1.0
+        rows.append({
+            "name": name,
+            "baseline_p50_ms": before["p50_ms"],
+            "p50_ms": result["p50_ms"],
+            "p50_ratio": round(p50_ratio, 3),
+            "p95_ratio": round(p95_ratio, 3),
+            "regressed": max(p50_ratio, p95_ratio) > 1 + threshold,
+        })
+    return rows
+
+
+def environment(backend: str) -> Dict:
+    from importlib.metadata import PackageNotFoundError, version
+
+    packages = {}
+    for package in ("qiskit", "qiskit-aer", "fastapi", "numpy"):
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "backend": backend,
+        "workers": os.environ.get("QUANTUM_WORKERS"),
+        "packages": packages,
+    }
+
+
+def print_table(results: Dict[str, Dict]) -> None:
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'calls/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<{width}}  {r['p50_ms']:>9.3f}  {r['p95_ms']:>9.3f}  {r['p99_ms']:>9.3f}  {r['calls_per_sec']:>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=["all", "service", "http"], default="all")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations per case")
+    parser.add_argument("--output", help="Write results to this JSON baseline file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed p50/p95 growth before a case counts as regressed (default 0.25)")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    args = parser.parse_args()
+
+    budget = QUICK if args.quick else FULL
+    backend = os.environ.get("QUANTUM_BACKEND", "aer")
+
+    def progress(name: str) -> None:
+        print(f"  {name}", file=sys.stderr)
+
+    results: Dict[str, Dict] = {}
+    if args.suite in ("all", "service"):
+        print("QuantumService:", file=sys.stderr)
+        results.update(run_service_suite(budget, backend, args.filter, progress))
+    if args.suite in ("all", "http"):
+        print("HTTP API:", file=sys.stderr)
+        results.update(asyncio.run(run_http_suite(budget, args.filter, progress)))
+
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(backend), "budget": budget._asdict(), "results": results}, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline["results"], args.threshold)
+        regressions = [row for row in rows if row["regressed"]]
+        print(f"\nCompared {len(rows)} cases against {args.compare} (threshold {args.threshold:.0%})")
+        for row in regressions:
+            print(f"  REGRESSION {row['name']}: p50 {row['baseline_p50_ms']:.3f} -> {row['p50_ms']:.3f} ms "
+                  f"(x{row['p50_ratio']}, p95 x{row['p95_ratio']})")
+        if regressions:
+            return 1
+        print("  No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import numpy as np
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from metrics import phase
+
+# Qiskit is imported inside the methods that need it, so importing this module
+# (e.g. for the key helpers) does not load the simulator stack
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
+
+
+# A circuit key is (kind, state, basis):
+#   ("coin", "single", None)      - 1-qubit coin flip
+#   ("coin", "double", None)      - 2-qubit coin flip
+#   ("coin", "5", None)           - n-qubit coin flip, built on first use
+#   ("bell", "phi_plus", None)    - Bell state measured in the Z basis
+#   ("ghz", "300", None)          - n-qubit GHZ (or "w": W) state, built on first use
+#   ("measure", "equal", "x")     - prepared single-qubit state in a basis
+#   ("rotation", "template", None) - parameterized preparation + basis, see ROTATION_PARAMETERS
+#   ("chsh", "phi_plus", None)    - Bell state measured along parameterized angles, see CHSH_PARAMETERS
+CircuitKey = Tuple[str, str, Optional[str]]
+
+
+# ==================== COIN FLIPS ====================
+
+def _single_coin(qc: QuantumCircuit) -> None:
+    # |0⟩ → (|0⟩ + |1⟩) / √2
+    qc.h(0)
+
+
+def _double_coin(qc: QuantumCircuit) -> None:
+    # Each qubit independently goes into superposition
+    qc.h(0)
+    qc.h(1)
+
+
+COIN_CIRCUITS: Dict[str, Tuple[int, Callable[[QuantumCircuit], None]]] = {
+    "single": (1, _single_coin),
+    "double": (2, _double_coin),
+}
+
+MAX_COIN_QUBITS = 63  # Outcomes must fit in a 64-bit integer index
+
+
+# ==================== SIMULATION METHOD ====================
+
+# Instructions Aer's stabilizer method can simulate: Clifford gates plus
+# measurement and bookkeeping. A circuit made only of these is simulated in
+# polynomial time and memory instead of with a 2^n statevector.
+CLIFFORD_INSTRUCTIONS = frozenset({
+    "id", "x", "y", "z", "h", "s", "sdg", "sx", "sxdg", "cx", "cy", "cz", "swap",
+    "measure", "reset", "barrier", "delay",
+})
+
+
+def classify_circuit(qc: QuantumCircuit) -> str:
+    """Simulation method for a circuit: "stabilizer" if it is Clifford-only, else "statevector"."""
+    if all(instruction.operation.name in CLIFFORD_INSTRUCTIONS for instruction in qc.data):
+        return "stabilizer"
+    return "statevector"
+
+
+# ==================== BELL STATES (Entanglement) ====================
+
+def _phi_plus(qc: QuantumCircuit) -> None:
+    # Φ⁺ = (|00⟩ + |11⟩)/√2
+    # Circuit: H on q0, then CNOT with q0 as control
+    qc.h(0)      # Create superposition on qubit 0
+    qc.cx(0, 1)  # Entangle qubit 0 with qubit 1
+
+
+def _psi_plus(qc: QuantumCircuit) -> None:
+    # Ψ⁺ = (|01⟩ + |10⟩)/√2
+    # Circuit: Flip q1, then H on q0, then CNOT
+    qc.x(1)      # Flip qubit 1 to |1⟩
+    qc.h(0)      # Create superposition on qubit 0
+    qc.cx(0, 1)  # Entangle
+
+
+def _phi_minus(qc: QuantumCircuit) -> None:
+    # Φ⁻ = (|00⟩ - |11⟩)/√2
+    # Circuit: H on q0, CNOT, then Z on q0 (adds phase)
+    qc.h(0)      # Create superposition
+    qc.cx(0, 1)  # Entangle
+    qc.z(0)      # Add phase to create minus state
+
+
+def _psi_minus(qc: QuantumCircuit) -> None:
+    # Ψ⁻ = (|01⟩ - |10⟩)/√2
+    # Circuit: X on q1, H on q0, CNOT, Z on q0
+    qc.x(1)      # Flip qubit 1
+    qc.h(0)      # Create superposition
+    qc.cx(0, 1)  # Entangle
+    qc.z(0)      # Add phase
+
+
+BELL_STATES: Dict[str, Callable[[QuantumCircuit], None]] = {
+    "phi_plus": _phi_plus,
+    "psi_plus": _psi_plus,
+    "phi_minus": _phi_minus,
+    "psi_minus": _psi_minus,
+}
+
+
+# ==================== N-PARTY ENTANGLEMENT (GHZ / W) ====================
+
+def _ghz(qc: QuantumCircuit, n_qubits: int) -> None:
+    # GHZ = (|0…0⟩ + |1…1⟩)/√2
+    # Circuit: H on q0, then a CNOT chain copies it down the line (Clifford only)
+    qc.h(0)
+    for i in range(n_qubits - 1):
+        qc.cx(i, i + 1)
+
+
+def _w(qc: QuantumCircuit, n_qubits: int) -> None:
+    # W = (|10…0⟩ + |01…0⟩ + … + |0…01⟩)/√n
+    # Circuit: start from |10…0⟩ and pass the excitation down the line. At
+    # step i qubit i holds it; the controlled RY leaves 1/(n - i) of what is
+    # left on qubit i and the CNOT moves the rest to qubit i + 1.
+    qc.x(0)
+    for i in range(n_qubits - 1):
+        qc.cry(2 * np.arccos(np.sqrt(1 / (n_qubits - i))), i, i + 1)
+        qc.cx(i + 1, i)
+
+
+ENTANGLED_STATES: Dict[str, Callable[[QuantumCircuit, int], None]] = {
+    "ghz": _ghz,
+    "w": _w,
+}
+
+MAX_ENTANGLED_QUBITS = 500
+
+
+# Measurement angles of the CHSH template, in the X-Z plane of the Bloch
+# sphere: Alice measures qubit 0 along "alice", Bob qubit 1 along "bob"
+CHSH_PARAMETERS = ("alice", "bob")
+
+
+def _chsh_measurement(qc: QuantumCircuit) -> None:
+    from qiskit.circuit import Parameter
+
+    alice, bob = (Parameter(name) for name in CHSH_PARAMETERS)
+    # Rotate each measured axis onto Z
+    qc.ry(-alice, 0)
+    qc.ry(-bob, 1)
+
+
+# ==================== MEASUREMENT (Different States & Bases) ====================
+
+# Bloch angles (θ, φ) of each prepared state: cos(θ/2)|0⟩ + e^{iφ} sin(θ/2)|1⟩
+STATE_ANGLES: Dict[str, Tuple[float, float]] = {
+    "equal": (np.pi / 2, 0.0),
+    "biased_0": (np.pi / 3, 0.0),      # (√3|0⟩ + |1⟩)/2
+    "biased_1": (2 * np.pi / 3, 0.0),  # (|0⟩ + √3|1⟩)/2
+    "definite_0": (0.0, 0.0),
+    "definite_1": (np.pi, 0.0),
+}
+
+# Bloch angles (θ, φ) of the axis each basis measures; outcome 0 is along the axis
+BASIS_ANGLES: Dict[str, Tuple[float, float]] = {
+    "z": (0.0, 0.0),
+    "x": (np.pi / 2, 0.0),
+    "y": (np.pi / 2, np.pi / 2),
+}
+
+STATE_PREPARATIONS: Dict[str, Callable[[QuantumCircuit], None]] = {
+    "equal": lambda qc: qc.h(0),                                  # Equal superposition
+    "biased_0": lambda qc: qc.ry(STATE_ANGLES["biased_0"][0], 0),  # (√3|0⟩ + |1⟩)/2
+    "biased_1": lambda qc: qc.ry(STATE_ANGLES["biased_1"][0], 0),  # (|0⟩ + √3|1⟩)/2
+    "definite_0": lambda qc: None,                                # Already |0⟩
+    "definite_1": lambda qc: qc.x(0),                             # Flip to |1⟩
+}
+
+
+def _y_basis(qc: QuantumCircuit) -> None:
+    # S† then H maps |+i⟩ to |0⟩ and |-i⟩ to |1⟩
+    qc.sdg(0)
+    qc.h(0)
+
+
+MEASUREMENT_BASES: Dict[str, Callable[[QuantumCircuit], None]] = {
+    "z": lambda qc: None,      # Computational basis
+    "x": lambda qc: qc.h(0),   # Rotate to X-basis
+    "y": _y_basis,             # Rotate to Y-basis
+}
+
+
+# ==================== ROTATIONS (Parameterized Template) ====================
+
+# Parameters of the rotation template: the prepared state's Bloch angles and
+# those of the measured axis. Every (state, basis) pair is one binding of it.
+ROTATION_PARAMETERS = ("theta", "phi", "basis_theta", "basis_phi")
+
+
+def _rotation_template(qc: QuantumCircuit) -> None:
+    from qiskit.circuit import Parameter
+
+    theta, phi, basis_theta, basis_phi = (Parameter(name) for name in ROTATION_PARAMETERS)
+    # |ψ⟩ = cos(θ/2)|0⟩ + e^{iφ} sin(θ/2)|1⟩
+    qc.ry(theta, 0)
+    qc.rz(phi, 0)
+    # Rotate the measured axis onto Z
+    qc.rz(-basis_phi, 0)
+    qc.ry(-basis_theta, 0)
+
+
+def rotation_probabilities(theta, phi, basis_theta, basis_phi) -> np.ndarray:
+    """
+    Born-rule probability of outcome 1 for each binding of the rotation template.
+
+    With r and n the Bloch vectors of the state and of the measured axis,
+    P(1) = (1 - r·n) / 2. Arguments are angles in radians (arrays broadcast).
+    """
+    alignment = (
+        np.sin(theta) * np.sin(basis_theta) * np.cos(phi - basis_phi)
+        + np.cos(theta) * np.cos(basis_theta)
+    )
+    return np.clip((1 - alignment) / 2, 0.0, 1.0)
+
+
+class CircuitRegistry:
+    """
+    Builds every circuit used by QuantumService exactly once.
+
+    Each circuit is stored twice: the logical circuit (used for diagrams and
+    for callers of create_bell_state) and a copy transpiled for the target
+    backend, so simulator runs skip circuit construction and transpilation.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._circuits: Dict[CircuitKey, QuantumCircuit] = {}
+        self._transpiled: Dict[CircuitKey, QuantumCircuit] = {}
+        self._probabilities: Dict[CircuitKey, np.ndarray] = {}
+        self._methods: Dict[CircuitKey, str] = {}
+
+        for name in COIN_CIRCUITS:
+            self._register(("coin", name, None))
+        for state in BELL_STATES:
+            self._register(("bell", state, None))
+        for state in STATE_PREPARATIONS:
+            for basis in MEASUREMENT_BASES:
+                self._register(("measure", state, basis))
+        self._register(("rotation", "template", None))
+
+    def _register(self, key: CircuitKey) -> None:
+        from qiskit import transpile
+
+        # Dict assignment is atomic, so a race at worst builds a circuit twice
+        with phase("construct"):
+            qc = self._build(key)
+        self._circuits[key] = qc
+        if self.backend is not None and qc.num_qubits <= self.backend.num_qubits:
+            with phase("transpile"):
+                self._transpiled[key] = transpile(qc, self.backend)
+        else:
+            # Wider than the backend's statevector target (e.g. many-qubit coins):
+            # the circuit only uses gates Aer runs natively, so it is used as built
+            self._transpiled[key] = qc
+        # Classified once, on the circuit that actually runs (transpiling may
+        # cancel gates, e.g. the two H of "equal" measured in the X basis)
+        self._methods[key] = classify_circuit(self._transpiled[key])
+
+    @staticmethod
+    def _build(key: CircuitKey) -> QuantumCircuit:
+        from qiskit import QuantumCircuit
+
+        kind, state, basis = key
+
+        if kind == "coin":
+            if state in COIN_CIRCUITS:
+                num_qubits, prepare = COIN_CIRCUITS[state]
+            else:
+                # n independent coins: H on every qubit
+                num_qubits = int(state)
+                prepare = lambda qc: qc.h(range(num_qubits))
+            qc = QuantumCircuit(num_qubits, num_qubits)
+            prepare(qc)
+            qc.measure(range(num_qubits), range(num_qubits))
+            return qc
+
+        if kind == "bell":
+            qc = QuantumCircuit(2, 2)
+            BELL_STATES[state](qc)
+            qc.measure([0, 1], [0, 1])
+            return qc
+
+        if kind == "chsh":
+            qc = QuantumCircuit(2, 2)
+            BELL_STATES[state](qc)
+            _chsh_measurement(qc)
+            qc.measure([0, 1], [0, 1])
+            return qc
+
+        if kind in ENTANGLED_STATES:
+            num_qubits = int(state)
+            qc = QuantumCircuit(num_qubits, num_qubits)
+            ENTANGLED_STATES[kind](qc, num_qubits)
+            qc.measure(range(num_qubits), range(num_qubits))
+            return qc
+
+        if kind == "measure":
+            qc = QuantumCircuit(1, 1)
+            STATE_PREPARATIONS[state](qc)
+            MEASUREMENT_BASES[basis](qc)
+            qc.measure(0, 0)
+            return qc
+
+        if kind == "rotation":
+            qc = QuantumCircuit(1, 1)
+            _rotation_template(qc)
+            qc.measure(0, 0)
+            return qc
+
+        raise ValueError(f"Unknown circuit kind: {kind}")
+
+    @property
+    def keys(self):
+        """Keys of the circuits that run as they are (not the parameterized template)."""
+        return [key for key, qc in self._circuits.items() if not qc.parameters]
+
+    def circuit(self, key: CircuitKey) -> QuantumCircuit:
+        """Logical (untranspiled) circuit for a key."""
+        if key not in self._circuits:
+            self._register(key)
+        return self._circuits[key]
+
+    def transpiled(self, key: CircuitKey) -> QuantumCircuit:
+        """Circuit transpiled once for the registry's backend."""
+        if key not in self._transpiled:
+            self._register(key)
+        return self._transpiled[key]
+
+    def simulation_method(self, key: CircuitKey) -> str:
+        """Aer simulation method for a key: "stabilizer" or "statevector"."""
+        if key not in self._methods:
+            self._register(key)
+        return self._methods[key]
+
+    def probabilities(self, key: CircuitKey) -> np.ndarray:
+        """
+        Exact outcome probabilities, indexed by the integer value of the bitstring.
+
+        Every registered circuit measures qubit i into classical bit i, so this
+        is |amplitude|² of the statevector before the final measurements.
+        """
+        probabilities = self._probabilities.get(key)
+        if probabilities is None:
+            from qiskit.quantum_info import Statevector
+
+            qc = self.circuit(key).remove_final_measurements(inplace=False)
+            with phase("construct"):
+                probabilities = Statevector.from_instruction(qc).probabilities()
+            # Clean up floating point noise such as 1e-33 for impossible outcomes
+            probabilities = np.where(probabilities < 1e-12, 0.0, probabilities)
+            probabilities /= probabilities.sum()
+            self._probabilities[key] = probabilities
+        return probabilities
+
+    def sweep_probabilities(self, key: CircuitKey, bindings: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Exact outcome probabilities of a parameterized circuit, one row per binding.
+
+        The rotation template uses its closed form, so hundreds of points
+        cost a few array operations; other templates bind every point and
+        take the statevector.
+
+        Args:
+            bindings: Parameter name -> values, all of the same length
+
+        Returns:
+            Array of shape (points, 2^num_clbits), indexed like probabilities()
+        """
+        if key[0] == "rotation":
+            ones = rotation_probabilities(*(np.asarray(bindings[name], dtype=float) for name in ROTATION_PARAMETERS))
+            return np.stack([1 - ones, ones], axis=1)
+
+        from qiskit.quantum_info import Statevector
+
+        qc = self.circuit(key).remove_final_measurements(inplace=False)
+        if not qc.parameters:
+            raise ValueError(f"Circuit has no parameters to sweep: {key}")
+        parameters = {parameter.name: parameter for parameter in qc.parameters}
+        points = len(next(iter(bindings.values())))
+        rows = []
+        with phase("construct"):
+            for i in range(points):
+                bound = qc.assign_parameters({parameters[name]: float(values[i]) for name, values in bindings.items()})
+                rows.append(Statevector.from_instruction(bound).probabilities())
+        probabilities = np.array(rows)
+        return np.where(probabilities < 1e-12, 0.0, probabilities)
+
+    def expected_distribution(self, key: CircuitKey) -> Dict[str, float]:
+        """Exact probabilities keyed by Qiskit bitstring."""
+        num_bits = self.circuit(key).num_clbits
+        return {
+            format(i, f"0{num_bits}b"): float(p)
+            for i, p in enumerate(self.probabilities(key))
+        }
+
+    # ==================== Key helpers ====================
+
+    @staticmethod
+    def coin_key(name: str) -> CircuitKey:
+        return ("coin", name, None)
+
+    @staticmethod
+    def multi_coin_key(n_qubits: int) -> CircuitKey:
+        if not 1 <= n_qubits <= MAX_COIN_QUBITS:
+            raise ValueError(f"n_qubits must be between 1 and {MAX_COIN_QUBITS}")
+        return ("coin", str(n_qubits), None)
+
+    @staticmethod
+    def bell_key(state_type: str) -> CircuitKey:
+        if state_type not in BELL_STATES:
+            raise ValueError(f"Unknown Bell state: {state_type}. Must be one of: phi_plus, psi_plus, phi_minus, psi_minus")
+        return ("bell", state_type, None)
+
+    @staticmethod
+    def entangled_key(kind: str, n_qubits: int) -> CircuitKey:
+        if kind not in ENTANGLED_STATES:
+            raise ValueError(f"Unknown entangled state: {kind}. Must be one of: {', '.join(ENTANGLED_STATES)}")
+        if not 2 <= n_qubits <= MAX_ENTANGLED_QUBITS:
+            raise ValueError(f"n_qubits must be between 2 and {MAX_ENTANGLED_QUBITS}")
+        return (kind, str(n_qubits), None)
+
+    @staticmethod
+    def measure_key(state: str, basis: str) -> CircuitKey:
+        if state not in STATE_PREPARATIONS:
+            raise ValueError(f"Unknown state: {state}")
+        if basis not in MEASUREMENT_BASES:
+            raise ValueError(f"Unknown basis: {basis}")
+        return ("measure", state, basis)
+
+    @staticmethod
+    def rotation_key() -> CircuitKey:
+        return ("rotation", "template", None)
+
+    @staticmethod
+    def chsh_key(state_type: str) -> CircuitKey:
+        CircuitRegistry.bell_key(state_type)
+        return ("chsh", state_type, None)
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import json
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from fastapi import Request, Response
+
+from circuit_registry import BELL_STATES, MEASUREMENT_BASES, STATE_PREPARATIONS, CircuitKey, CircuitRegistry
+
+# Diagrams never change while the server runs; let browsers keep them for a week
+CACHE_CONTROL = "public, max-age=604800"
+
+
+# Diagram name -> circuit key
+DIAGRAMS: Dict[str, CircuitKey] = {
+    "single_coin": CircuitRegistry.coin_key("single"),
+    "double_coin": CircuitRegistry.coin_key("double"),
+    **{f"bell_{state}": CircuitRegistry.bell_key(state) for state in BELL_STATES},
+    **{
+        f"measure_{state}_{basis}": CircuitRegistry.measure_key(state, basis)
+        for state in STATE_PREPARATIONS
+        for basis in MEASUREMENT_BASES
+    },
+}
+
+# Diagrams each lesson page shows
+LESSON_DIAGRAMS: Dict[str, List[str]] = {
+    "superposition": ["single_coin", "double_coin"],
+    "entanglement": [f"bell_{state}" for state in BELL_STATES],
+    "measurement": [
+        f"measure_{state}_{basis}" for state in STATE_PREPARATIONS for basis in MEASUREMENT_BASES
+    ],
+}
+
+
+class DiagramAsset(NamedTuple):
+    body: bytes
+    media_type: str
+    etag: str
+
+
+class DiagramAssets:
+    """
+    In-memory table of pre-rendered circuit diagrams.
+
+    Every diagram is drawn once at startup and stored as ready-to-send bytes
+    with a strong ETag, so a lesson page view costs a dictionary lookup (or a
+    304) instead of a qc.draw() call.
+
+    Formats:
+    - text: Qiskit's text drawing (always available)
+    - svg: Matplotlib drawing (only if matplotlib is installed)
+    - json: {"circuit_diagram": text}, the schema of the original endpoints
+    """
+
+    def __init__(self):
+        self._assets: Dict[Tuple[str, str], DiagramAsset] = {}
+        self.formats: List[str] = []
+        self.rendered = False
+
+    def render(self, formats: Iterable[str] = ("text",)) -> None:
+        """Draw every diagram and lesson bundle in the requested formats."""
+        registry = CircuitRegistry()
+        formats = set(formats) | {"text"}
+        if "svg" in formats and not self._svg_available():
+            formats.discard("svg")
+        self.formats = sorted(formats)
+
+        rendered: Dict[str, Dict[str, str]] = {}
+        for name, key in DIAGRAMS.items():
+            qc = registry.circuit(key)
+            text = qc.draw(output="text").single_string()
+            rendered[name] = {"text": text}
+            self._add(name, "text", text.encode(), "text/plain")
+            self._add(name, "json", json.dumps({"circuit_diagram": text}, ensure_ascii=False).encode(), "application/json")
+
+            if "svg" in formats:
+                svg = self._draw_svg(qc)
+                rendered[name]["svg"] = svg
+                self._add(name, "svg", svg.encode(), "image/svg+xml")
+
+        for lesson, names in LESSON_DIAGRAMS.items():
+            bundle = {"lesson": lesson, "formats": self.formats, "diagrams": {name: rendered[name] for name in names}}
+            self._add(lesson, "bundle", json.dumps(bundle, ensure_ascii=False).encode(), "application/json")
+
+        self.rendered = True
+
+    @staticmethod
+    def _svg_available() -> bool:
+        try:
+            import matplotlib  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def _draw_svg(qc) -> str:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        figure = qc.draw(output="mpl")
+        buffer = io.StringIO()
+        figure.savefig(buffer, format="svg", bbox_inches="tight")
+        plt.close(figure)
+        return buffer.getvalue()
+
+    def _add(self, name: str, fmt: str, body: bytes, media_type: str) -> None:
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self._assets[(name, fmt)] = DiagramAsset(body, media_type, etag)
+
+    def has(self, name: str, fmt: str) -> bool:
+        return (name, fmt) in self._assets
+
+    def response(self, request: Request, name: str, fmt: str) -> Response:
+        """
+        Serve a pre-rendered asset, answering a matching If-None-Match with 304.
+
+        Raises:
+            KeyError: If no such diagram/format was rendered
+        """
+        asset = self._assets[(name, fmt)]
+        headers = {"ETag": asset.etag, "Cache-Control": CACHE_CONTROL}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        # If-None-Match uses weak comparison, so W/"..." matches too
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if asset.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=asset.body, media_type=asset.media_type, headers=headers)
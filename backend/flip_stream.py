@@ -0,0 +1,308 @@
+import asyncio
+import json
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from admission_control import AdmissionRejected, current_client
+from circuit_registry import CircuitKey, CircuitRegistry
+from simulation_executor import SimulationQueueFull, SimulationTimeout
+
+# Outcomes per second a subscriber can ask for
+MIN_FLIP_RATE = 0.1
+MAX_FLIP_RATE = 1000.0
+DEFAULT_FLIP_RATE = 2.0
+
+# Frames go out at most this often; faster rates put several outcomes in each frame
+FRAME_INTERVAL = 0.05
+
+# Frames the server sends ahead of the client's last acknowledgement
+DEFAULT_WINDOW = 8
+MAX_WINDOW = 64
+
+# Each simulator run covers about this many seconds of outcomes at the subscribed rate
+BATCH_SECONDS = 2.0
+MIN_BATCH_SHOTS = 64
+MAX_BATCH_SHOTS = 10_000
+
+COIN_STATES = ("single", "double")
+ACTIONS = ("subscribe", "rate", "pause", "resume", "ack")
+
+
+def stream_key(message: Dict) -> CircuitKey:
+    """
+    Circuit key of a subscribe message.
+
+    {"circuit": "coin", "state": "single" | "double"}, {"circuit": "bell",
+    "state": <Bell state>} or {"circuit": "measure", "state": ..., "basis": ...}.
+
+    Raises:
+        ValueError: If the circuit, state or basis is unknown
+    """
+    circuit = message.get("circuit", "coin")
+    state = message.get("state")
+    if circuit == "coin":
+        state = state or "single"
+        if state not in COIN_STATES:
+            raise ValueError(f"Unknown coin: {state}. Must be one of: single, double")
+        return CircuitRegistry.coin_key(state)
+    if circuit == "bell":
+        return CircuitRegistry.bell_key(state or "phi_plus")
+    if circuit == "measure":
+        return CircuitRegistry.measure_key(state or "equal", message.get("basis", "z"))
+    raise ValueError(f"Unknown circuit: {circuit}. Must be one of: coin, bell, measure")
+
+
+def _number(message: Dict, name: str, default: float, low: float, high: float) -> float:
+    # Clamped into [low, high], like the shot counts of the HTTP endpoints
+    value = message.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number")
+    return min(max(float(value), low), high)
+
+
+class _Subscription:
+    """State of one WebSocket connection: what it streams, how fast, and its unsent outcomes."""
+
+    def __init__(self, server: "FlipStreamServer", websocket: WebSocket):
+        self.server = server
+        self.websocket = websocket
+        self.key: Optional[CircuitKey] = None
+        # Bumped by every subscribe, so outcomes of the previous circuit are dropped
+        self.generation = 0
+        self.rate = DEFAULT_FLIP_RATE
+        self.window = DEFAULT_WINDOW
+        self.paused = False
+        self.frame = 0
+        self.acked = 0
+        self.buffer: Deque[str] = deque()
+        self.simulation_method: Optional[str] = None
+        self.refill: Optional[asyncio.Task] = None
+        # Set by every control message, to wake the sender
+        self.changed = asyncio.Event()
+
+    async def run(self) -> None:
+        sender = asyncio.create_task(self._send_frames())
+        receiver = asyncio.create_task(self._receive_messages())
+        try:
+            done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in (sender, receiver, self.refill):
+                if task is not None:
+                    task.cancel()
+
+    async def _send(self, payload: Dict) -> None:
+        await self.websocket.send_text(json.dumps(payload))
+
+    # ==================== Control Messages ====================
+
+    async def _receive_messages(self) -> None:
+        try:
+            while True:
+                text = await self.websocket.receive_text()
+                try:
+                    message = json.loads(text)
+                    if not isinstance(message, dict):
+                        raise ValueError("Messages must be JSON objects")
+                    reply = self._handle(message)
+                except ValueError as e:
+                    reply = {"event": "error", "detail": str(e)}
+                if reply is not None:
+                    await self._send(reply)
+                self.changed.set()
+        except WebSocketDisconnect:
+            return
+
+    def _handle(self, message: Dict) -> Optional[Dict]:
+        action = message.get("action")
+        if action == "subscribe":
+            key = stream_key(message)
+            rate = _number(message, "rate", DEFAULT_FLIP_RATE, MIN_FLIP_RATE, MAX_FLIP_RATE)
+            window = int(_number(message, "window", DEFAULT_WINDOW, 1, MAX_WINDOW))
+            if self.refill is not None:
+                self.refill.cancel()
+            self.key, self.rate, self.window = key, rate, window
+            self.generation += 1
+            self.buffer.clear()
+            self.paused = False
+            self.acked = self.frame
+            return {
+                "event": "subscribed",
+                "circuit": "/".join(part for part in key if part is not None),
+                "rate": rate,
+                "window": window,
+                "frame": self.frame,
+            }
+        if action == "rate":
+            self.rate = _number(message, "rate", self.rate, MIN_FLIP_RATE, MAX_FLIP_RATE)
+            return {"event": "rate", "rate": self.rate}
+        if action == "pause":
+            self.paused = True
+            return {"event": "paused", "frame": self.frame}
+        if action == "resume":
+            self.paused = False
+            return {"event": "resumed", "frame": self.frame}
+        if action == "ack":
+            frame = message.get("frame")
+            if isinstance(frame, bool) or not isinstance(frame, int):
+                raise ValueError("frame must be an integer")
+            self.acked = max(self.acked, min(frame, self.frame))
+            return None
+        raise ValueError(f"Unknown action: {action}. Must be one of: {', '.join(ACTIONS)}")
+
+    # ==================== Outcome Frames ====================
+
+    async def _wait_changed(self, timeout: Optional[float] = None) -> None:
+        self.changed.clear()
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _send_frames(self) -> None:
+        loop = asyncio.get_running_loop()
+        due = 0.0
+        next_frame = loop.time()
+        while True:
+            # Nothing subscribed, paused, or the client is window frames behind
+            if self.key is None or self.paused or self.frame - self.acked >= self.window:
+                await self._wait_changed()
+                # Start again at the subscribed pace, without a burst to catch up
+                next_frame = loop.time()
+                continue
+
+            delay = next_frame - loop.time()
+            if delay > 0:
+                # Woken early by a control message: check the state again
+                await self._wait_changed(delay)
+                continue
+
+            period = max(FRAME_INTERVAL, 1 / self.rate)
+            due += self.rate * period
+            count = max(1, int(due + 1e-9))
+            due = max(0.0, due - count)
+
+            outcomes = await self._take(count)
+            if outcomes is None:
+                continue
+            self.frame += 1
+            await self._send({
+                "event": "outcomes",
+                "frame": self.frame,
+                "outcomes": outcomes,
+                "simulation_method": self.simulation_method,
+            })
+            self.server.frames += 1
+            self.server.outcomes += len(outcomes)
+            next_frame = max(next_frame + period, loop.time())
+
+    async def _take(self, count: int) -> Optional[List[str]]:
+        """The next count outcomes, or None if the client subscribed to another circuit meanwhile."""
+        generation = self.generation
+        while len(self.buffer) < count:
+            refill = self._start_refill()
+            await asyncio.wait({refill})
+            if generation != self.generation:
+                return None
+            if refill.exception() is not None:
+                raise refill.exception()
+
+        outcomes = [self.buffer.popleft() for _ in range(count)]
+        # Simulate the next batch while the rest of this one is streamed
+        if len(self.buffer) < self._batch_shots() // 2:
+            self._start_refill()
+        return outcomes
+
+    def _batch_shots(self) -> int:
+        return int(min(max(self.rate * BATCH_SECONDS, MIN_BATCH_SHOTS), MAX_BATCH_SHOTS))
+
+    def _start_refill(self) -> asyncio.Task:
+        if self.refill is None or self.refill.done():
+            self.refill = asyncio.create_task(self._refill(self.key, self.generation, self._batch_shots()))
+        return self.refill
+
+    async def _refill(self, key: CircuitKey, generation: int, shots: int) -> None:
+        """Run one batch of the circuit, retrying while the service sheds load."""
+        while True:
+            try:
+                with self.server.admission.admit(current_client.get(), shots):
+                    outcomes, labels = await self.server.executor.run_labeled("sample_outcomes", key, shots)
+                break
+            except AdmissionRejected as e:
+                detail, retry_after = e.detail, e.retry_after
+            except (SimulationQueueFull, SimulationTimeout) as e:
+                detail, retry_after = str(e), 1.0
+            # The client sees why its outcomes stopped; they resume after the retry
+            await self._send({"event": "throttled", "detail": detail, "retry_after": round(retry_after, 3)})
+            await asyncio.sleep(retry_after)
+
+        self.server.simulator_runs += 1
+        if generation == self.generation:
+            self.buffer.extend(outcomes)
+            self.simulation_method = labels.get("simulation_method")
+
+
+class FlipStreamServer:
+    """
+    Serves live measurement outcomes over WebSocket connections.
+
+    A client subscribes to a single-shot circuit and a rate; the server then
+    pushes small frames of real outcomes at that rate. Outcomes come from
+    batched simulator runs of about BATCH_SECONDS worth of shots, prefetched
+    while the previous batch is streamed, so one connection replaces many
+    one-shot requests and one simulator job serves many frames. Each batch
+    is admitted like a batch request; when it is shed the client gets a
+    "throttled" event and the batch is retried after Retry-After.
+
+    Backpressure is by acknowledgement: the server sends at most window
+    frames beyond the last frame the client acknowledged, and while it waits
+    no outcomes are skipped and no catch-up burst builds up.
+
+    Client messages (JSON):
+        {"action": "subscribe", "circuit": "coin", "state": "single", "rate": 2, "window": 8}
+        {"action": "rate", "rate": 10}
+        {"action": "pause"} / {"action": "resume"}
+        {"action": "ack", "frame": 12}
+
+    Server messages:
+        {"event": "subscribed" | "rate" | "paused" | "resumed", ...}
+        {"event": "outcomes", "frame": 12, "outcomes": ["0", "1"], "simulation_method": ...}
+        {"event": "throttled", "detail": ..., "retry_after": 0.5}
+        {"event": "error", "detail": ...}  - invalid message; the connection stays open
+
+    Args:
+        executor: SimulationExecutor that runs the batches
+        admission: AdmissionController every batch is admitted by
+    """
+
+    def __init__(self, executor, admission):
+        self.executor = executor
+        self.admission = admission
+        self.open = 0
+        self.connections = 0
+        self.frames = 0
+        self.outcomes = 0
+        self.simulator_runs = 0
+
+    async def serve(self, websocket: WebSocket) -> None:
+        """Accept a connection and stream to it until the client disconnects."""
+        await websocket.accept()
+        self.open += 1
+        self.connections += 1
+        try:
+            await _Subscription(self, websocket).run()
+        finally:
+            self.open -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "open_connections": self.open,
+            "connections": self.connections,
+            "frames": self.frames,
+            "outcomes": self.outcomes,
+            "simulator_runs": self.simulator_runs,
+            "outcomes_per_run": round(self.outcomes / self.simulator_runs, 2) if self.simulator_runs else 0.0,
+        }
@@ -0,0 +1,367 @@
+"""
+Load generator and capacity report for the HTTP API.
+
+Usage:
+    python load_test.py                                  # in-process, default ramp
+    python load_test.py --url http://localhost:8000      # against a running server
+    python load_test.py --output capacity.json           # save the report
+    python load_test.py --compare capacity.json          # flag a capacity drop (exit 1)
+    python load_test.py --levels 1,4,16 --step-seconds 5 --slo-ms 100
+
+Virtual students replay the lesson traffic mix (LESSON_MIX, modeled on the
+calls the frontend makes in src/services/api.js) in a closed loop: each
+sends a request, waits for the answer and an optional think time, and
+sends the next. Concurrency is ramped through --levels, one step each, and
+every step reports throughput, status counts and latency percentiles,
+overall and per endpoint. From the steps the report derives:
+
+- sustainable_rps: the highest throughput of a step whose p95 latency stays
+  within --slo-ms and whose error rate stays below --max-error-rate
+- knee: the step with the best throughput / p95 latency ratio (Kleinrock's
+  power), past which more concurrency mostly adds queueing delay
+
+In-process runs go through an ASGI client (no sockets) and turn admission
+control off unless QUANTUM_ADMISSION is set, since every virtual student
+shares one client address. Against --url, 429 and 503 answers count as
+shed requests.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from benchmark import DEFAULT_THRESHOLD, environment
+
+DEFAULT_LEVELS = [1, 2, 4, 8, 16, 32, 64]
+
+BELL_STATES = ["phi_plus", "phi_minus", "psi_plus", "psi_minus"]
+MEASURE_STATES = ["equal", "biased_0", "biased_1", "definite_0", "definite_1"]
+MEASURE_BASES = ["z", "x", "y"]
+LESSONS = ["superposition", "entanglement", "measurement"]
+
+
+class Call(NamedTuple):
+    """One request of the mix: endpoint label (route template), method, URL and JSON body."""
+    endpoint: str
+    method: str
+    url: str
+    body: Optional[Dict] = None
+
+
+# (weight, request factory). Single flips dominate: the coin demos send one
+# per click. Batches are the "Run 100 flips" buttons, which also ask for the
+# per-flip sequence to animate.
+LESSON_MIX: List[Tuple[float, Callable[[random.Random], Call]]] = [
+    (25, lambda rng: Call("POST /api/quantum-coin-flip", "POST", "/api/quantum-coin-flip")),
+    (12, lambda rng: Call("POST /api/double-coin-flip", "POST", "/api/double-coin-flip")),
+    (6, lambda rng: Call("POST /api/quantum-coin-flip-batch", "POST", "/api/quantum-coin-flip-batch",
+                         {"shots": 100, "sequence": "base64"})),
+    (4, lambda rng: Call("POST /api/double-coin-flip-batch", "POST", "/api/double-coin-flip-batch",
+                         {"shots": 100, "sequence": "base64"})),
+    (14, lambda rng: Call("POST /api/bell-state-measure", "POST", "/api/bell-state-measure",
+                          {"state": rng.choice(BELL_STATES)})),
+    (6, lambda rng: Call("POST /api/bell-state-batch", "POST", "/api/bell-state-batch",
+                         {"state": rng.choice(BELL_STATES), "shots": 100})),
+    (10, lambda rng: Call("POST /api/measure-qubit", "POST", "/api/measure-qubit",
+                          {"state": rng.choice(MEASURE_STATES), "basis": rng.choice(MEASURE_BASES)})),
+    (6, lambda rng: Call("POST /api/measure-qubit-batch", "POST", "/api/measure-qubit-batch",
+                         {"state": rng.choice(MEASURE_STATES), "basis": rng.choice(MEASURE_BASES), "shots": 1000})),
+    (4, lambda rng: Call("GET /api/quantum-circuit", "GET", "/api/quantum-circuit")),
+    (2, lambda rng: Call("GET /api/double-quantum-circuit", "GET", "/api/double-quantum-circuit")),
+    (5, lambda rng: Call("GET /api/diagrams/{name}", "GET",
+                         f"/api/diagrams/measure_{rng.choice(MEASURE_STATES)}_{rng.choice(MEASURE_BASES)}")),
+    (3, lambda rng: Call("GET /api/lessons/{lesson}/diagrams", "GET",
+                         f"/api/lessons/{rng.choice(LESSONS)}/diagrams")),
+    (3, lambda rng: Call("GET /", "GET", "/")),
+]
+
+
+class Sample(NamedTuple):
+    endpoint: str
+    status: int       # 0: no response (connection error or client timeout)
+    seconds: float
+
+
+# ==================== Load Generation ====================
+
+def pick(rng: random.Random) -> Call:
+    weights = [weight for weight, _ in LESSON_MIX]
+    _, make = rng.choices(LESSON_MIX, weights=weights)[0]
+    return make(rng)
+
+
+async def run_step(client, concurrency: int, seconds: float, think_ms: float, seed: int) -> Tuple[List[Sample], float]:
+    """
+    Run concurrency virtual students for seconds.
+
+    Returns:
+        (one sample per finished request, wall seconds)
+    """
+    samples: List[Sample] = []
+    deadline = time.perf_counter() + seconds
+
+    async def student(rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            call = pick(rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(call.method, call.url, json=call.body)
+                status = response.status_code
+            except Exception:
+                status = 0
+            samples.append(Sample(call.endpoint, status, time.perf_counter() - start))
+            if think_ms > 0:
+                await asyncio.sleep(rng.expovariate(1000 / think_ms))
+
+    started = time.perf_counter()
+    # Each student draws its own reproducible request sequence
+    await asyncio.gather(*(student(random.Random(seed * 1_000_003 + i)) for i in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+# ==================== Report ====================
+
+def percentiles(seconds: List[float]) -> Dict:
+    if not seconds:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.array(seconds) * 1000, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+
+def summarize_step(concurrency: int, samples: List[Sample], wall_seconds: float) -> Dict:
+    """Throughput, status counts and latency percentiles of one step, overall and per endpoint."""
+    ok = [sample for sample in samples if 200 <= sample.status < 400]
+    shed = sum(1 for sample in samples if sample.status in (429, 503))
+    statuses: Dict[str, int] = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample.status)] += 1
+
+    by_endpoint: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+    endpoints = {
+        endpoint: {
+            "requests": len(endpoint_samples),
+            "errors": sum(1 for sample in endpoint_samples if not 200 <= sample.status < 400),
+            **percentiles([sample.seconds for sample in endpoint_samples if 200 <= sample.status < 400]),
+        }
+        for endpoint, endpoint_samples in sorted(by_endpoint.items())
+    }
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "seconds": round(wall_seconds, 3),
+        "rps": round(len(ok) / wall_seconds, 2),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "shed": shed,
+        "statuses": dict(sorted(statuses.items())),
+        # Latency of successful requests (shed requests answer fast and would flatter it)
+        **percentiles([sample.seconds for sample in ok]),
+        "endpoints": endpoints,
+    }
+
+
+def capacity(steps: List[Dict], slo_ms: float, max_error_rate: float) -> Dict:
+    """Sustainable throughput and the knee of the latency curve from the ramp's steps."""
+    measured = [step for step in steps if step["p95_ms"] is not None]
+    within = [step for step in measured if step["p95_ms"] <= slo_ms and step["error_rate"] <= max_error_rate]
+    sustainable = max(within, key=lambda step: step["rps"], default=None)
+    knee = max(measured, key=lambda step: step["rps"] / step["p95_ms"] if step["p95_ms"] else 0.0, default=None)
+    return {
+        "slo_p95_ms": slo_ms,
+        "max_error_rate": max_error_rate,
+        "sustainable_rps": sustainable["rps"] if sustainable else 0.0,
+        "sustainable_concurrency": sustainable["concurrency"] if sustainable else None,
+        "knee_concurrency": knee["concurrency"] if knee else None,
+        "knee_rps": knee["rps"] if knee else None,
+        "knee_p95_ms": knee["p95_ms"] if knee else None,
+        "peak_rps": max((step["rps"] for step in steps), default=0.0),
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> Dict:
+    """
+    Compare a report against a baseline.
+
+    Capacity regresses when sustainable throughput fell by more than
+    threshold (0.25 = 25%). Per-endpoint p95 ratios are given for the
+    concurrency levels both ramps ran, for finding the cause.
+    """
+    before = baseline["capacity"]["sustainable_rps"]
+    after = report["capacity"]["sustainable_rps"]
+    ratio = after / before if before else 1.0
+
+    baseline_steps = {step["concurrency"]: step for step in baseline["steps"]}
+    endpoints: Dict[str, Dict[str, float]] = {}
+    for step in report["steps"]:
+        old = baseline_steps.get(step["concurrency"])
+        if old is None:
+            continue
+        for endpoint, stats in step["endpoints"].items():
+            old_stats = old["endpoints"].get(endpoint)
+            if old_stats and old_stats["p95_ms"] and stats["p95_ms"]:
+                endpoints.setdefault(endpoint, {})[str(step["concurrency"])] = round(
+                    stats["p95_ms"] / old_stats["p95_ms"], 3
+                )
+    return {
+        "baseline_sustainable_rps": before,
+        "sustainable_rps": after,
+        "sustainable_ratio": round(ratio, 3),
+        "regressed": ratio < 1 - threshold,
+        "endpoint_p95_ratios": endpoints,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'students':>8}  {'req/s':>9}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'errors':>7}  {'shed':>6}")
+    for step in report["steps"]:
+        p50, p95, p99 = (f"{step[name]:>9.2f}" if step[name] is not None else f"{'-':>9}"
+                         for name in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{step['concurrency']:>8}  {step['rps']:>9.1f}  {p50}  {p95}  {p99}  "
+              f"{step['error_rate']:>7.1%}  {step['shed']:>6}")
+
+    cap = report["capacity"]
+    print(f"\nSustainable: {cap['sustainable_rps']:.1f} req/s at {cap['sustainable_concurrency']} students "
+          f"(p95 <= {cap['slo_p95_ms']:g} ms, errors <= {cap['max_error_rate']:.1%})")
+    print(f"Knee:        {cap['knee_concurrency']} students, {cap['knee_rps']} req/s at p95 {cap['knee_p95_ms']} ms")
+    print(f"Peak:        {cap['peak_rps']:.1f} req/s")
+
+    knee = next((step for step in report["steps"] if step["concurrency"] == cap["knee_concurrency"]), None)
+    if knee is not None:
+        width = max(len(endpoint) for endpoint in knee["endpoints"])
+        print(f"\nPer endpoint at the knee ({knee['concurrency']} students):")
+        print(f"{'endpoint':<{width}}  {'requests':>8}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'errors':>6}")
+        for endpoint, stats in knee["endpoints"].items():
+            p50, p95, p99 = (f"{stats[name]:>9.2f}" if stats[name] is not None else f"{'-':>9}"
+                             for name in ("p50_ms", "p95_ms", "p99_ms"))
+            print(f"{endpoint:<{width}}  {stats['requests']:>8}  {p50}  {p95}  {p99}  {stats['errors']:>6}")
+
+
+# ==================== Runner ====================
+
+async def wait_until_ready(client, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API not ready after {timeout:g}s")
+
+
+async def ramp(client, levels: List[int], step_seconds: float, think_ms: float, slo_ms: float,
+               max_error_rate: float, seed: int, progress: Callable[[str], None]) -> List[Dict]:
+    await wait_until_ready(client)
+    # Untimed warm-up: first calls of every endpoint, caches, worker start-up
+    await run_step(client, 1, min(step_seconds, 2.0), 0.0, seed)
+
+    steps = []
+    for concurrency in levels:
+        samples, wall = await run_step(client, concurrency, step_seconds, think_ms, seed + concurrency)
+        step = summarize_step(concurrency, samples, wall)
+        steps.append(step)
+        progress(f"{concurrency} students: {step['rps']:.1f} req/s, p95 {step['p95_ms']} ms, "
+                 f"errors {step['error_rate']:.1%}")
+        # Far past saturation every further step only adds time
+        if step["error_rate"] > 0.5 or (step["p95_ms"] or 0) > 10 * slo_ms:
+            progress("saturated, stopping the ramp")
+            break
+    return steps
+
+
+async def run(args, progress: Callable[[str], None]) -> List[Dict]:
+    import httpx
+
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            return await ramp(client, args.levels, args.step_seconds, args.think_ms, args.slo_ms,
+                              args.max_error_rate, args.seed, progress)
+
+    # Every virtual student shares the in-process client's address
+    os.environ.setdefault("QUANTUM_ADMISSION", "off")
+    import main
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=timeout) as client:
+            return await ramp(client, args.levels, args.step_seconds, args.think_ms, args.slo_ms,
+                              args.max_error_rate, args.seed, progress)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process app)")
+    parser.add_argument("--levels", type=lambda text: [int(level) for level in text.split(",")],
+                        default=DEFAULT_LEVELS, help="Concurrency levels to ramp through (default 1,2,4,...,64)")
+    parser.add_argument("--step-seconds", type=float, default=10.0, help="Duration of each step (default 10)")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="Mean think time between a student's requests (default 0: closed loop)")
+    parser.add_argument("--slo-ms", type=float, default=250.0, help="p95 latency a sustainable step meets")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="Share of failed or shed requests a sustainable step allows (default 0.01)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the request mix")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Report JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed drop in sustainable req/s before it counts as regressed (default 0.25)")
+    args = parser.parse_args()
+
+    def progress(text: str) -> None:
+        print(f"  {text}", file=sys.stderr)
+
+    print(f"Ramping {args.url or 'in-process app'} through {args.levels} students:", file=sys.stderr)
+    steps = asyncio.run(run(args, progress))
+    report = {
+        "environment": {**environment(os.environ.get("QUANTUM_BACKEND", "aer")), "target": args.url or "in-process"},
+        "settings": {
+            "levels": args.levels,
+            "step_seconds": args.step_seconds,
+            "think_ms": args.think_ms,
+            "seed": args.seed,
+            "mix": {make(random.Random(0)).endpoint: weight for weight, make in LESSON_MIX},
+        },
+        "capacity": capacity(steps, args.slo_ms, args.max_error_rate),
+        "steps": steps,
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote the capacity report to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        result = compare(report, baseline, args.threshold)
+        if baseline["environment"].get("target") != report["environment"]["target"]:
+            print(f"\nwarning: {args.compare} was recorded against {baseline['environment'].get('target')}")
+        print(f"\nSustainable throughput {result['baseline_sustainable_rps']:.1f} -> "
+              f"{result['sustainable_rps']:.1f} req/s (x{result['sustainable_ratio']}) against {args.compare}")
+        for endpoint, ratios in result["endpoint_p95_ratios"].items():
+            worst = max(ratios.items(), key=lambda item: item[1])
+            if worst[1] > 1 + args.threshold:
+                print(f"  {endpoint}: p95 x{worst[1]} at {worst[0]} students")
+        if result["regressed"]:
+            print(f"  REGRESSION: sustainable throughput fell by more than {args.threshold:.0%}")
+            return 1
+        print("  No capacity regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,148 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import base64
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
-from quantum_service import quantum_service
+from typing import List, Literal, Optional
+from admission_control import AdmissionController, AdmissionRejected, current_client
+from circuit_registry import CircuitRegistry
+from diagram_assets import DiagramAssets
+from flip_stream import FlipStreamServer
+from metrics import ApiMetrics, current_endpoint, timed_endpoint
+from quantum_service import SAMPLING_METHODS, QuantumService, job_labels, plan_job
+from result_cache import ResultCache
+from shared_outcome_pool import POOL_ENV, SharedOutcomePool
+from request_coalescer import RequestCoalescer
+from request_profiler import RequestProfiler, job_profiles
+from shot_streaming import MAX_CHUNK_SIZE, MAX_STREAM_SHOTS, stream_counts
+from simulation_executor import SimulationExecutor, SimulationQueueFull, SimulationTimeout
+from simulator_profiles import load_profiles, thread_budget
+from startup import StartupTracker
+
+# Qiskit is not imported here: warm-up loads it in the background after startup
+startup = StartupTracker(started=_import_started)
+startup.record("app_import", time.perf_counter() - _import_started)
+
+# A convergence curve holds every shot of its run in memory, so it is capped
+# well below a stream (which only keeps running counts)
+MAX_CONVERGENCE_SHOTS = 100_000
+MAX_CONVERGENCE_POINTS = 200
+# Shots per setting of a CHSH experiment; it runs in chunks, so only time limits it
+MAX_CHSH_SHOTS = 10_000_000
+
+# Simulator work runs in a bounded process pool, never on the event loop
+simulation = SimulationExecutor.from_env()
+# Aer simulator profiles the workers route jobs to, loaded here as well so
+# that an invalid QUANTUM_AER_PROFILES fails at startup
+simulator_profiles = load_profiles()
+# Requests over the shot budget or their client's quota are shed before they submit work
+admission = AdmissionController.from_env()
+# Live outcome frames for the interactive coin demos, one WebSocket per student
+flip_streams = FlipStreamServer(simulation, admission)
+# Concurrent requests for the same circuit share one simulator job
+coalescer = RequestCoalescer.from_env(simulation)
+# Circuit diagrams are drawn once at startup and served from memory
+diagrams = DiagramAssets()
+# Seeded results are reproducible, so repeated seeded requests are served from memory
+results = ResultCache.from_env()
+# With several API workers, single shots come from the launcher's shared outcome pool
+outcome_pool = SharedOutcomePool.from_env()
+# Per-phase request and job metrics, scraped from /metrics
+api_metrics = ApiMetrics()
+api_metrics.add_gauge("quantum_simulation_jobs_in_flight", "Simulator jobs running or queued.",
+                      lambda: simulation.in_flight)
+api_metrics.add_gauge("quantum_simulation_queue_depth", "Simulator jobs waiting for a free worker.",
+                      lambda: simulation.queued)
+api_metrics.add_gauge("quantum_simulation_capacity", "Simulator jobs allowed in flight before requests get 503.",
+                      lambda: simulation.capacity)
+api_metrics.add_gauge("quantum_coalescer_pending_requests", "Requests waiting for their coalescing window to close.",
+                      lambda: coalescer.pending)
+api_metrics.add_gauge("quantum_flip_streams_open", "Open WebSocket flip streams.", lambda: flip_streams.open)
+api_metrics.add_counter("quantum_flip_stream_outcomes_total", "Outcomes pushed over WebSocket flip streams.",
+                        lambda: flip_streams.outcomes)
+api_metrics.add_gauge("quantum_admission_in_flight", "Admitted requests still running simulator work.",
+                      lambda: admission.in_flight)
+api_metrics.add_counter("quantum_admission_admitted_total", "Requests admitted to run simulator work.",
+                        lambda: admission.admitted)
+api_metrics.add_counter("quantum_admission_rejected_client_total",
+                        "Requests rejected with 429 because their client was over its shot quota.",
+                        lambda: admission.rejected_client)
+api_metrics.add_counter("quantum_admission_rejected_overload_total",
+                        "Requests shed with 503 because the shot budget or concurrency limit was reached.",
+                        lambda: admission.rejected_overload)
+api_metrics.add_gauge("quantum_result_cache_entries", "Seeded results in the cache.", lambda: len(results))
+api_metrics.add_gauge("quantum_result_cache_bytes", "Estimated size of the cached seeded results.",
+                      lambda: results.bytes)
+api_metrics.add_counter("quantum_result_cache_hits_total", "Seeded requests served from the cache.",
+                        lambda: results.hits)
+api_metrics.add_counter("quantum_result_cache_misses_total", "Seeded requests that ran a simulator job.",
+                        lambda: results.misses)
+api_metrics.add_counter("quantum_result_cache_evictions_total", "Cached results evicted to stay within the size limit.",
+                        lambda: results.evictions)
+if outcome_pool is not None:
+    api_metrics.add_counter("quantum_outcome_pool_hits_total", "Single shots served from the shared outcome pool.",
+                            lambda: outcome_pool.hits)
+    api_metrics.add_counter("quantum_outcome_pool_misses_total",
+                            "Single shots that found their pool ring empty and ran a simulator job.",
+                            lambda: outcome_pool.misses)
+
+
+def observe_job(method: str, args: tuple, phases, round_trip: float, labels: dict) -> None:
+    circuit, shots = job_labels(method, args)
+    api_metrics.observe_job(method, circuit, shots, phases, round_trip, labels.get("simulation_method", "none"),
+                            labels.get("simulator_profile", "none"))
+
+
+simulation.observer = observe_job
+
+
+class MetricsRoute(APIRoute):
+    """Route that records its requests in api_metrics, labeled by path template."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def metered_handler(request: Request) -> Response:
+            current_client.set(request.client.host if request.client else "unknown")
+            return await api_metrics.track_request(self.path, request.method, lambda: handler(request))
+
+        return metered_handler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if outcome_pool is not None and outcome_pool.slot is None:
+        outcome_pool.claim()
+    simulation.start()
+    warm_up = startup.start(
+        simulation, diagrams, os.environ.get("QUANTUM_DIAGRAM_FORMATS", "text").split(",")
+    )
+    yield
+    warm_up.cancel()
+    simulation.shutdown()
+    if outcome_pool is not None:
+        outcome_pool.release()
+
 
 app = FastAPI(
     title="QuantumLearn API",
     description="Backend API for quantum computing education platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.router.route_class = MetricsRoute
 
 # Allow frontend to connect (CORS)
 app.add_middleware(
@@ -21,13 +156,322 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Coalesced-Requests", "X-Coalesce-Window-Ms", "X-Result-Cache", "X-Simulation-Method",
+                    "X-Shots", "X-Bits-Per-Shot", "X-Profile"],
 )
 
+# Opt-in cProfile of selected requests; not installed at all without QUANTUM_PROFILE_DIR
+profiling = RequestProfiler.options_from_env()
+if profiling is not None:
+    app.add_middleware(RequestProfiler, **profiling)
+
+
+@app.exception_handler(SimulationQueueFull)
+async def simulation_queue_full_handler(request: Request, exc: SimulationQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail},
+                        headers={"Retry-After": exc.retry_after_header})
+
+
+@app.exception_handler(SimulationTimeout)
+async def simulation_timeout_handler(request: Request, exc: SimulationTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+def cache_key(method: str, args: tuple, seed: int, variant: Optional[str] = None) -> tuple:
+    """Result cache key of a seeded call: (method, variant, arguments, seed)."""
+    if method in SAMPLING_METHODS:
+        # (circuit key, shots), so that defaulted and explicit arguments share an entry
+        args = SAMPLING_METHODS[method].plan(*args)
+    else:
+        args = tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+    return (method, variant, args, seed)
+
+
+def report_simulation_method(response: Response, simulation_method: Optional[str]) -> None:
+    """Tell the client how its job was simulated (stabilizer, statevector or analytic)."""
+    if simulation_method:
+        response.headers["X-Simulation-Method"] = simulation_method
+
+
+def admitted(method: str, args: tuple):
+    """
+    Admission slot for a QuantumService call, sized by its shots.
+    
+    Raises:
+        ValueError: For arguments the call would reject, checked before
+                    anything is charged, so that they get 400 and not a 503
+        AdmissionRejected: If the call is over its client's quota or the service is saturated
+    """
+    _, shots = plan_job(method, args)
+    # Exact results are computed in closed form (no shots) and count as one
+    return admission.admit(current_client.get(), shots or 1)
+
+
+async def run_job(response: Response, method: str, *args):
+    """Run a simulator job, reporting its simulation method in X-Simulation-Method."""
+    with admitted(method, args):
+        result, labels = await simulation.run_labeled(method, *args)
+    report_simulation_method(response, labels.get("simulation_method"))
+    return result
+
+
+async def cached_run(response: Response, key: tuple, method: str, *args):
+    """Run a seeded job, or reuse its cached result (reported in X-Result-Cache)."""
+    cached = results.get(key)
+    response.headers["X-Result-Cache"] = "miss" if cached is None else "hit"
+    if cached is None:
+        with admitted(method, args):
+            result, labels = await simulation.run_labeled(method, *args)
+        cached = (result, labels.get("simulation_method"))
+        results.put(key, cached)
+    report_simulation_method(response, cached[1])
+    return cached[0]
+
+
+async def sample(response: Response, method: str, *args, seed: Optional[int] = None):
+    """
+    Run a QuantumService sampling method through the coalescer.
+    
+    Seeded calls are never merged with other requests (the seed fixes the
+    exact shots of one run); they are served from the result cache instead.
+    Unseeded single shots come from the shared outcome pool when there is one.
+    """
+    if seed is not None:
+        return await cached_run(response, cache_key(method, args, seed), method, *args, seed)
+    
+    if outcome_pool is not None:
+        key, shots = SAMPLING_METHODS[method].plan(*args)
+        outcome = outcome_pool.draw(key) if shots == 1 else None
+        if outcome is not None:
+            # Single-shot summaries need no QuantumService (none runs in this process)
+            return SAMPLING_METHODS[method].summarize(None, [outcome], *args)
+    
+    if job_profiles.get() is not None:
+        # A profiled request runs its own job, so that its profile contains it
+        return await run_job(response, method, *args)
+    
+    with admitted(method, args):
+        result, info = await coalescer.call(method, *args)
+    response.headers["X-Coalesced-Requests"] = str(info.merged_requests)
+    response.headers["X-Coalesce-Window-Ms"] = f"{info.window_ms:g}"
+    report_simulation_method(response, info.simulation_method)
+    return result
+
+
+async def sample_batch(response: Response, sequence: Optional[str], method: str, *args,
+                       seed: Optional[int] = None):
+    """
+    Run a batch sampling method, optionally with its per-shot outcomes.
+    
+    sequence=None returns the usual result (through the coalescer);
+    "base64" adds a bit-packed "sequence" to it; "binary" returns only the
+    packed bytes as application/octet-stream, with the layout in the
+    X-Shots and X-Bits-Per-Shot headers.
+    """
+    if sequence is None:
+        return await sample(response, method, *args, seed=seed)
+    
+    if seed is None:
+        result, packed = await run_job(response, "sample_with_sequence", method, args)
+    else:
+        key = cache_key(method, args, seed, variant="sequence")
+        result, packed = await cached_run(response, key, "sample_with_sequence", method, args, seed)
+    
+    if sequence == "binary":
+        return Response(
+            content=packed["data"],
+            media_type="application/octet-stream",
+            headers={
+                "X-Shots": str(packed["shots"]),
+                "X-Bits-Per-Shot": str(packed["bits_per_shot"]),
+                **{
+                    name: response.headers[name]
+                    for name in ("X-Result-Cache", "X-Simulation-Method") if name in response.headers
+                },
+            }
+        )
+    # Cached results are shared, so the sequence goes into a new dict
+    return {
+        **result,
+        "sequence": {
+            "encoding": "base64",
+            "shots": packed["shots"],
+            "bits_per_shot": packed["bits_per_shot"],
+            "data": base64.b64encode(packed["data"]).decode("ascii"),
+        }
+    }
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that holds an admission slot until it is done.
+    
+    The slot is released however the response ends: sent in full, the
+    client gone, or cancelled before its body was first iterated (when a
+    finally in the body generator would never run).
+    """
+    
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+def stream(request: Request, key, shots: int, chunk_size: int, seed: Optional[int] = None) -> StreamingResponse:
+    """Stream a chunked run of a registered circuit as NDJSON."""
+    shots = max(1, min(shots, MAX_STREAM_SHOTS))
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+    # Admitted up front (a stream larger than a bucket waits for a full bucket
+    # and leaves it in debt); the slot is held until the stream ends or the client leaves
+    release = admission.acquire(current_client.get(), shots)
+    return AdmittedStreamingResponse(
+        stream_counts(simulation, request, key, shots, chunk_size, seed), release, media_type="application/x-ndjson"
+    )
+
+
+async def convergence(response: Response, key, request) -> dict:
+    """Convergence curve of one run of a registered circuit."""
+    shots = max(1, min(request.shots, MAX_CONVERGENCE_SHOTS))
+    points = max(2, min(request.points, MAX_CONVERGENCE_POINTS))
+    args = (key, shots, points, request.confidence)
+    try:
+        if request.seed is None:
+            return await run_job(response, "convergence_curve", *args)
+        return await cached_run(
+            response, cache_key("convergence_curve", args, request.seed), "convergence_curve", *args, request.seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def chsh(args: tuple, shots: int, seed: Optional[int]) -> tuple:
+    """
+    Run a CHSH experiment as chunks of at most CHSH_CHUNK_SHOTS shots per
+    setting (chunk i seeded with seed + i) and merge their counts.
+    
+    Each chunk is admitted when it is submitted, so an experiment larger
+    than the shot budget is paced by the budget instead of needing all of
+    it at once. A chunk is charged at most half of a full bucket, so an
+    experiment started right after another request is not shed for the
+    size of its first chunk. The first chunk is shed like any request;
+    later chunks wait for the budget, for at most the job timeout.
+    
+    Returns:
+        (result, simulation method)
+    """
+    chunk = QuantumService.CHSH_CHUNK_SHOTS
+    limit = admission.bulk_limit
+    if limit is not None:
+        # Shots charged per shot per setting (one for each setting)
+        _, per_shot = plan_job("chsh_experiment", (*args, 1))
+        chunk = max(1, min(chunk, int(limit // (2 * per_shot))))
+    sizes = [min(chunk, shots - start) for start in range(0, shots, chunk)]
+    # At most one chunk per worker, so a large experiment does not fill the queue
+    slots = asyncio.Semaphore(max(1, simulation.workers))
+    loop = asyncio.get_running_loop()
+    
+    async def admit(size: int):
+        _, chunk_shots = plan_job("chsh_experiment", (*args, size))
+        deadline = loop.time() + simulation.timeout
+        while True:
+            try:
+                return admission.acquire(current_client.get(), chunk_shots)
+            except AdmissionRejected as e:
+                if loop.time() + e.retry_after > deadline:
+                    raise
+                await asyncio.sleep(e.retry_after)
+    
+    async def run(i: int, size: int, release=None):
+        async with slots:
+            release = release or await admit(size)
+            try:
+                return await simulation.run_labeled(
+                    "chsh_experiment", *args, size, False, None if seed is None else seed + i
+                )
+            finally:
+                release()
+    
+    # Invalid arguments raise here, and a saturated service sheds the experiment before anything runs
+    first = admission.acquire(current_client.get(), plan_job("chsh_experiment", (*args, sizes[0]))[1])
+    tasks = [asyncio.ensure_future(run(i, size, first if i == 0 else None)) for i, size in enumerate(sizes)]
+    try:
+        runs = await asyncio.gather(*tasks)
+    finally:
+        # A failed chunk (or a client that left) stops the others
+        for task in tasks:
+            task.cancel()
+        first()  # In case its task was cancelled before it started
+    result = runs[0][0] if len(runs) == 1 else QuantumService.merge_chsh([result for result, _ in runs])
+    return result, runs[0][1].get("simulation_method")
+
+
+def diagram(request: Request, name: str, fmt: str, not_found: str) -> Response:
+    """Serve a pre-rendered diagram asset."""
+    if not diagrams.rendered:
+        raise HTTPException(status_code=503, detail="Circuit diagrams are still being rendered",
+                            headers={"Retry-After": "1"})
+    if not diagrams.has(name, fmt):
+        raise HTTPException(status_code=404, detail=not_found)
+    return diagrams.response(request, name, fmt)
+
 
 # ==================== Request/Response Models ====================
 
+# Per-shot outcomes: None (counts only), "base64" (added to the JSON) or
+# "binary" (raw application/octet-stream body instead of the JSON)
+SequenceFormat = Optional[Literal["base64", "binary"]]
+
+
+class ShotSequence(BaseModel):
+    """Every shot's outcome, bits_per_shot bits each, packed most significant bit first."""
+    encoding: str
+    shots: int
+    bits_per_shot: int
+    data: str
+
+
+class FlipRequest(BaseModel):
+    seed: Optional[int] = None  # Simulator seed for a reproducible (and cached) result
+
+
 class BatchFlipRequest(BaseModel):
     shots: int = 100
+    sequence: SequenceFormat = None
+    seed: Optional[int] = None
+
+
+class StreamFlipRequest(BaseModel):
+    shots: int = 1_000_000
+    chunk_size: int = 10_000
+    seed: Optional[int] = None
+
+
+class ConvergenceRequest(BaseModel):
+    shots: int = 10_000
+    points: int = 50  # Log-spaced checkpoints
+    confidence: float = 0.95
+    seed: Optional[int] = None
+
+
+class ConvergenceResponse(BaseModel):
+    total_shots: int
+    confidence: float
+    checkpoints: List[int]
+    expected_percentages: dict
+    percentages: dict  # outcome -> percentage at each checkpoint
+    deviation: dict  # outcome -> percentage points from expected at each checkpoint
+    max_abs_deviation: List[float]
+    bands: dict  # outcome -> {"lower": [...], "upper": [...]}
 
 
 class CoinFlipResponse(BaseModel):
@@ -42,6 +486,7 @@ class BatchFlipResponse(BaseModel):
     zero_percentage: float
     one_percentage: float
     theoretical_probability: float
+    sequence: Optional[ShotSequence] = None
 
 
 class DoubleCoinFlipResponse(BaseModel):
@@ -58,6 +503,27 @@ class DoubleBatchFlipResponse(BaseModel):
     percentages: dict
     labels: dict
     theoretical_probability: float
+    sequence: Optional[ShotSequence] = None
+
+
+class MultiCoinFlipRequest(BaseModel):
+    n_qubits: int = 3
+    shots: int = 100
+    sequence: SequenceFormat = None
+    seed: Optional[int] = None
+
+
+class MultiCoinFlipBatchResponse(BaseModel):
+    n_qubits: int
+    total_shots: int
+    representation: str
+    distinct_outcomes: int
+    counts: dict
+    percentages: dict
+    marginals: dict
+    theoretical_probability: float
+    theoretical_marginal: float
+    sequence: Optional[ShotSequence] = None
 
 
 class CircuitResponse(BaseModel):
@@ -68,11 +534,21 @@ class CircuitResponse(BaseModel):
 
 class BellStateRequest(BaseModel):
     state: str  # phi_plus, psi_plus, phi_minus, psi_minus
+    seed: Optional[int] = None
 
 
 class BellStateBatchRequest(BaseModel):
     state: str
     shots: int = 100
+    sequence: SequenceFormat = None
+    seed: Optional[int] = None
+
+
+class BellStateStreamRequest(BaseModel):
+    state: str
+    shots: int = 1_000_000
+    chunk_size: int = 10_000
+    seed: Optional[int] = None
 
 
 class BellStateResponse(BaseModel):
@@ -81,6 +557,42 @@ class BellStateResponse(BaseModel):
     description: str
 
 
+class BellStateConvergenceRequest(BaseModel):
+    state: str
+    shots: int = 10_000
+    points: int = 50
+    confidence: float = 0.95
+    seed: Optional[int] = None
+
+
+class ChshRequest(BaseModel):
+    state: str = "phi_plus"
+    alice: Optional[List[float]] = None  # [a, a'] in radians, default [0, π/2]
+    bob: Optional[List[float]] = None  # [b, b'], default: the pair maximizing S
+    shots: int = 10_000  # Per setting, up to 10 million
+    exact: bool = False  # Only the exact correlators and S, no sampling
+    seed: Optional[int] = None
+
+
+class ChshResponse(BaseModel):
+    state: str
+    alice: List[float]
+    bob: List[float]
+    settings: List[str]
+    expected_correlators: List[float]
+    expected_S: float
+    classical_bound: float
+    quantum_bound: float
+    exact: bool
+    shots_per_setting: Optional[int] = None
+    counts: Optional[List[dict]] = None
+    correlators: Optional[List[float]] = None
+    correlator_errors: Optional[List[float]] = None
+    S: Optional[float] = None
+    S_error: Optional[float] = None
+    violation_sigmas: Optional[float] = None
+
+
 class BellStateBatchResponse(BaseModel):
     counts: dict
     total_shots: int
@@ -88,19 +600,62 @@ class BellStateBatchResponse(BaseModel):
     percentages: dict
     expected_percentages: dict
     description: str
+    sequence: Optional[ShotSequence] = None
+
+
+class EntangledStateBatchRequest(BaseModel):
+    state: str  # ghz, w
+    n_qubits: int = 3
+    shots: int = 1000
+    sequence: SequenceFormat = None
+    seed: Optional[int] = None
+
+
+class EntangledStateBatchResponse(BaseModel):
+    state: str
+    n_qubits: int
+    total_shots: int
+    all_equal_percentage: float
+    parity: dict
+    hamming_weights: dict
+    pairwise_agreement: dict
+    one_percentages: list
+    expected: dict
+    description: str
+    sequence: Optional[ShotSequence] = None
 
 
 # ==================== Measurement Models ====================
 
 class MeasureQubitRequest(BaseModel):
     state: str  # equal, biased_0, biased_1, definite_0, definite_1
-    basis: str = "z"  # z or x
+    basis: str = "z"  # z, x or y
+    seed: Optional[int] = None
 
 
 class MeasureQubitBatchRequest(BaseModel):
     state: str
     basis: str = "z"
     shots: int = 100
+    sequence: SequenceFormat = None
+    seed: Optional[int] = None
+
+
+class MeasureQubitStreamRequest(BaseModel):
+    state: str
+    basis: str = "z"
+    shots: int = 1_000_000
+    chunk_size: int = 10_000
+    seed: Optional[int] = None
+
+
+class MeasureQubitConvergenceRequest(BaseModel):
+    state: str
+    basis: str = "z"
+    shots: int = 10_000
+    points: int = 50
+    confidence: float = 0.95
+    seed: Optional[int] = None
 
 
 class MeasureQubitResponse(BaseModel):
@@ -115,12 +670,59 @@ class MeasureQubitBatchResponse(BaseModel):
     state: str
     basis: str
     percentages: dict
+    sequence: Optional[ShotSequence] = None
+
+
+class MeasureQubitMatrixRequest(BaseModel):
+    states: Optional[List[str]] = None  # default: all five states
+    bases: Optional[List[str]] = None  # default: z, x and y
+    bell_states: List[str] = []
+    shots: int = 1000
+    seed: Optional[int] = None
+
+
+class MeasureQubitMatrixResponse(BaseModel):
+    total_shots: int
+    circuits: int
+    measurement_outcomes: List[str]
+    measurements: List[dict]
+    bell_outcomes: List[str]
+    bell_states: List[dict]
+
+
+class MeasureQubitSweepRequest(BaseModel):
+    sweep: Literal["theta", "phi", "basis_theta", "basis_phi"] = "theta"
+    start: float = 0.0
+    stop: float = 6.283185307179586  # 2π
+    points: int = 181
+    values: Optional[List[float]] = None  # Explicit angles instead of start/stop/points
+    theta: float = 0.0  # Angles (radians) held fixed while another one is swept
+    phi: float = 0.0
+    basis: str = "z"  # z, x, y, or custom to measure along (basis_theta, basis_phi)
+    basis_theta: Optional[float] = None
+    basis_phi: Optional[float] = None
+    shots: int = 1000  # Per point
+    exact: bool = False  # Only the Born-rule curve, no sampling
+    seed: Optional[int] = None
+
+
+class MeasureQubitSweepResponse(BaseModel):
+    points: int
+    basis: str
+    swept: List[str]
+    angles: dict
+    expected_probabilities: dict
+    exact: bool
+    shots_per_point: Optional[int] = None
+    counts: Optional[dict] = None
+    probabilities: Optional[dict] = None
+    max_abs_deviation: Optional[float] = None
 
 
 # ==================== Health Check ====================
 
 @app.get("/")
-def root():
+async def root():
     """Health check endpoint."""
     return {
         "message": "QuantumLearn API is running",
@@ -131,26 +733,120 @@ def root():
                 "/api/quantum-coin-flip",
                 "/api/quantum-coin-flip-batch",
                 "/api/double-coin-flip",
-                "/api/double-coin-flip-batch"
+                "/api/double-coin-flip-batch",
+                "/api/multi-coin-flip-batch",
+                "/ws/flips"
             ],
             "entanglement": [
                 "/api/bell-state-measure",
                 "/api/bell-state-batch",
-                "/api/bell-states/info"
+                "/api/bell-states/info",
+                "/api/bell-state-chsh",
+                "/api/entangled-state-batch"
             ],
             "measurement": [
                 "/api/measure-qubit",
-                "/api/measure-qubit-batch"
+                "/api/measure-qubit-batch",
+                "/api/measure-qubit-matrix",
+                "/api/measure-qubit-sweep"
             ],
             "docs": "/docs"
         }
     }
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving (even while warming up)."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 200 once warm-up has finished, 503 with progress until then."""
+    status = startup.readiness()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+
+@app.get("/api/startup-report")
+async def get_startup_report():
+    """Startup time broken down into import, construction and first-run phases."""
+    return startup.report()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request, simulator-job and queue metrics in Prometheus text format."""
+    return Response(content=api_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Size and hit/miss counters of the seeded result cache."""
+    return results.stats()
+
+
+@app.get("/api/outcome-pool/stats")
+async def get_outcome_pool_stats():
+    """This worker's share of the shared outcome pool (multi-worker mode only)."""
+    if outcome_pool is None:
+        return {"enabled": False}
+    return outcome_pool.stats()
+
+
+@app.get("/api/coalescing/stats")
+async def get_coalescing_stats():
+    """How many requests were merged into each simulator job."""
+    return coalescer.stats()
+
+
+@app.get("/api/admission/stats")
+async def get_admission_stats():
+    """Admission limits, current load and how many requests were admitted or shed."""
+    return admission.stats()
+
+
+@app.get("/api/simulator-profiles")
+async def get_simulator_profiles():
+    """Aer simulator profiles in routing order (used with QUANTUM_BACKEND=aer)."""
+    return {
+        "backend": os.environ.get("QUANTUM_BACKEND", "aer"),
+        "thread_budget": thread_budget(),
+        "profiles": {profile.name: profile.describe() for profile in simulator_profiles},
+    }
+
+
+@app.get("/api/flip-stream/stats")
+async def get_flip_stream_stats():
+    """Open WebSocket flip streams and how many outcomes each simulator run served."""
+    return flip_streams.stats()
+
+
+# ==================== CIRCUIT DIAGRAMS ====================
+
+@app.get("/api/diagrams/{name}")
+async def get_diagram(name: str, request: Request, format: str = "text"):
+    """
+    Get one pre-rendered circuit diagram.
+    
+    Names: single_coin, double_coin, bell_<state>, measure_<state>_<basis>
+    Formats: text, json, svg (if enabled with QUANTUM_DIAGRAM_FORMATS)
+    """
+    return diagram(request, name, format, f"No {format} diagram named {name}")
+
+
+@app.get("/api/lessons/{lesson}/diagrams")
+async def get_lesson_diagrams(lesson: str, request: Request):
+    """Get every circuit diagram a lesson shows (superposition, entanglement, measurement)."""
+    return diagram(request, lesson, "bundle", f"Unknown lesson: {lesson}")
+
+
 # ==================== SINGLE COIN ENDPOINTS (1 Qubit) ====================
 
 @app.post("/api/quantum-coin-flip", response_model=CoinFlipResponse)
-def flip_quantum_coin():
+async def flip_quantum_coin(response: Response, request: Optional[FlipRequest] = None):
     """
     Perform a single quantum coin flip.
     
@@ -158,35 +854,52 @@ def flip_quantum_coin():
     - H|0⟩ = (|0⟩ + |1⟩) / √2
     - 50% chance of 0 (Heads), 50% chance of 1 (Tails)
     """
-    result = quantum_service.quantum_coin_flip()
+    result = await sample(response, "quantum_coin_flip", seed=request.seed if request else None)
     return {
         "result": result,
         "result_label": "Heads" if result == 0 else "Tails"
     }
 
 
-@app.post("/api/quantum-coin-flip-batch", response_model=BatchFlipResponse)
-def flip_quantum_coin_batch(request: BatchFlipRequest):
+@app.post("/api/quantum-coin-flip-batch", response_model=BatchFlipResponse, response_model_exclude_unset=True)
+async def flip_quantum_coin_batch(request: BatchFlipRequest, response: Response):
     """
     Perform multiple quantum coin flips at once.
     Returns statistics showing convergence to 50/50.
     """
     # Validate shots range
     shots = max(1, min(request.shots, 10000))
-    return quantum_service.quantum_coin_flip_batch(shots)
+    return await sample_batch(response, request.sequence, "quantum_coin_flip_batch", shots, seed=request.seed)
+
+
+@app.post("/api/quantum-coin-flip-batch/stream")
+async def stream_quantum_coin_batch(request: StreamFlipRequest, http_request: Request):
+    """
+    Stream up to 10 million coin flips as NDJSON.
+    Each line reports running counts and how far they are from 50/50.
+    """
+    return stream(http_request, CircuitRegistry.coin_key("single"), request.shots, request.chunk_size, request.seed)
+
+
+@app.post("/api/quantum-coin-flip-batch/convergence", response_model=ConvergenceResponse)
+async def quantum_coin_convergence(request: ConvergenceRequest, response: Response):
+    """
+    Running heads/tails percentages of one run of up to 100,000 flips,
+    at log-spaced checkpoints, with confidence bands around 50/50.
+    """
+    return await convergence(response, CircuitRegistry.coin_key("single"), request)
 
 
 @app.get("/api/quantum-circuit", response_model=CircuitResponse)
-def get_single_circuit():
+async def get_single_circuit(request: Request):
     """Get the quantum circuit diagram for single coin flip."""
-    diagram = quantum_service.get_single_circuit_diagram()
-    return {"circuit_diagram": diagram}
+    return diagram(request, "single_coin", "json", "No diagram named single_coin")
 
 
 # ==================== DOUBLE COIN ENDPOINTS (2 Qubits) ====================
 
 @app.post("/api/double-coin-flip", response_model=DoubleCoinFlipResponse)
-def flip_double_coin():
+async def flip_double_coin(response: Response, request: Optional[FlipRequest] = None):
     """
     Perform a double quantum coin flip (2 qubits).
     
@@ -194,31 +907,64 @@ def flip_double_coin():
     - H|0⟩ ⊗ H|0⟩ = (|00⟩ + |01⟩ + |10⟩ + |11⟩) / 2
     - 25% chance for each outcome: 00, 01, 10, 11
     """
-    return quantum_service.double_coin_flip()
+    return await sample(response, "double_coin_flip", seed=request.seed if request else None)
 
 
-@app.post("/api/double-coin-flip-batch", response_model=DoubleBatchFlipResponse)
-def flip_double_coin_batch(request: BatchFlipRequest):
+@app.post("/api/double-coin-flip-batch", response_model=DoubleBatchFlipResponse, response_model_exclude_unset=True)
+async def flip_double_coin_batch(request: BatchFlipRequest, response: Response):
     """
     Perform multiple double quantum coin flips at once.
     Returns statistics for all 4 possible outcomes.
     """
     # Validate shots range
     shots = max(1, min(request.shots, 10000))
-    return quantum_service.double_coin_flip_batch(shots)
+    return await sample_batch(response, request.sequence, "double_coin_flip_batch", shots, seed=request.seed)
+
+
+@app.post("/api/double-coin-flip-batch/stream")
+async def stream_double_coin_batch(request: StreamFlipRequest, http_request: Request):
+    """
+    Stream up to 10 million double coin flips as NDJSON.
+    Each line reports running counts for all 4 outcomes.
+    """
+    return stream(http_request, CircuitRegistry.coin_key("double"), request.shots, request.chunk_size, request.seed)
+
+
+@app.post("/api/double-coin-flip-batch/convergence", response_model=ConvergenceResponse)
+async def double_coin_convergence(request: ConvergenceRequest, response: Response):
+    """
+    Running percentages of the four double-coin outcomes at log-spaced checkpoints.
+    """
+    return await convergence(response, CircuitRegistry.coin_key("double"), request)
 
 
 @app.get("/api/double-quantum-circuit", response_model=CircuitResponse)
-def get_double_circuit():
+async def get_double_circuit(request: Request):
     """Get the quantum circuit diagram for double coin flip."""
-    diagram = quantum_service.get_double_circuit_diagram()
-    return {"circuit_diagram": diagram}
+    return diagram(request, "double_coin", "json", "No diagram named double_coin")
+
+
+# ==================== N-QUBIT COIN ENDPOINTS ====================
+
+@app.post("/api/multi-coin-flip-batch", response_model=MultiCoinFlipBatchResponse, response_model_exclude_unset=True)
+async def flip_multi_coin_batch(request: MultiCoinFlipRequest, response: Response):
+    """
+    Flip n quantum coins (1-63 qubits) many times.
+    
+    Small n lists all 2^n outcomes; large n lists only observed outcomes.
+    Per-coin marginals show every coin converging to 50/50.
+    """
+    shots = max(1, min(request.shots, 10000))
+    try:
+        return await sample_batch(response, request.sequence, "multi_coin_flip_batch", request.n_qubits, shots, seed=request.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ==================== BELL STATE ENDPOINTS (Entanglement) ====================
 
 @app.post("/api/bell-state-measure", response_model=BellStateResponse)
-def measure_bell_state(request: BellStateRequest):
+async def measure_bell_state(request: BellStateRequest, response: Response):
     """
     Measure a Bell state once and return the result.
     
@@ -229,13 +975,13 @@ def measure_bell_state(request: BellStateRequest):
     - psi_minus: Ψ⁻ = (|01⟩ - |10⟩)/√2 - Qubits differ (phase)
     """
     try:
-        return quantum_service.bell_state_measure(request.state)
+        return await sample(response, "bell_state_measure", request.state, seed=request.seed)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.post("/api/bell-state-batch", response_model=BellStateBatchResponse)
-def measure_bell_state_batch(request: BellStateBatchRequest):
+@app.post("/api/bell-state-batch", response_model=BellStateBatchResponse, response_model_exclude_unset=True)
+async def measure_bell_state_batch(request: BellStateBatchRequest, response: Response):
     """
     Measure a Bell state multiple times and return statistics.
     Shows quantum correlations over many measurements.
@@ -243,13 +989,76 @@ def measure_bell_state_batch(request: BellStateBatchRequest):
     # Validate shots range
     shots = max(1, min(request.shots, 10000))
     try:
-        return quantum_service.bell_state_batch(request.state, shots)
+        return await sample_batch(response, request.sequence, "bell_state_batch", request.state, shots, seed=request.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/bell-state-batch/stream")
+async def stream_bell_state_batch(request: BellStateStreamRequest, http_request: Request):
+    """
+    Stream up to 10 million Bell state measurements as NDJSON.
+    """
+    try:
+        key = CircuitRegistry.bell_key(request.state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream(http_request, key, request.shots, request.chunk_size, request.seed)
+
+
+@app.post("/api/bell-state-batch/convergence", response_model=ConvergenceResponse)
+async def bell_state_convergence(request: BellStateConvergenceRequest, response: Response):
+    """
+    Running percentages of a Bell state's outcomes at log-spaced checkpoints.
+    """
+    try:
+        key = CircuitRegistry.bell_key(request.state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await convergence(response, key, request)
+
+
+@app.post("/api/bell-state-chsh", response_model=ChshResponse, response_model_exclude_unset=True)
+async def bell_state_chsh(request: ChshRequest, response: Response):
+    """
+    Test the CHSH (Bell) inequality on a Bell state.
+    
+    Estimates the correlators E(a,b), E(a,b'), E(a',b), E(a',b') and
+    S = E(a,b) + E(a,b') + E(a',b) - E(a',b') with its standard error.
+    Local hidden variables allow |S| ≤ 2, quantum mechanics up to 2√2.
+    The four settings run as one multi-circuit job; larger experiments
+    are split into chunks that fit the admission budget and run in parallel.
+    """
+    shots = max(1, min(request.shots, MAX_CHSH_SHOTS))
+    args = (request.state, request.alice, request.bob)
+    try:
+        if request.exact:
+            return await run_job(response, "chsh_experiment", *args, shots, True)
+        if request.seed is None:
+            result, simulation_method = await chsh(args, shots, None)
+            report_simulation_method(response, simulation_method)
+            return result
+        
+        key = cache_key("chsh_experiment", (*args, shots), request.seed)
+        cached = results.get(key)
+        response.headers["X-Result-Cache"] = "miss" if cached is None else "hit"
+        if cached is None:
+            cached = await chsh(args, shots, request.seed)
+            results.put(key, cached)
+        report_simulation_method(response, cached[1])
+        return cached[0]
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/api/bell-state-circuit/{state}", response_model=CircuitResponse)
+async def get_bell_state_circuit(state: str, request: Request):
+    """Get the quantum circuit diagram for a Bell state."""
+    return diagram(request, f"bell_{state}", "json", f"Unknown Bell state: {state}")
+
+
 @app.get("/api/bell-states/info")
-def get_bell_states_info():
+async def get_bell_states_info():
     """
     Get information about all available Bell states.
     Useful for the frontend to display state options.
@@ -284,10 +1093,33 @@ def get_bell_states_info():
     }
 
 
+# ==================== N-PARTY ENTANGLEMENT ENDPOINTS (GHZ / W) ====================
+
+@app.post("/api/entangled-state-batch", response_model=EntangledStateBatchResponse, response_model_exclude_unset=True)
+async def measure_entangled_state_batch(request: EntangledStateBatchRequest, response: Response):
+    """
+    Measure an n-qubit GHZ or W state (2-500 qubits) many times.
+    
+    - ghz: (|0…0⟩ + |1…1⟩)/√2 - All qubits always match
+    - w: (|10…0⟩ + … + |0…01⟩)/√n - Exactly one qubit is 1
+    
+    Returns correlation statistics (all-equal rate, parity, Hamming weights,
+    pairwise agreement) instead of 2^n outcome counts; the full pairwise
+    matrix is included up to 32 qubits.
+    """
+    shots = max(1, min(request.shots, 10000))
+    try:
+        return await sample_batch(
+            response, request.sequence, "entangled_state_batch", request.state, request.n_qubits, shots, seed=request.seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ==================== MEASUREMENT ENDPOINTS ====================
 
 @app.post("/api/measure-qubit", response_model=MeasureQubitResponse)
-def measure_qubit(request: MeasureQubitRequest):
+async def measure_qubit(request: MeasureQubitRequest, response: Response):
     """
     Measure a prepared quantum state in a chosen basis.
     
@@ -303,15 +1135,16 @@ def measure_qubit(request: MeasureQubitRequest):
     Bases:
     - z: Computational basis (standard 0 or 1)
     - x: Hadamard basis (+ or -)
+    - y: Circular basis (+i or -i)
     """
     try:
-        return quantum_service.measure_qubit(request.state, request.basis)
+        return await sample(response, "measure_qubit", request.state, request.basis, seed=request.seed)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.post("/api/measure-qubit-batch", response_model=MeasureQubitBatchResponse)
-def measure_qubit_batch(request: MeasureQubitBatchRequest):
+@app.post("/api/measure-qubit-batch", response_model=MeasureQubitBatchResponse, response_model_exclude_unset=True)
+async def measure_qubit_batch(request: MeasureQubitBatchRequest, response: Response):
     """
     Measure a quantum state multiple times to observe probability distribution.
     
@@ -319,11 +1152,107 @@ def measure_qubit_batch(request: MeasureQubitBatchRequest):
     """
     shots = max(1, min(request.shots, 10000))
     try:
-        return quantum_service.measure_qubit_batch(request.state, request.basis, shots)
+        return await sample_batch(response, request.sequence, "measure_qubit_batch", request.state, request.basis, shots, seed=request.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/measure-qubit-batch/stream")
+async def stream_measure_qubit_batch(request: MeasureQubitStreamRequest, http_request: Request):
+    """
+    Stream up to 10 million measurements of a prepared state as NDJSON.
+    """
+    try:
+        key = CircuitRegistry.measure_key(request.state, request.basis)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream(http_request, key, request.shots, request.chunk_size, request.seed)
+
+
+@app.post("/api/measure-qubit-batch/convergence", response_model=ConvergenceResponse)
+async def measure_qubit_convergence(request: MeasureQubitConvergenceRequest, response: Response):
+    """
+    Running percentages of a measured state's outcomes at log-spaced
+    checkpoints: the Born rule emerging from individual shots.
+    """
+    try:
+        key = CircuitRegistry.measure_key(request.state, request.basis)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await convergence(response, key, request)
+
+
+@app.post("/api/measure-qubit-matrix", response_model=MeasureQubitMatrixResponse)
+async def measure_qubit_matrix(request: MeasureQubitMatrixRequest, response: Response):
+    """
+    Measure every selected state in every selected basis in one request.
+    
+    All circuits (optionally including Bell states) run as a single
+    simulator job; each row lists counts next to the exact probabilities.
+    """
+    shots = max(1, min(request.shots, 10000))
+    try:
+        args = (request.states, request.bases, request.bell_states, shots)
+        if request.seed is None:
+            return await run_job(response, "measure_qubit_matrix", *args)
+        return await cached_run(
+            response, cache_key("measure_qubit_matrix", args, request.seed), "measure_qubit_matrix", *args, request.seed
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/measure-qubit-sweep", response_model=MeasureQubitSweepResponse, response_model_exclude_unset=True)
+async def measure_qubit_sweep(request: MeasureQubitSweepRequest, response: Response):
+    """
+    Probability of each outcome versus an angle, in one request.
+    
+    Sweeps one of the preparation angles (theta, phi) or of the measured
+    axis (basis_theta, basis_phi, with basis="custom") over up to 1000
+    points. All points run as a single simulator job (points × shots at
+    most 1,000,000); exact=true returns only the Born-rule curve.
+    """
+    if request.values is not None:
+        values = request.values
+    else:
+        points = max(1, min(request.points, QuantumService.MAX_SWEEP_POINTS))
+        step = (request.stop - request.start) / (points - 1) if points > 1 else 0.0
+        values = [request.start + i * step for i in range(points)]
+    
+    angles = {"theta": request.theta, "phi": request.phi, "basis_theta": request.basis_theta, "basis_phi": request.basis_phi}
+    angles[request.sweep] = values
+    shots = max(1, min(request.shots, 10000))
+    try:
+        args = (angles["theta"], angles["phi"], request.basis, angles["basis_theta"], angles["basis_phi"],
+                shots, request.exact)
+        if request.seed is None:
+            return await run_job(response, "measure_qubit_sweep", *args)
+        return await cached_run(
+            response, cache_key("measure_qubit_sweep", args, request.seed), "measure_qubit_sweep", *args, request.seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ==================== LIVE FLIP STREAM (WebSocket) ====================
+
+@app.websocket("/ws/flips")
+async def flip_stream(websocket: WebSocket):
+    """
+    Stream live measurement outcomes of a coin, Bell state or measurement circuit.
+    
+    Send {"action": "subscribe", "circuit": "coin", "state": "single", "rate": 2}
+    and receive {"event": "outcomes", "frame": n, "outcomes": [...]} frames at
+    that rate; acknowledge them with {"action": "ack", "frame": n}, and use
+    {"action": "pause"}, {"action": "resume"} and {"action": "rate", "rate": r}
+    to control the stream. See FlipStreamServer for the full protocol.
+    """
+    # WebSocket routes bypass MetricsRoute, so label the jobs and admission here
+    current_endpoint.set("/ws/flips")
+    current_client.set(websocket.client.host if websocket.client else "unknown")
+    await flip_streams.serve(websocket)
+
+
 # ==================== Run Server ====================
 
 if __name__ == "__main__":
@@ -331,4 +1260,16 @@ if __name__ == "__main__":
     print("🚀 Starting QuantumLearn API server...")
     print("📍 API docs available at: http://localhost:8000/docs")
     print("📚 Lessons: Superposition ✅ | Entanglement ✅ | Measurement ✅")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    api_workers = int(os.environ.get("QUANTUM_API_WORKERS", 1))
+    if api_workers > 1:
+        # One sampler process fills a shared outcome pool for every API worker;
+        # the workers find it through the environment they inherit
+        with SharedOutcomePool.create(
+            slots=api_workers, capacity=int(os.environ.get("QUANTUM_POOL_CAPACITY", 16_384))
+        ) as pool:
+            pool.start_sampler(backend=os.environ.get("QUANTUM_BACKEND", "aer"))
+            os.environ[POOL_ENV] = pool.name
+            print(f"⚙️  {api_workers} API workers sharing outcome pool {pool.name}")
+            uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=api_workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,285 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Phases a simulator job is split into. Everything in a job that is not
+# construction, transpilation or the simulator run itself (get_counts(),
+# building the result dict) is counted as postprocess.
+JOB_PHASES = ("construct", "transpile", "simulate", "postprocess")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the shot buckets used as a label
+SHOT_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def shot_bucket(shots: Optional[int]) -> str:
+    """Label for a shot count: the smallest SHOT_BUCKETS bound that holds it."""
+    if shots is None:
+        return "none"
+    index = bisect_left(SHOT_BUCKETS, shots)
+    return str(SHOT_BUCKETS[index]) if index < len(SHOT_BUCKETS) else "+Inf"
+
+
+# ==================== Phase Timers (worker side) ====================
+
+_phases = threading.local()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time a block as one phase of the current job.
+
+    Outside collect_phases() (e.g. in the reservoir's refill thread) this only
+    costs two perf_counter() calls.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = getattr(_phases, "timings", None)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def label_job(name: str, value: str) -> None:
+    """Attach a label (e.g. the simulation method) to the current job."""
+    labels = getattr(_phases, "labels", None)
+    if labels is not None:
+        labels[name] = value
+
+
+@contextmanager
+def collect_labels() -> Iterator[Dict[str, str]]:
+    """Collect the labels attached in this thread with label_job()."""
+    labels: Dict[str, str] = {}
+    _phases.labels = labels
+    try:
+        yield labels
+    finally:
+        _phases.labels = None
+
+
+@contextmanager
+def collect_phases() -> Iterator[Dict[str, float]]:
+    """Collect the phases timed in this thread into a dict of seconds."""
+    timings: Dict[str, float] = {}
+    _phases.timings = timings
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        _phases.timings = None
+        total = time.perf_counter() - start
+        timings["postprocess"] = timings.get("postprocess", 0.0) + max(0.0, total - sum(timings.values()))
+        timings["total"] = total
+
+
+# ==================== Prometheus Metrics (API side) ====================
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class CallbackMetric:
+    """A gauge or counter whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float], type: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.type = type
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", f"{self.name} {self.read():g}"]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [count per bucket (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [f'le="{bound:g}"' for bound in self.buckets] + ['le="+Inf"']
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, bound)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+# Route template of the request being served, for labeling its simulator jobs
+current_endpoint: contextvars.ContextVar[str] = contextvars.ContextVar("current_endpoint", default="none")
+# Seconds spent in the endpoint function of the request being served
+_handler_seconds: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("handler_seconds", default=None)
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """
+    Wrap an async endpoint so ApiMetrics can tell its own time apart from
+    request parsing and response validation. functools.wraps keeps the
+    signature FastAPI reads the parameters from.
+    """
+    if not asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            handler_seconds = _handler_seconds.get()
+            if handler_seconds is not None:
+                handler_seconds[0] += time.perf_counter() - start
+    return wrapper
+
+
+class ApiMetrics:
+    """
+    Request and simulator-job metrics, rendered in Prometheus text format.
+
+    Everything is recorded on the event loop (the API process is
+    single-threaded), so observations are plain dict and list updates.
+    Worker processes time their own phases with phase()/collect_phases()
+    and send the timings back with each job's result.
+    """
+
+    def __init__(self):
+        self.requests = Counter(
+            "quantum_http_requests_total", "HTTP requests served.", ("endpoint", "method", "status")
+        )
+        self.request_duration = Histogram(
+            "quantum_http_request_duration_seconds", "Time spent serving a request, by phase "
+            "(handler: endpoint function; validate: request parsing and response validation/serialization).",
+            ("endpoint", "phase"),
+        )
+        self.jobs = Counter(
+            "quantum_jobs_total", "Simulator jobs run (simulation_method: stabilizer, statevector or analytic; "
+            "profile: the Aer simulator profile that ran it).",
+            ("endpoint", "method", "circuit", "shots", "simulation_method", "profile", "status"),
+        )
+        self.job_duration = Histogram(
+            "quantum_job_phase_duration_seconds", "Time spent in each phase of a simulator job "
+            "(queue: waiting for and transferring to a worker).",
+            ("endpoint", "circuit", "shots", "phase"),
+        )
+        self._in_flight_requests = 0
+        self._callbacks: List[CallbackMetric] = [
+            CallbackMetric("quantum_http_requests_in_flight", "Requests currently being served.",
+                           lambda: self._in_flight_requests),
+        ]
+
+    def add_gauge(self, name: str, help: str, read: Callable[[], float]) -> None:
+        self._callbacks.append(CallbackMetric(name, help, read))
+
+    def add_counter(self, name: str, help: str, read: Callable[[], float]) -> None:
+        """A counter kept elsewhere (e.g. cache hits), read at scrape time."""
+        self._callbacks.append(CallbackMetric(name, help, read, type="counter"))
+
+    async def track_request(self, endpoint: str, method: str, handle: Callable):
+        """
+        Serve a request with handle() and record its status and phase timings.
+
+        Exceptions left for the app's exception handlers (e.g. a full queue)
+        are counted under their class name.
+        """
+        # Each request runs in its own task, so these are not seen by others;
+        # the endpoint label stays set for the jobs a streamed response runs
+        current_endpoint.set(endpoint)
+        handler_seconds = [0.0]
+        _handler_seconds.set(handler_seconds)
+        self._in_flight_requests += 1
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = await handle()
+            status = str(response.status_code)
+            return response
+        except Exception as e:
+            status = str(getattr(e, "status_code", type(e).__name__))
+            raise
+        finally:
+            total = time.perf_counter() - start
+            self._in_flight_requests -= 1
+            self.requests.inc(endpoint, method, status)
+            self.request_duration.observe(total, endpoint, "total")
+            self.request_duration.observe(handler_seconds[0], endpoint, "handler")
+            self.request_duration.observe(max(0.0, total - handler_seconds[0]), endpoint, "validate")
+
+    def observe_job(self, method: str, circuit: str, shots: Optional[int],
+                    phases: Optional[Dict[str, float]], round_trip: float,
+                    simulation_method: str = "none", profile: str = "none") -> None:
+        """
+        Record one simulator job.
+
+        Args:
+            phases: Worker-side timings from collect_phases() (None if the job failed)
+            round_trip: Seconds from submitting the job to receiving its result
+            simulation_method: How the worker simulated the job ("none" if it did not)
+            profile: Simulator profile the job ran on ("none" if it ran no Aer job)
+        """
+        endpoint = current_endpoint.get()
+        bucket = shot_bucket(shots)
+        self.jobs.inc(endpoint, method, circuit, bucket, simulation_method, profile,
+                      "ok" if phases is not None else "error")
+        if phases is None:
+            return
+        self.job_duration.observe(max(0.0, round_trip - phases["total"]), endpoint, circuit, bucket, "queue")
+        for name in JOB_PHASES:
+            if name in phases:
+                self.job_duration.observe(phases[name], endpoint, circuit, bucket, name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._callbacks:
+            lines.extend(metric.render())
+        for metric in (self.requests, self.request_duration, self.jobs, self.job_duration):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
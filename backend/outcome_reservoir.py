@@ -0,0 +1,92 @@
+import queue
+import threading
+from collections import deque
+from typing import Callable, Dict, Hashable, List
+
+
+class OutcomeReservoir:
+    """
+    Pre-simulated measurement outcomes for single-shot requests.
+
+    Instead of one simulator run per click, each circuit configuration gets a
+    buffer filled by one large run with per-shot memory. Outcomes are handed
+    out one at a time; when a buffer drops below the low-water mark (or runs
+    empty) a background thread tops it back up to capacity, so a draw never
+    waits for a large run.
+
+    Args:
+        sampler: Callable (key, shots) -> list of per-shot bitstrings
+        capacity: Outcomes simulated per refill
+        low_water: Buffer size that triggers a background refill
+    """
+
+    def __init__(self, sampler: Callable[[Hashable, int], List[str]],
+                 capacity: int = 50_000, low_water: int = 10_000):
+        if not 0 <= low_water < capacity:
+            raise ValueError("low_water must be between 0 and capacity")
+        self._sampler = sampler
+        self.capacity = capacity
+        self.low_water = low_water
+
+        self._outcomes: Dict[Hashable, deque] = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._refills: "queue.Queue[Hashable]" = queue.Queue()
+        self._worker = None
+
+    def draw(self, key: Hashable) -> str:
+        """
+        Take one outcome for a circuit key. A key with nothing buffered (first
+        use, or drained faster than the refill thread could keep up) gets a
+        one-shot run while its buffer is filled in the background.
+        """
+        with self._lock:
+            outcomes = self._outcomes.get(key)
+            outcome = outcomes.popleft() if outcomes else None
+            schedule = (
+                (outcome is None or len(outcomes) < self.low_water)
+                and key not in self._pending
+            )
+            if schedule:
+                self._pending.add(key)
+
+        if outcome is None:
+            # Before queueing the refill, so the two runs do not compete
+            outcome = self._sampler(key, 1)[0]
+        if schedule:
+            self._ensure_worker()
+            self._refills.put(key)
+        return outcome
+
+    def fill(self, key: Hashable) -> None:
+        """Top a circuit key's buffer up to capacity now (used by warm-up)."""
+        with self._lock:
+            missing = self.capacity - len(self._outcomes.get(key, ()))
+        if missing > 0:
+            fresh = self._sampler(key, missing)
+            with self._lock:
+                self._outcomes.setdefault(key, deque()).extend(fresh)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._refill_loop, name="outcome-reservoir", daemon=True
+            )
+            self._worker.start()
+
+    def _refill_loop(self) -> None:
+        while True:
+            key = self._refills.get()
+            try:
+                self.fill(key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of buffered outcomes per circuit key."""
+        with self._lock:
+            return {
+                "/".join(str(part) for part in key if part is not None): len(outcomes)
+                for key, outcomes in self._outcomes.items()
+            }
@@ -1,6 +1,26 @@
-from qiskit import QuantumCircuit
-from qiskit_aer import AerSimulator
-from typing import Dict
+from __future__ import annotations
+
+import inspect
+import os
+import threading
+import time
+
+from collections import Counter
+from functools import lru_cache
+from statistics import NormalDist
+
+import numpy as np
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from circuit_registry import (
+    BASIS_ANGLES, BELL_STATES, MEASUREMENT_BASES, ROTATION_PARAMETERS, STATE_PREPARATIONS, CircuitKey, CircuitRegistry
+)
+from metrics import label_job
+from outcome_reservoir import OutcomeReservoir
+from sampling_backends import create_backend, memory_to_bits, pack_bits
+
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
 
 
 class QuantumService:
@@ -12,12 +32,261 @@ class QuantumService:
     - Measurement: Different states and bases to demonstrate wavefunction collapse
     """
     
-    def __init__(self):
-        self.simulator = AerSimulator()
+    def __init__(self, backend: str = "aer", reservoir_capacity: int = 50_000, reservoir_low_water: int = 10_000):
+        # "aer" runs Qiskit Aer; "analytic" samples the exact distribution with NumPy.
+        # The backend (and with it Qiskit) is only loaded on first use or warm_up()
+        self.backend_name = backend
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        # Single-shot endpoints draw pre-simulated outcomes instead of running a job per click
+        self.reservoir = OutcomeReservoir(
+            lambda key, shots: self.backend.memory(key, shots),
+            capacity=reservoir_capacity,
+            low_water=reservoir_low_water
+        )
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = create_backend(self.backend_name)
+        return self._backend
+    
+    @property
+    def circuits(self) -> CircuitRegistry:
+        # Every circuit is built (and transpiled for Aer) once, with the backend
+        return self.backend.circuits
+    
+    def warm_up(self, mode: str = "circuits") -> Dict[str, float]:
+        """
+        Load the simulator stack ahead of the first request.
+        
+        Args:
+            mode: "none" (do nothing), "circuits" (also run every registered
+                circuit once) or "reservoir" (also fill the single-shot reservoirs)
+                
+        Returns:
+            Seconds spent per phase: import, construct, first_run, reservoir
+        """
+        timings = {}
+        if mode == "none":
+            return timings
+        
+        start = time.perf_counter()
+        import qiskit  # noqa: F401
+        if self.backend_name == "aer":
+            import qiskit_aer  # noqa: F401
+        timings["import"] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        self.backend
+        timings["construct"] = time.perf_counter() - start
+        
+        if mode in ("circuits", "reservoir"):
+            start = time.perf_counter()
+            for key in self.circuits.keys:
+                self._run(key, shots=1)
+            timings["first_run"] = time.perf_counter() - start
+        
+        if mode == "reservoir":
+            start = time.perf_counter()
+            for key in self.circuits.keys:
+                self.reservoir.fill(key)
+            timings["reservoir"] = time.perf_counter() - start
+        
+        return {phase: round(seconds, 4) for phase, seconds in timings.items()}
+    
+    def _run(self, key, shots: int, seed: Optional[int] = None) -> Dict[str, int]:
+        """Sample a registered circuit and return its counts."""
+        return self.backend.counts(key, shots, seed)
+    
+    def _draw(self, key: CircuitKey, seed: Optional[int] = None) -> str:
+        """One outcome: pre-simulated from the reservoir, or a seeded one-shot run."""
+        if seed is None:
+            # The outcome may have been simulated earlier (or by the refill thread)
+            label_job("simulation_method", self.backend.simulation_method(key))
+            return self.reservoir.draw(key)
+        return self.backend.memory(key, 1, seed)[0]
+    
+    def run_coalesced(self, calls: List[Tuple[str, tuple]]) -> List:
+        """
+        Serve several sampling-method calls for the same circuit with one job.
+        
+        Single shots are drawn from the outcome reservoir, as the single-shot
+        methods do. The other calls share one run with shots=sum(requested)
+        and per-shot memory; each gets its own slice of the memory,
+        summarized exactly as the method itself would have returned it. A
+        lone multi-shot call has nothing to share and runs as it is, through
+        the cheaper counts path.
+        
+        Args:
+            calls: (method name, args) pairs that all plan the same circuit key
+        
+        Returns:
+            One result per call, in order
+        """
+        plans = [SAMPLING_METHODS[method].plan(*args) for method, args in calls]
+        key = plans[0][0]
+        if any(plan_key != key for plan_key, _ in plans):
+            raise ValueError("Coalesced calls must all use the same circuit")
+        
+        results = [None] * len(calls)
+        batch = []
+        for i, ((method, args), (_, shots)) in enumerate(zip(calls, plans)):
+            if shots == 1:
+                results[i] = SAMPLING_METHODS[method].summarize(self, [self._draw(key)], *args)
+            else:
+                batch.append(i)
+        
+        if len(batch) == 1:
+            method, args = calls[batch[0]]
+            results[batch[0]] = getattr(self, method)(*args)
+        elif batch:
+            memory = self.backend.memory(key, sum(plans[i][1] for i in batch))
+            offset = 0
+            for i in batch:
+                method, args = calls[i]
+                shots = plans[i][1]
+                results[i] = SAMPLING_METHODS[method].summarize(self, memory[offset:offset + shots], *args)
+                offset += shots
+        return results
+    
+    # ==================== STREAMING (Chunked Runs) ====================
+    
+    def sample_counts(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> Dict[str, int]:
+        """Counts for one chunk of a streamed run, labeled like the batch endpoint."""
+        return self._label_counts(key, self._run(key, shots, seed))
+    
+    def sample_outcomes(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> List[str]:
+        """Per-shot outcomes for the WebSocket flip stream, labeled like the batch endpoint."""
+        memory = self.backend.memory(key, shots, seed)
+        if key[0] == "coin":
+            return [outcome[::-1] for outcome in memory]
+        return memory
+    
+    def expected_distribution(self, key: CircuitKey) -> Dict[str, float]:
+        """Exact outcome probabilities, labeled like the batch endpoint."""
+        return self._label_counts(key, self.circuits.expected_distribution(key))
+    
+    @staticmethod
+    def _label_counts(key: CircuitKey, counts: Dict) -> Dict:
+        # Coin endpoints read coin 1 (qubit 0) first; Bell and measurement
+        # endpoints report Qiskit's bitstrings unchanged
+        if key[0] == "coin":
+            return {outcome[::-1]: value for outcome, value in counts.items()}
+        return dict(counts)
+    
+    # ==================== SHOT SEQUENCES (Per-Shot Outcomes) ====================
+    
+    def sample_with_sequence(self, method: str, args: tuple, seed: Optional[int] = None) -> Tuple[Dict, Dict]:
+        """
+        Run a batch sampling method and also return every shot's outcome.
+        
+        Both come from the same run: the method's usual result is summarized
+        from the per-shot memory, which is then bit-packed. Each shot takes
+        bits_per_shot bits, written in the order the endpoint's outcome
+        labels are read (coin 1 first for coins, Qiskit's bitstring for
+        Bell and measurement circuits), so 10,000 single-coin shots pack
+        into 1,250 bytes.
+        
+        Args:
+            method: Name of a batch method in SAMPLING_METHODS
+            args: The method's arguments
+            seed: Simulator seed for a reproducible run
+            
+        Returns:
+            (method result, {"shots", "bits_per_shot", "data": packed bytes})
+        """
+        key, shots = SAMPLING_METHODS[method].plan(*args)
+        memory = self.backend.memory(key, shots, seed)
+        
+        num_bits = self.circuits.circuit(key).num_clbits
+        # memory_to_bits puts classical bit 0 (coin 1) first
+        bits = memory_to_bits(memory, num_bits)
+        if key[0] != "coin":
+            bits = bits[:, ::-1]
+        
+        sequence = {"shots": shots, "bits_per_shot": num_bits, "data": pack_bits(bits)}
+        return SAMPLING_METHODS[method].summarize(self, memory, *args), sequence
+    
+    # ==================== CONVERGENCE CURVES ====================
+    
+    def convergence_curve(self, key: CircuitKey, shots: int, points: int = 50, confidence: float = 0.95,
+                          seed: Optional[int] = None) -> Dict:
+        """
+        Running outcome percentages of one run, at log-spaced shot counts.
+        
+        The circuit is sampled once; every shot's outcome index is one-hot
+        encoded and a single cumulative sum over the shots gives the counts
+        after every prefix of the run, read off at the checkpoints. This is
+        what the batch endpoints would show when called with growing shot
+        counts, except that all checkpoints come from the same sequence.
+        
+        Args:
+            key: Registered circuit key
+            shots: Length of the run
+            points: Maximum number of checkpoints (shot counts that round to
+                    the same integer are merged)
+            confidence: Level of the confidence bands around the expected
+                        percentages (normal approximation)
+            seed: Simulator seed for a reproducible result
+            
+        Returns:
+            Dict with the checkpoints and, per outcome, percentages,
+            deviation from the expected percentage and band limits
+            
+        Raises:
+            ValueError: If confidence is not between 0 and 1
+        """
+        if not 0 < confidence < 1:
+            raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+        
+        bits = self.backend.bits(key, shots, seed)
+        num_bits = bits.shape[1]
+        # Outcome index v has classical bit i in bit i of v
+        indices = bits.astype(np.intp) @ (1 << np.arange(num_bits))
+        num_outcomes = 1 << num_bits
+        
+        checkpoints = np.unique(np.geomspace(1, shots, max(points, 2)).round().astype(np.int64))
+        one_hot = indices[:, None] == np.arange(num_outcomes)
+        counts = np.cumsum(one_hot, axis=0, dtype=np.int64)[checkpoints - 1]
+        
+        # Qiskit bitstrings for v, relabeled like the batch endpoints; columns in label order
+        labels = list(self._label_counts(key, {format(v, f"0{num_bits}b"): v for v in range(num_outcomes)}))
+        order = sorted(range(num_outcomes), key=labels.__getitem__)
+        labels = [labels[v] for v in order]
+        frequencies = counts[:, order] / checkpoints[:, None]
+        expected = self.expected_distribution(key)
+        probabilities = np.array([expected.get(label, 0.0) for label in labels])
+        
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        half_width = z * np.sqrt(probabilities * (1 - probabilities) / checkpoints[:, None])
+        deviation = frequencies - probabilities
+        
+        def column(values: np.ndarray, i: int) -> List[float]:
+            return np.round(values[:, i] * 100, 4).tolist()
+        
+        return {
+            "total_shots": shots,
+            "confidence": confidence,
+            "checkpoints": checkpoints.tolist(),
+            "expected_percentages": {label: round(p * 100, 4) for label, p in zip(labels, probabilities.tolist())},
+            "percentages": {label: column(frequencies, i) for i, label in enumerate(labels)},
+            "deviation": {label: column(deviation, i) for i, label in enumerate(labels)},
+            "max_abs_deviation": np.round(np.abs(deviation).max(axis=1) * 100, 4).tolist(),
+            "bands": {
+                label: {
+                    "lower": column(np.clip(probabilities - half_width, 0, 1), i),
+                    "upper": column(np.clip(probabilities + half_width, 0, 1), i),
+                }
+                for i, label in enumerate(labels)
+            },
+        }
     
     # ==================== SINGLE COIN FLIP (1 Qubit) ====================
     
-    def quantum_coin_flip(self) -> int:
+    def quantum_coin_flip(self, seed: Optional[int] = None) -> int:
         """
         Simulate a single quantum coin flip using Hadamard gate.
         
@@ -29,43 +298,37 @@ class QuantumService:
         
         This gives 50% probability for each outcome.
         
+        Args:
+            seed: Simulator seed for a reproducible result
+            
         Returns:
             int: 0 (heads) or 1 (tails)
         """
-        # Create quantum circuit: 1 qubit, 1 classical bit
-        qc = QuantumCircuit(1, 1)
-        
-        # Apply Hadamard gate to create superposition
-        # |0⟩ → (|0⟩ + |1⟩) / √2
-        qc.h(0)
-        
-        # Measure the qubit (collapses superposition)
-        qc.measure(0, 0)
-        
-        # Run circuit once
-        result = self.simulator.run(qc, shots=1).result()
-        counts = result.get_counts()
-        
+        # Take one pre-simulated outcome of the H + measure circuit
+        outcome = self._draw(CircuitRegistry.coin_key("single"), seed)
+        return self._coin_flip_result(outcome)
+    
+    @staticmethod
+    def _coin_flip_result(outcome: str) -> int:
         # Return 0 or 1
-        return 0 if '0' in counts else 1
+        return int(outcome)
     
-    def quantum_coin_flip_batch(self, shots: int = 100) -> Dict:
+    def quantum_coin_flip_batch(self, shots: int = 100, seed: Optional[int] = None) -> Dict:
         """
         Run multiple quantum coin flips at once.
         
         Args:
             shots: Number of measurements (1-10000)
+            seed: Simulator seed for a reproducible result
             
         Returns:
             Dict with counts and percentages
         """
-        qc = QuantumCircuit(1, 1)
-        qc.h(0)
-        qc.measure(0, 0)
-        
-        result = self.simulator.run(qc, shots=shots).result()
-        counts = result.get_counts()
-        
+        counts = self._run(CircuitRegistry.coin_key("single"), shots=shots, seed=seed)
+        return self._coin_flip_batch_result(counts, shots)
+    
+    @staticmethod
+    def _coin_flip_batch_result(counts: Dict[str, int], shots: int) -> Dict:
         zeros = counts.get('0', 0)
         ones = counts.get('1', 0)
         
@@ -80,14 +343,12 @@ class QuantumService:
     
     def get_single_circuit_diagram(self) -> str:
         """Get text representation of single coin flip circuit."""
-        qc = QuantumCircuit(1, 1)
-        qc.h(0)
-        qc.measure(0, 0)
+        qc = self.circuits.circuit(CircuitRegistry.coin_key("single"))
         return qc.draw(output='text').single_string()
     
     # ==================== DOUBLE COIN FLIP (2 Qubits) ====================
     
-    def double_coin_flip(self) -> Dict:
+    def double_coin_flip(self, seed: Optional[int] = None) -> Dict:
         """
         Simulate a double quantum coin flip using Hadamard gates on 2 qubits.
         
@@ -102,27 +363,19 @@ class QuantumService:
         
         This gives 25% probability for each of the 4 outcomes.
         
+        Args:
+            seed: Simulator seed for a reproducible result
+            
         Returns:
             Dict with result string and individual coin values
         """
-        # Create quantum circuit: 2 qubits, 2 classical bits
-        qc = QuantumCircuit(2, 2)
-        
-        # Apply Hadamard gate to BOTH qubits (independent superposition)
-        qc.h(0)  # Qubit 0: |0⟩ → (|0⟩ + |1⟩) / √2
-        qc.h(1)  # Qubit 1: |0⟩ → (|0⟩ + |1⟩) / √2
-        
-        # Measure both qubits
-        qc.measure(0, 0)  # Measure qubit 0 into classical bit 0
-        qc.measure(1, 1)  # Measure qubit 1 into classical bit 1
-        
-        # Run circuit once
-        result = self.simulator.run(qc, shots=1).result()
-        counts = result.get_counts()
-        
-        # Get result string (Qiskit returns in reverse bit order)
-        result_str = list(counts.keys())[0]
-        
+        # Take one pre-simulated outcome of the H⊗H + measure circuit
+        # (Qiskit returns it in reverse bit order)
+        result_str = self._draw(CircuitRegistry.coin_key("double"), seed)
+        return self._double_coin_flip_result(result_str)
+    
+    @staticmethod
+    def _double_coin_flip_result(result_str: str) -> Dict:
         # Parse individual coins
         # Qiskit bit order: result_str[0] = qubit 1, result_str[1] = qubit 0
         coin1 = int(result_str[1])  # First coin (qubit 0)
@@ -136,25 +389,22 @@ class QuantumService:
             "coin2_label": "Heads" if coin2 == 0 else "Tails"
         }
     
-    def double_coin_flip_batch(self, shots: int = 100) -> Dict:
+    def double_coin_flip_batch(self, shots: int = 100, seed: Optional[int] = None) -> Dict:
         """
         Run multiple double quantum coin flips at once.
         
         Args:
             shots: Number of measurements (1-10000)
+            seed: Simulator seed for a reproducible result
             
         Returns:
             Dict with counts and percentages for all 4 outcomes
         """
-        qc = QuantumCircuit(2, 2)
-        qc.h(0)
-        qc.h(1)
-        qc.measure(0, 0)
-        qc.measure(1, 1)
-        
-        result = self.simulator.run(qc, shots=shots).result()
-        counts = result.get_counts()
-        
+        counts = self._run(CircuitRegistry.coin_key("double"), shots=shots, seed=seed)
+        return self._double_coin_flip_batch_result(counts, shots)
+    
+    @staticmethod
+    def _double_coin_flip_batch_result(counts: Dict[str, int], shots: int) -> Dict:
         # Initialize all possible outcomes
         results = {"00": 0, "01": 0, "10": 0, "11": 0}
         
@@ -184,13 +434,76 @@ class QuantumService:
     
     def get_double_circuit_diagram(self) -> str:
         """Get text representation of double coin flip circuit."""
-        qc = QuantumCircuit(2, 2)
-        qc.h(0)
-        qc.h(1)
-        qc.measure(0, 0)
-        qc.measure(1, 1)
+        qc = self.circuits.circuit(CircuitRegistry.coin_key("double"))
         return qc.draw(output='text').single_string()
     
+    # ==================== N-QUBIT COIN FLIP ====================
+    
+    # Up to this many qubits every outcome is listed; above it only observed ones
+    DENSE_COUNT_QUBITS = 10
+    
+    def multi_coin_flip_batch(self, n_qubits: int = 3, shots: int = 100, seed: Optional[int] = None) -> Dict:
+        """
+        Flip n independent quantum coins many times.
+        
+        Circuit:
+            q0 ... q(n-1): |0⟩ ─[H]─ M
+        
+        Every one of the 2^n outcomes has probability 1/2^n and each coin
+        on its own is 50/50.
+        
+        Args:
+            n_qubits: Number of coins (1-63)
+            shots: Number of measurements (1-10000)
+            seed: Simulator seed for a reproducible result
+            
+        Returns:
+            Dict with outcome counts and per-coin marginals
+        """
+        key = CircuitRegistry.multi_coin_key(n_qubits)
+        bits = self.backend.bits(key, shots, seed)
+        return self._multi_coin_flip_batch_result(bits)
+    
+    @classmethod
+    def _multi_coin_flip_batch_result(cls, bits: np.ndarray) -> Dict:
+        shots, n_qubits = bits.shape
+        
+        # Aggregate outcomes as integer indices (bit i = coin i + 1) instead of string keys
+        weights = np.left_shift(np.uint64(1), np.arange(n_qubits, dtype=np.uint64))
+        indices = bits.astype(np.uint64) @ weights
+        
+        if n_qubits <= cls.DENSE_COUNT_QUBITS:
+            representation = "dense"
+            outcomes = np.arange(2 ** n_qubits)
+            counts = np.bincount(indices.astype(np.intp), minlength=2 ** n_qubits)
+        else:
+            representation = "sparse"
+            outcomes, counts = np.unique(indices, return_counts=True)
+        
+        # Labels read coin 1 first, like double_coin_flip_batch
+        labels = [format(int(outcome), f"0{n_qubits}b")[::-1] for outcome in outcomes]
+        
+        # Marginals come straight from the bit columns, never from the 2^n outcomes
+        ones = bits.sum(axis=0, dtype=np.int64)
+        
+        return {
+            "n_qubits": n_qubits,
+            "total_shots": shots,
+            "representation": representation,
+            "distinct_outcomes": int(np.count_nonzero(counts)),
+            "counts": dict(zip(labels, counts.tolist())),
+            "percentages": {
+                label: round((count / shots) * 100, 2)
+                for label, count in zip(labels, counts.tolist())
+            },
+            "marginals": {
+                "ones": ones.tolist(),
+                "one_percentages": np.round(ones / shots * 100, 2).tolist()
+            },
+            "theoretical_probability": 100 / 2 ** n_qubits,
+            "theoretical_marginal": 50.0
+        }
+    
     # ==================== BELL STATES (Entanglement) ====================
     
     def create_bell_state(self, state_type: str) -> QuantumCircuit:
@@ -208,87 +521,57 @@ class QuantumService:
             
         Returns:
             QuantumCircuit ready for measurement
-        """
-        qc = QuantumCircuit(2, 2)
-        
-        if state_type == "phi_plus":
-            # Φ⁺ = (|00⟩ + |11⟩)/√2
-            # Circuit: H on q0, then CNOT with q0 as control
-            qc.h(0)      # Create superposition on qubit 0
-            qc.cx(0, 1)  # Entangle qubit 0 with qubit 1
-        
-        elif state_type == "psi_plus":
-            # Ψ⁺ = (|01⟩ + |10⟩)/√2
-            # Circuit: Flip q1, then H on q0, then CNOT
-            qc.x(1)      # Flip qubit 1 to |1⟩
-            qc.h(0)      # Create superposition on qubit 0
-            qc.cx(0, 1)  # Entangle
-        
-        elif state_type == "phi_minus":
-            # Φ⁻ = (|00⟩ - |11⟩)/√2
-            # Circuit: H on q0, CNOT, then Z on q0 (adds phase)
-            qc.h(0)      # Create superposition
-            qc.cx(0, 1)  # Entangle
-            qc.z(0)      # Add phase to create minus state
-        
-        elif state_type == "psi_minus":
-            # Ψ⁻ = (|01⟩ - |10⟩)/√2
-            # Circuit: X on q1, H on q0, CNOT, Z on q0
-            qc.x(1)      # Flip qubit 1
-            qc.h(0)      # Create superposition
-            qc.cx(0, 1)  # Entangle
-            qc.z(0)      # Add phase
         
-        else:
-            raise ValueError(f"Unknown Bell state: {state_type}. Must be one of: phi_plus, psi_plus, phi_minus, psi_minus")
-        
-        # Measure both qubits
-        qc.measure([0, 1], [0, 1])
-        
-        return qc
+        Raises:
+            ValueError: If state_type is not a known Bell state
+        """
+        # Circuits live in the registry; hand out a copy so callers can extend it
+        return self.circuits.circuit(CircuitRegistry.bell_key(state_type)).copy()
     
-    def bell_state_measure(self, state_type: str) -> Dict:
+    def bell_state_measure(self, state_type: str, seed: Optional[int] = None) -> Dict:
         """
         Measure a Bell state once and return the result.
         
         Args:
             state_type: One of "phi_plus", "psi_plus", "phi_minus", "psi_minus"
+            seed: Simulator seed for a reproducible result
             
         Returns:
             Dict with result and state information
         """
-        qc = self.create_bell_state(state_type)
-        
-        # Run circuit once
-        result = self.simulator.run(qc, shots=1).result()
-        counts = result.get_counts()
-        
-        # Get the single measurement result
-        measurement = list(counts.keys())[0]
+        key = CircuitRegistry.bell_key(state_type)
         
+        # Get a single pre-simulated measurement result
+        measurement = self._draw(key, seed)
+        return self._bell_state_result(measurement, state_type)
+    
+    @classmethod
+    def _bell_state_result(cls, measurement: str, state_type: str) -> Dict:
         return {
             "result": measurement,
             "state": state_type,
-            "description": self._get_bell_state_description(state_type)
+            "description": cls._get_bell_state_description(state_type)
         }
     
-    def bell_state_batch(self, state_type: str, shots: int = 100) -> Dict:
+    def bell_state_batch(self, state_type: str, shots: int = 100, seed: Optional[int] = None) -> Dict:
         """
         Measure a Bell state multiple times and return statistics.
         
         Args:
             state_type: One of "phi_plus", "psi_plus", "phi_minus", "psi_minus"
             shots: Number of measurements (1-10000)
+            seed: Simulator seed for a reproducible result
             
         Returns:
             Dict with counts, percentages, and expected values
         """
-        qc = self.create_bell_state(state_type)
+        key = CircuitRegistry.bell_key(state_type)
         
         # Run circuit multiple times
-        result = self.simulator.run(qc, shots=shots).result()
-        counts = result.get_counts()
-        
+        counts = self._run(key, shots=shots, seed=seed)
+        return self._bell_state_batch_result(counts, shots, state_type)
+    
+    def _bell_state_batch_result(self, counts: Dict[str, int], shots: int, state_type: str) -> Dict:
         # Ensure all possible outcomes are in the result
         all_outcomes = {"00": 0, "01": 0, "10": 0, "11": 0}
         all_outcomes.update(counts)
@@ -312,16 +595,12 @@ class QuantumService:
         }
     
     def _get_expected_probabilities(self, state_type: str) -> Dict[str, float]:
-        """Get theoretical probabilities for each Bell state."""
-        probabilities = {
-            "phi_plus": {"00": 0.5, "01": 0.0, "10": 0.0, "11": 0.5},
-            "psi_plus": {"00": 0.0, "01": 0.5, "10": 0.5, "11": 0.0},
-            "phi_minus": {"00": 0.5, "01": 0.0, "10": 0.0, "11": 0.5},
-            "psi_minus": {"00": 0.0, "01": 0.5, "10": 0.5, "11": 0.0}
-        }
-        return probabilities.get(state_type, {"00": 0.25, "01": 0.25, "10": 0.25, "11": 0.25})
+        """Theoretical probabilities of a Bell state, computed from its circuit."""
+        # This service's own registry computes each distribution once and keeps it
+        return self.circuits.expected_distribution(CircuitRegistry.bell_key(state_type))
     
-    def _get_bell_state_description(self, state_type: str) -> str:
+    @staticmethod
+    def _get_bell_state_description(state_type: str) -> str:
         """Get human-readable description of Bell state."""
         descriptions = {
             "phi_plus": "Φ⁺ = (|00⟩ + |11⟩)/√2 - Both qubits always match",
@@ -333,12 +612,264 @@ class QuantumService:
     
     def get_bell_state_circuit_diagram(self, state_type: str) -> str:
         """Get text representation of Bell state circuit."""
-        qc = self.create_bell_state(state_type)
+        qc = self.circuits.circuit(CircuitRegistry.bell_key(state_type))
         return qc.draw(output='text').single_string()
     
+    # ==================== CHSH (Bell Inequality) ====================
+    
+    # Most shots per setting in one job; larger experiments are run in chunks
+    CHSH_CHUNK_SHOTS = 250_000
+    
+    CHSH_SETTINGS = ["a,b", "a,b'", "a',b", "a',b'"]
+    
+    def chsh_experiment(self, state_type: str, alice: Optional[List[float]] = None,
+                        bob: Optional[List[float]] = None, shots: int = 10000, exact: bool = False,
+                        seed: Optional[int] = None) -> Dict:
+        """
+        Run the CHSH test on a Bell state.
+        
+        The state is prepared as in create_bell_state. Alice measures qubit 0
+        along angle a or a', and Bob qubit 1 along b or b'. Angles are in the
+        X-Z plane of the Bloch sphere, measured from Z. For each of the four
+        settings the correlator E = P(same) - P(different) is estimated, and
+        
+            S = E(a,b) + E(a,b') + E(a',b) - E(a',b')
+        
+        Local hidden variables allow |S| ≤ 2; quantum mechanics reaches 2√2.
+        The four settings are bindings of one parameterized circuit and run
+        as a single simulator job.
+        
+        Args:
+            state_type: One of "phi_plus", "psi_plus", "phi_minus", "psi_minus"
+            alice: Alice's angles [a, a'] in radians (default: 0 and π/2)
+            bob: Bob's angles [b, b'] (default: the pair maximizing S for Alice's angles)
+            shots: Measurements per setting (at most CHSH_CHUNK_SHOTS)
+            exact: Return only the exact correlators and S, without sampling
+            seed: Simulator seed for a reproducible result
+            
+        Returns:
+            Dict with the angles, counts and correlators per setting, S and
+            its standard error, next to the exact values
+        
+        Raises:
+            ValueError: For an unknown state, bad angles or too many shots
+        """
+        key = CircuitRegistry.chsh_key(state_type)
+        alice, bob = self._chsh_angles(key, alice, bob)
+        # Settings in CHSH_SETTINGS order: (a,b), (a,b'), (a',b), (a',b')
+        bindings = {"alice": np.repeat(alice, 2), "bob": np.tile(bob, 2)}
+        expected = self._correlators(self.circuits.sweep_probabilities(key, bindings))
+        
+        result = {
+            "state": state_type,
+            "alice": np.round(alice, 6).tolist(),
+            "bob": np.round(bob, 6).tolist(),
+            "settings": self.CHSH_SETTINGS,
+            "expected_correlators": np.round(expected, 6).tolist(),
+            "expected_S": round(float(expected[0] + expected[1] + expected[2] - expected[3]), 6),
+            "classical_bound": 2.0,
+            "quantum_bound": round(2 * np.sqrt(2), 6),
+            "exact": exact
+        }
+        if exact:
+            return result
+        
+        if not 1 <= shots <= self.CHSH_CHUNK_SHOTS:
+            raise ValueError(f"shots must be between 1 and {self.CHSH_CHUNK_SHOTS} per job")
+        counts = self.backend.sweep_counts(key, bindings, shots, seed)
+        return {**result, **self._chsh_statistics(counts)}
+    
+    def _chsh_angles(self, key: CircuitKey, alice: Optional[List[float]],
+                     bob: Optional[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Validate the measurement angles and fill in the defaults."""
+        self._check_chsh_angles(alice, bob)
+        alice = np.array([0.0, np.pi / 2] if alice is None else alice, dtype=float)
+        if bob is not None:
+            return alice, np.array(bob, dtype=float)
+        
+        # With no ⟨ZX⟩/⟨XZ⟩ terms (true for Bell states), E(a,b) = zz·cos a cos b
+        # + xx·sin a sin b, so S = u·(cos b, sin b) + v·(cos b', sin b') and
+        # each of Bob's angles points along its vector
+        zz, xx = self._correlators(self.circuits.sweep_probabilities(
+            key, {"alice": np.array([0.0, np.pi / 2]), "bob": np.array([0.0, np.pi / 2])}
+        ))
+        u = (zz * (np.cos(alice[0]) + np.cos(alice[1])), xx * (np.sin(alice[0]) + np.sin(alice[1])))
+        v = (zz * (np.cos(alice[0]) - np.cos(alice[1])), xx * (np.sin(alice[0]) - np.sin(alice[1])))
+        return alice, np.array([np.arctan2(u[1], u[0]), np.arctan2(v[1], v[0])])
+    
+    @staticmethod
+    def _check_chsh_angles(alice: Optional[List[float]], bob: Optional[List[float]]) -> None:
+        for name, angles in (("alice", alice), ("bob", bob)):
+            if angles is not None and (len(angles) != 2 or not np.isfinite(angles).all()):
+                raise ValueError(f"{name} must be two finite angles in radians")
+    
+    @staticmethod
+    def _correlators(probabilities: np.ndarray) -> np.ndarray:
+        # E = P(00) + P(11) - P(01) - P(10), one row per setting
+        return probabilities[:, 0] + probabilities[:, 3] - probabilities[:, 1] - probabilities[:, 2]
+    
+    @staticmethod
+    def _chsh_statistics(counts: List[Dict[str, int]]) -> Dict:
+        outcomes = ["00", "01", "10", "11"]
+        table = np.array([[setting.get(outcome, 0) for outcome in outcomes] for setting in counts])
+        totals = table.sum(axis=1)
+        correlators = (table[:, 0] + table[:, 3] - table[:, 1] - table[:, 2]) / totals
+        # Each shot is ±1 with mean E, so Var(E) = (1 - E²) / N; settings are independent
+        errors = np.sqrt((1 - correlators ** 2) / totals)
+        s_value = correlators[0] + correlators[1] + correlators[2] - correlators[3]
+        s_error = float(np.sqrt(np.sum(errors ** 2)))
+        
+        return {
+            "shots_per_setting": int(totals[0]),
+            "counts": [dict(zip(outcomes, row)) for row in table.tolist()],
+            "correlators": np.round(correlators, 6).tolist(),
+            "correlator_errors": np.round(errors, 6).tolist(),
+            "S": round(float(s_value), 6),
+            "S_error": round(s_error, 6),
+            # How many standard errors |S| lies above the classical bound
+            "violation_sigmas": round((abs(float(s_value)) - 2) / s_error, 2) if s_error > 0 else None
+        }
+    
+    @classmethod
+    def merge_chsh(cls, results: List[Dict]) -> Dict:
+        """Combine chsh_experiment results for the same settings run in chunks."""
+        counts = [
+            {outcome: sum(result["counts"][i][outcome] for result in results) for outcome in results[0]["counts"][i]}
+            for i in range(len(cls.CHSH_SETTINGS))
+        ]
+        return {**results[0], **cls._chsh_statistics(counts)}
+    
+    # ==================== N-PARTY ENTANGLEMENT (GHZ / W) ====================
+    
+    # Up to this many qubits the full pairwise agreement matrix is returned;
+    # above it only its mean and nearest-neighbour entries, which stay linear in n
+    PAIRWISE_MATRIX_QUBITS = 32
+    
+    def create_entangled_state(self, kind: str, n_qubits: int) -> QuantumCircuit:
+        """
+        Create an n-qubit GHZ or W state, the n-party versions of Φ⁺ and Ψ⁺.
+        
+        - GHZ = (|0…0⟩ + |1…1⟩)/√2  → H on q0, CNOT chain q0 → q1 → … → q(n-1)
+        - W = (|10…0⟩ + … + |0…01⟩)/√n  → X on q0, CRY + CNOT passing the 1 down the chain
+        
+        Args:
+            kind: "ghz" or "w"
+            n_qubits: Number of qubits (2-500)
+            
+        Returns:
+            QuantumCircuit ready for measurement
+        
+        Raises:
+            ValueError: If kind or n_qubits is not supported
+        """
+        return self.circuits.circuit(CircuitRegistry.entangled_key(kind, n_qubits)).copy()
+    
+    def entangled_state_batch(self, kind: str, n_qubits: int = 3, shots: int = 1000,
+                              seed: Optional[int] = None) -> Dict:
+        """
+        Measure an n-qubit GHZ or W state many times and return its correlations.
+        
+        GHZ states are Clifford, so Aer runs them on the stabilizer method; W
+        states wider than a statevector can hold (and every state on the
+        analytic backend) are drawn from their closed-form distribution.
+        Either way the outcomes are a (shots, n) bit array and the result is
+        summarized without ever listing the 2^n outcomes.
+        
+        Args:
+            kind: "ghz" or "w"
+            n_qubits: Number of qubits (2-500)
+            shots: Number of measurements (1-10000)
+            seed: Simulator seed for a reproducible result
+            
+        Returns:
+            Dict with the all-equal rate, parity, Hamming weights, pairwise
+            agreement and per-qubit marginals, next to their expected values
+        """
+        key = CircuitRegistry.entangled_key(kind, n_qubits)
+        bits = self.backend.bits(key, shots, seed)
+        return self._entangled_state_batch_result(bits, kind)
+    
+    @classmethod
+    def _entangled_state_batch_result(cls, bits: np.ndarray, kind: str) -> Dict:
+        shots, n_qubits = bits.shape
+        
+        # Everything below is built from the Hamming weight of each shot and
+        # the bit columns: O(shots × n) time and O(n) extra memory
+        weights = bits.sum(axis=1, dtype=np.int64)
+        all_equal = np.count_nonzero((weights == 0) | (weights == n_qubits))
+        even = np.count_nonzero(weights % 2 == 0)
+        weight_values, weight_counts = np.unique(weights, return_counts=True)
+        
+        # A shot with k ones has C(k, 2) + C(n - k, 2) agreeing pairs out of C(n, 2)
+        agreeing = (weights * (weights - 1) + (n_qubits - weights) * (n_qubits - weights - 1)) // 2
+        mean_agreement = agreeing.sum() / (shots * (n_qubits * (n_qubits - 1) // 2))
+        neighbours = np.count_nonzero(bits[:, 1:] == bits[:, :-1], axis=0) / shots
+        
+        pairwise = {
+            "mean": round(float(mean_agreement) * 100, 2),
+            "nearest_neighbour": np.round(neighbours * 100, 2).tolist()
+        }
+        if n_qubits <= cls.PAIRWISE_MATRIX_QUBITS:
+            # P(qubit i == qubit j) = (ones agreeing + zeros agreeing) / shots
+            x = bits.astype(np.float64)
+            agreement = (x.T @ x + (1 - x).T @ (1 - x)) / shots
+            pairwise["matrix"] = np.round(agreement * 100, 2).tolist()
+        
+        return {
+            "state": kind,
+            "n_qubits": n_qubits,
+            "total_shots": shots,
+            "all_equal_percentage": round((all_equal / shots) * 100, 2),
+            "parity": {
+                "even_percentage": round((even / shots) * 100, 2),
+                "odd_percentage": round(((shots - even) / shots) * 100, 2),
+                "expectation": round((2 * even - shots) / shots, 4)
+            },
+            "hamming_weights": dict(zip(map(str, weight_values.tolist()), weight_counts.tolist())),
+            "pairwise_agreement": pairwise,
+            "one_percentages": np.round(bits.sum(axis=0, dtype=np.int64) / shots * 100, 2).tolist(),
+            "expected": cls._expected_entangled_statistics(kind, n_qubits),
+            "description": cls._get_entangled_state_description(kind, n_qubits)
+        }
+    
+    @staticmethod
+    def _expected_entangled_statistics(kind: str, n_qubits: int) -> Dict:
+        """
+        Theoretical statistics of an n-qubit GHZ or W state, from its closed form.
+        
+        GHZ measures all 0s or all 1s (1/2 each); W measures exactly one 1,
+        on a uniformly chosen qubit.
+        """
+        if kind == "ghz":
+            # |0…0⟩ has even parity; |1…1⟩ has the parity of n
+            even = 100.0 if n_qubits % 2 == 0 else 50.0
+            return {
+                "all_equal_percentage": 100.0,
+                "parity": {"even_percentage": even, "odd_percentage": 100 - even, "expectation": (2 * even - 100) / 100},
+                "hamming_weights": {"0": 50.0, str(n_qubits): 50.0},
+                "pairwise_agreement": 100.0,
+                "one_percentage": 50.0
+            }
+        # Two qubits disagree exactly when one of them holds the single 1
+        return {
+            "all_equal_percentage": 0.0,
+            "parity": {"even_percentage": 0.0, "odd_percentage": 100.0, "expectation": -1.0},
+            "hamming_weights": {"1": 100.0},
+            "pairwise_agreement": round((1 - 2 / n_qubits) * 100, 4),
+            "one_percentage": round(100 / n_qubits, 4)
+        }
+    
+    @staticmethod
+    def _get_entangled_state_description(kind: str, n_qubits: int) -> str:
+        descriptions = {
+            "ghz": f"GHZ = (|0…0⟩ + |1…1⟩)/√2 on {n_qubits} qubits - All qubits always match",
+            "w": f"W = (|10…0⟩ + … + |0…01⟩)/√{n_qubits} - Exactly one of {n_qubits} qubits is 1"
+        }
+        return descriptions.get(kind, "Unknown entangled state")
+    
     # ==================== MEASUREMENT (Different States & Bases) ====================
     
-    def measure_qubit(self, state: str, basis: str = "z") -> Dict:
+    def measure_qubit(self, state: str, basis: str = "z", seed: Optional[int] = None) -> Dict:
         """
         Measure a prepared quantum state in a chosen basis.
         
@@ -352,89 +883,50 @@ class QuantumService:
         Bases:
         - z: Computational basis (0 or 1)
         - x: Hadamard basis (+ or -)
+        - y: Circular basis (+i or -i)
+        
+        Args:
+            seed: Simulator seed for a reproducible result
         
         Returns:
             Dict with result and state information
         """
-        qc = QuantumCircuit(1, 1)
-        
-        # Prepare the state
-        if state == "equal":
-            qc.h(0)  # Equal superposition
-        elif state == "biased_0":
-            # (√3|0⟩ + |1⟩)/2
-            qc.ry(2 * 0.5236, 0)  # arcsin(1/2) ≈ 0.5236
-        elif state == "biased_1":
-            # (|0⟩ + √3|1⟩)/2
-            qc.ry(2 * 1.0472, 0)  # arcsin(√3/2) ≈ 1.0472
-        elif state == "definite_0":
-            pass  # Already |0⟩
-        elif state == "definite_1":
-            qc.x(0)  # Flip to |1⟩
-        else:
-            raise ValueError(f"Unknown state: {state}")
-        
-        # Apply measurement basis rotation
-        if basis == "x":
-            qc.h(0)  # Rotate to X-basis
-        elif basis != "z":
-            raise ValueError(f"Unknown basis: {basis}")
-        
-        # Measure
-        qc.measure(0, 0)
-        
-        # Run circuit
-        result = self.simulator.run(qc, shots=1).result()
-        counts = result.get_counts()
-        measurement = list(counts.keys())[0]
+        key = CircuitRegistry.measure_key(state, basis)
         
+        # Take one pre-simulated outcome of the preparation + basis rotation + measure circuit
+        measurement = self._draw(key, seed)
+        return self._measure_qubit_result(measurement, state, basis)
+    
+    @staticmethod
+    def _measure_qubit_result(measurement: str, state: str, basis: str) -> Dict:
         return {
             "result": measurement,
             "state": state,
             "basis": basis
         }
     
-    def measure_qubit_batch(self, state: str, basis: str = "z", shots: int = 100) -> Dict:
+    def measure_qubit_batch(self, state: str, basis: str = "z", shots: int = 100,
+                            seed: Optional[int] = None) -> Dict:
         """
         Measure a quantum state multiple times to see probability distribution.
         
         Args:
             state: One of equal, biased_0, biased_1, definite_0, definite_1
-            basis: "z" or "x"
+            basis: "z", "x" or "y"
             shots: Number of measurements
+            seed: Simulator seed for a reproducible result
             
         Returns:
             Dict with counts and probabilities
         """
-        qc = QuantumCircuit(1, 1)
-        
-        # Prepare the state
-        if state == "equal":
-            qc.h(0)
-        elif state == "biased_0":
-            qc.ry(2 * 0.5236, 0)
-        elif state == "biased_1":
-            qc.ry(2 * 1.0472, 0)
-        elif state == "definite_0":
-            pass
-        elif state == "definite_1":
-            qc.x(0)
-        else:
-            raise ValueError(f"Unknown state: {state}")
-        
-        # Apply measurement basis rotation
-        if basis == "x":
-            qc.h(0)
-        elif basis != "z":
-            raise ValueError(f"Unknown basis: {basis}")
-        
-        # Measure
-        qc.measure(0, 0)
+        key = CircuitRegistry.measure_key(state, basis)
         
         # Run circuit
-        result = self.simulator.run(qc, shots=shots).result()
-        counts = result.get_counts()
-        
+        counts = self._run(key, shots=shots, seed=seed)
+        return self._measure_qubit_batch_result(counts, shots, state, basis)
+    
+    @staticmethod
+    def _measure_qubit_batch_result(counts: Dict[str, int], shots: int, state: str, basis: str) -> Dict:
         # Ensure both outcomes are present
         all_counts = {"0": 0, "1": 0}
         all_counts.update(counts)
@@ -450,6 +942,360 @@ class QuantumService:
             }
         }
 
+    
+    def measure_qubit_matrix(self, states: Optional[List[str]] = None, bases: Optional[List[str]] = None,
+                             bell_states: Optional[List[str]] = None, shots: int = 1000,
+                             seed: Optional[int] = None) -> Dict:
+        """
+        Measure every selected (state, basis) combination in one simulator job.
+        
+        All circuits are submitted together as a single multi-circuit job, so
+        the whole comparison table of the measurement lesson costs one run.
+        
+        Args:
+            states: Prepared states (default: all five)
+            bases: Measurement bases (default: z, x and y)
+            bell_states: Bell states to add to the table (default: none)
+            shots: Measurements per circuit
+            seed: Simulator seed for a reproducible result
+            
+        Returns:
+            Dict with a compact table of counts and exact probabilities per circuit
+        """
+        measure_keys, bell_keys = self._matrix_keys(states, bases, bell_states)
+        keys = measure_keys + bell_keys
+        
+        counts = self.backend.counts_many(keys, shots, seed)
+        
+        def row(key: CircuitKey, key_counts: Dict[str, int], outcomes: List[str]) -> Dict:
+            expected = self.circuits.expected_distribution(key)
+            return {
+                "counts": [key_counts.get(outcome, 0) for outcome in outcomes],
+                "expected_probabilities": [round(expected[outcome], 6) for outcome in outcomes]
+            }
+        
+        measurement_outcomes = ["0", "1"]
+        bell_outcomes = ["00", "01", "10", "11"]
+        
+        return {
+            "total_shots": shots,
+            "circuits": len(keys),
+            "measurement_outcomes": measurement_outcomes,
+            "measurements": [
+                {"state": key[1], "basis": key[2], **row(key, key_counts, measurement_outcomes)}
+                for key, key_counts in zip(measure_keys, counts)
+            ],
+            "bell_outcomes": bell_outcomes,
+            "bell_states": [
+                {"state": key[1], **row(key, key_counts, bell_outcomes)}
+                for key, key_counts in zip(bell_keys, counts[len(measure_keys):])
+            ]
+        }
+    
+    @staticmethod
+    def _matrix_keys(states: Optional[List[str]], bases: Optional[List[str]],
+                     bell_states: Optional[List[str]]) -> Tuple[List[CircuitKey], List[CircuitKey]]:
+        """Circuit keys of a measurement matrix: its (state, basis) rows, then its Bell state rows."""
+        states = list(STATE_PREPARATIONS) if states is None else states
+        bases = list(MEASUREMENT_BASES) if bases is None else bases
+        measure_keys = [CircuitRegistry.measure_key(state, basis) for state in states for basis in bases]
+        bell_keys = [CircuitRegistry.bell_key(state_type) for state_type in bell_states or []]
+        if not measure_keys and not bell_keys:
+            raise ValueError("Select at least one state/basis combination or Bell state")
+        return measure_keys, bell_keys
+    
+    # ==================== ROTATION SWEEPS (Born Rule) ====================
+    
+    # Points per sweep, and shots across all of them (Aer needs about 1 µs per shot)
+    MAX_SWEEP_POINTS = 1000
+    MAX_SWEEP_SHOTS = 1_000_000
+    
+    def measure_qubit_sweep(self, theta, phi=0.0, basis: str = "z", basis_theta=None, basis_phi=None,
+                            shots: int = 1000, exact: bool = False, seed: Optional[int] = None) -> Dict:
+        """
+        Measure cos(θ/2)|0⟩ + e^{iφ} sin(θ/2)|1⟩ over a sweep of angles.
+        
+        Each angle is a number (held fixed) or a list (swept); swept lists
+        must have the same length. Every point is one binding of the
+        registry's parameterized rotation template, and all points run as a
+        single simulator job (or one vectorized draw on the analytic backend).
+        
+        Args:
+            theta: Preparation polar angle in radians
+            phi: Preparation phase in radians
+            basis: "z", "x", "y", or "custom" to measure along (basis_theta, basis_phi)
+            basis_theta: Polar angle of the measured axis (basis="custom" only)
+            basis_phi: Azimuth of the measured axis (basis="custom" only)
+            shots: Measurements per point
+            exact: Return only the Born-rule curve, without sampling
+            seed: Simulator seed for a reproducible result
+            
+        Returns:
+            Dict with the angles, the exact P(0)/P(1) curve and, unless
+            exact, the counts and observed probabilities per point
+        
+        Raises:
+            ValueError: For an unknown basis, mismatched or too many points
+        """
+        bindings, swept = self._sweep_bindings(theta, phi, basis, basis_theta, basis_phi)
+        points = len(bindings["theta"])
+        key = CircuitRegistry.rotation_key()
+        expected = self.circuits.sweep_probabilities(key, bindings)
+        
+        result = {
+            "points": points,
+            "basis": basis,
+            "swept": swept,
+            "angles": {
+                name: np.round(values, 6).tolist() if name in swept else float(values[0])
+                for name, values in bindings.items()
+            },
+            "expected_probabilities": {
+                "0": np.round(expected[:, 0], 6).tolist(),
+                "1": np.round(expected[:, 1], 6).tolist()
+            },
+            "exact": exact
+        }
+        if exact:
+            return result
+        
+        self._check_sweep_shots(points, shots)
+        counts = self.backend.sweep_counts(key, bindings, shots, seed)
+        ones = np.array([point_counts.get("1", 0) for point_counts in counts])
+        observed = ones / shots
+        
+        return {
+            **result,
+            "shots_per_point": shots,
+            "counts": {"0": (shots - ones).tolist(), "1": ones.tolist()},
+            "probabilities": {
+                "0": np.round(1 - observed, 6).tolist(),
+                "1": np.round(observed, 6).tolist()
+            },
+            "max_abs_deviation": round(float(np.max(np.abs(observed - expected[:, 1]))), 6)
+        }
+    
+    @classmethod
+    def _check_sweep_shots(cls, points: int, shots: int) -> None:
+        if points * shots > cls.MAX_SWEEP_SHOTS:
+            raise ValueError(f"points × shots must be at most {cls.MAX_SWEEP_SHOTS}")
+    
+    @classmethod
+    def _sweep_bindings(cls, theta, phi=0.0, basis: str = "z", basis_theta=None,
+                        basis_phi=None) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """Template parameter values of a sweep, broadcast to one array per parameter, and the swept names."""
+        if basis == "custom":
+            basis_theta = 0.0 if basis_theta is None else basis_theta
+            basis_phi = 0.0 if basis_phi is None else basis_phi
+        elif basis in BASIS_ANGLES:
+            if basis_theta is not None or basis_phi is not None:
+                raise ValueError("basis_theta and basis_phi need basis='custom'")
+            basis_theta, basis_phi = BASIS_ANGLES[basis]
+        else:
+            raise ValueError(f"Unknown basis: {basis}. Must be one of: {', '.join(BASIS_ANGLES)}, custom")
+        
+        angles = dict(zip(ROTATION_PARAMETERS, (theta, phi, basis_theta, basis_phi)))
+        swept = [name for name, value in angles.items() if isinstance(value, (list, tuple, np.ndarray))]
+        lengths = {len(angles[name]) for name in swept}
+        if len(lengths) > 1:
+            raise ValueError("Swept angles must all have the same number of values")
+        points = lengths.pop() if lengths else 1
+        if not 1 <= points <= cls.MAX_SWEEP_POINTS:
+            raise ValueError(f"A sweep must have between 1 and {cls.MAX_SWEEP_POINTS} points")
+        
+        bindings = {name: np.broadcast_to(np.asarray(value, dtype=float), (points,)) for name, value in angles.items()}
+        if not all(np.isfinite(values).all() for values in bindings.values()):
+            raise ValueError("Angles must be finite numbers")
+        return bindings, swept
+
+# ==================== Sampling Methods ====================
+
+class SamplingMethod(NamedTuple):
+    """
+    How a QuantumService method maps onto one registered circuit.
+    
+    plan(*args) gives the (circuit key, shots) the method needs and
+    summarize(service, memory, *args) rebuilds the method's return value
+    from per-shot outcomes, so callers can sample the circuit themselves.
+    service is the QuantumService whose circuits the outcomes came from
+    (single-shot summaries do not use it). Batch results are built from
+    counts, which memory simply aggregates. Both accept (and ignore) the
+    method's trailing seed argument.
+    """
+    plan: Callable[..., Tuple[CircuitKey, int]]
+    summarize: Callable[..., object]
+
+
+SAMPLING_METHODS: Dict[str, SamplingMethod] = {
+    "quantum_coin_flip": SamplingMethod(
+        lambda seed=None: (CircuitRegistry.coin_key("single"), 1),
+        lambda service, memory, seed=None: QuantumService._coin_flip_result(memory[0])
+    ),
+    "quantum_coin_flip_batch": SamplingMethod(
+        lambda shots=100, seed=None: (CircuitRegistry.coin_key("single"), shots),
+        lambda service, memory, shots=100, seed=None: QuantumService._coin_flip_batch_result(
+            Counter(memory), len(memory)
+        )
+    ),
+    "double_coin_flip": SamplingMethod(
+        lambda seed=None: (CircuitRegistry.coin_key("double"), 1),
+        lambda service, memory, seed=None: QuantumService._double_coin_flip_result(memory[0])
+    ),
+    "double_coin_flip_batch": SamplingMethod(
+        lambda shots=100, seed=None: (CircuitRegistry.coin_key("double"), shots),
+        lambda service, memory, shots=100, seed=None: QuantumService._double_coin_flip_batch_result(
+            Counter(memory), len(memory)
+        )
+    ),
+    "multi_coin_flip_batch": SamplingMethod(
+        lambda n_qubits=3, shots=100, seed=None: (CircuitRegistry.multi_coin_key(n_qubits), shots),
+        lambda service, memory, n_qubits=3, shots=100, seed=None: QuantumService._multi_coin_flip_batch_result(
+            memory_to_bits(memory, n_qubits)
+        )
+    ),
+    "bell_state_measure": SamplingMethod(
+        lambda state_type, seed=None: (CircuitRegistry.bell_key(state_type), 1),
+        lambda service, memory, state_type, seed=None: QuantumService._bell_state_result(memory[0], state_type)
+    ),
+    "bell_state_batch": SamplingMethod(
+        lambda state_type, shots=100, seed=None: (CircuitRegistry.bell_key(state_type), shots),
+        lambda service, memory, state_type, shots=100, seed=None: service._bell_state_batch_result(
+            Counter(memory), len(memory), state_type
+        )
+    ),
+    "entangled_state_batch": SamplingMethod(
+        lambda kind, n_qubits=3, shots=1000, seed=None: (CircuitRegistry.entangled_key(kind, n_qubits), shots),
+        lambda service, memory, kind, n_qubits=3, shots=1000, seed=None: QuantumService._entangled_state_batch_result(
+            memory_to_bits(memory, n_qubits), kind
+        )
+    ),
+    "measure_qubit": SamplingMethod(
+        lambda state, basis="z", seed=None: (CircuitRegistry.measure_key(state, basis), 1),
+        lambda service, memory, state, basis="z", seed=None: QuantumService._measure_qubit_result(memory[0], state, basis)
+    ),
+    "measure_qubit_batch": SamplingMethod(
+        lambda state, basis="z", shots=100, seed=None: (CircuitRegistry.measure_key(state, basis), shots),
+        lambda service, memory, state, basis="z", shots=100, seed=None: QuantumService._measure_qubit_batch_result(
+            Counter(memory), len(memory), state, basis
+        )
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def _signature(method: str) -> inspect.Signature:
+    return inspect.signature(getattr(QuantumService, method))
+
+
+def _arguments(method: str, args: tuple) -> Dict:
+    """A QuantumService call's arguments by parameter name, with its defaults filled in."""
+    bound = _signature(method).bind(None, *args)
+    bound.apply_defaults()
+    return bound.arguments
+
+
+def _plan_matrix(arguments: Dict) -> Tuple[str, int]:
+    measure_keys, bell_keys = QuantumService._matrix_keys(
+        arguments["states"], arguments["bases"], arguments["bell_states"]
+    )
+    return "matrix", (len(measure_keys) + len(bell_keys)) * arguments["shots"]
+
+
+def _plan_chsh(arguments: Dict) -> Tuple[CircuitKey, Optional[int]]:
+    QuantumService._check_chsh_angles(arguments["alice"], arguments["bob"])
+    key = CircuitRegistry.chsh_key(arguments["state_type"])
+    # Four settings, each run with shots shots; exact results sample nothing
+    return key, None if arguments["exact"] else 4 * arguments["shots"]
+
+
+def _plan_sweep(arguments: Dict) -> Tuple[CircuitKey, Optional[int]]:
+    bindings, _ = QuantumService._sweep_bindings(
+        *(arguments[name] for name in ("theta", "phi", "basis", "basis_theta", "basis_phi"))
+    )
+    if arguments["exact"]:
+        return CircuitRegistry.rotation_key(), None
+    points = len(bindings["theta"])
+    QuantumService._check_sweep_shots(points, arguments["shots"])
+    return CircuitRegistry.rotation_key(), points * arguments["shots"]
+
+
+def _plan_coalesced(arguments: Dict) -> Tuple[CircuitKey, int]:
+    plans = [SAMPLING_METHODS[method].plan(*args) for method, args in arguments["calls"]]
+    return plans[0][0], sum(shots for _, shots in plans)
+
+
+# Circuit and shots of the QuantumService calls outside SAMPLING_METHODS.
+# Each reads the call's arguments by parameter name, so a changed method
+# signature fails loudly instead of labeling (and charging) the wrong argument
+JOB_PLANS: Dict[str, Callable[[Dict], Tuple]] = {
+    "run_coalesced": _plan_coalesced,
+    "sample_counts": lambda arguments: (arguments["key"], arguments["shots"]),
+    "sample_outcomes": lambda arguments: (arguments["key"], arguments["shots"]),
+    "convergence_curve": lambda arguments: (arguments["key"], arguments["shots"]),
+    "expected_distribution": lambda arguments: (arguments["key"], None),
+    "sample_with_sequence": lambda arguments: _plan(arguments["method"], arguments["args"]),
+    "measure_qubit_matrix": _plan_matrix,
+    "chsh_experiment": _plan_chsh,
+    "measure_qubit_sweep": _plan_sweep,
+}
+
+
+def _plan(method: str, args: tuple) -> Tuple:
+    if method in SAMPLING_METHODS:
+        return SAMPLING_METHODS[method].plan(*args)
+    if method in JOB_PLANS:
+        return JOB_PLANS[method](_arguments(method, args))
+    return "none", None
+
+
+def plan_job(method: str, args: tuple) -> Tuple[str, Optional[int]]:
+    """
+    Circuit ("coin/single") and shot count of a QuantumService call.
+    
+    The arguments are checked as the method would check them, without
+    building or running anything, so a request can be rejected before it
+    is admitted or queued.
+    
+    Returns:
+        (circuit, shots): shots is None for exact (closed-form) results, and
+        ("none", None) is returned for calls that do not sample one circuit
+    
+    Raises:
+        ValueError: For arguments the method would reject
+    """
+    key, shots = _plan(method, args)
+    if isinstance(key, str):
+        return key, shots
+    return "/".join(part for part in key if part is not None), shots
+
+
+def job_labels(method: str, args: tuple) -> Tuple[str, Optional[int]]:
+    """
+    plan_job for metrics: ("invalid", None) for arguments the method would reject.
+    """
+    try:
+        return plan_job(method, args)
+    except (ValueError, TypeError, IndexError):
+        return "invalid", None
+
+
+# Singleton instance, created on first use (QUANTUM_BACKEND=analytic skips Aer entirely)
+_quantum_service: Optional[QuantumService] = None
+_quantum_service_lock = threading.Lock()
+
+
+def get_quantum_service() -> QuantumService:
+    global _quantum_service
+    if _quantum_service is None:
+        with _quantum_service_lock:
+            if _quantum_service is None:
+                _quantum_service = QuantumService(backend=os.environ.get("QUANTUM_BACKEND", "aer"))
+    return _quantum_service
+
 
-# Create singleton instance
-quantum_service = QuantumService()
\ No newline at end of file
+def __getattr__(name: str):
+    # Keeps `from quantum_service import quantum_service` working without
+    # paying for the service at import time
+    if name == "quantum_service":
+        return get_quantum_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from quantum_service import SAMPLING_METHODS
+
+
+class CoalesceInfo(NamedTuple):
+    """How a request was served: how many requests shared its simulator job, and how it was simulated."""
+    merged_requests: int
+    window_ms: float
+    simulation_method: Optional[str] = None
+
+
+class _Batch:
+    def __init__(self):
+        self.opened = time.perf_counter()
+        self.calls: List[Tuple[str, tuple]] = []
+        self.futures: List[asyncio.Future] = []
+        self.total_shots = 0
+
+
+class RequestCoalescer:
+    """
+    Merges concurrent requests for the same circuit into one simulator job.
+    
+    The first request for a circuit key opens a short window; every request
+    for that key arriving within it joins the batch. When the window closes
+    the batch is sent to the executor as a single QuantumService.run_coalesced
+    job (one Aer run with shots=sum(requested) and memory=True), and each
+    caller receives the result built from its own slice of the memory.
+    Single shots in a batch come from the worker's outcome reservoir, and a
+    batch that holds only one request runs that request's method as it is.
+    
+    Args:
+        executor: SimulationExecutor that runs the merged jobs
+        window_ms: How long a batch stays open (0 disables coalescing)
+        max_batch_shots: A batch is sent early once it holds this many shots
+    """
+    
+    def __init__(self, executor, window_ms: float = 2.0, max_batch_shots: int = 200_000):
+        self.executor = executor
+        self.window_ms = window_ms
+        self.max_batch_shots = max_batch_shots
+        self._open: Dict[Any, _Batch] = {}
+        # Batches being executed; the event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        
+        self._requests = 0
+        self._jobs = 0
+        self._largest_batch = 0
+        self._window_total_ms = 0.0
+    
+    @classmethod
+    def from_env(cls, executor) -> "RequestCoalescer":
+        """Configure from QUANTUM_COALESCE_WINDOW_MS and QUANTUM_COALESCE_MAX_SHOTS."""
+        return cls(
+            executor,
+            window_ms=float(os.environ.get("QUANTUM_COALESCE_WINDOW_MS", 2)),
+            max_batch_shots=int(os.environ.get("QUANTUM_COALESCE_MAX_SHOTS", 200_000)),
+        )
+    
+    async def call(self, method: str, *args) -> Tuple[Any, CoalesceInfo]:
+        """
+        Call a sampling method of QuantumService, sharing a job when possible.
+        
+        Raises:
+            ValueError: For invalid arguments (before anything is queued)
+        """
+        key, shots = SAMPLING_METHODS[method].plan(*args)
+        
+        if self.window_ms <= 0:
+            result, labels = await self.executor.run_labeled(method, *args)
+            return result, CoalesceInfo(1, 0.0, labels.get("simulation_method"))
+        
+        batch = self._open.get(key)
+        if batch is not None and batch.total_shots + shots > self.max_batch_shots:
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = self._open[key] = _Batch()
+            asyncio.get_running_loop().call_later(self.window_ms / 1000, self._flush, key, batch)
+        
+        future = asyncio.get_running_loop().create_future()
+        batch.calls.append((method, args))
+        batch.futures.append(future)
+        batch.total_shots += shots
+        self._requests += 1
+        return await future
+    
+    def _flush(self, key, batch: _Batch = None) -> None:
+        # Called by the window timer, or early when the batch is full
+        if batch is not None and self._open.get(key) is not batch:
+            return  # Already flushed early
+        batch = self._open.pop(key)
+        task = asyncio.create_task(self._execute(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _execute(self, batch: _Batch) -> None:
+        window_ms = round((time.perf_counter() - batch.opened) * 1000, 3)
+        self._jobs += 1
+        self._largest_batch = max(self._largest_batch, len(batch.calls))
+        self._window_total_ms += window_ms
+        
+        try:
+            if len(batch.calls) == 1:
+                # Nothing to share: the plain method skips per-shot memory
+                method, args = batch.calls[0]
+                result, labels = await self.executor.run_labeled(method, *args)
+                results = [result]
+            else:
+                results, labels = await self.executor.run_labeled("run_coalesced", batch.calls)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        info = CoalesceInfo(len(batch.calls), window_ms, labels.get("simulation_method"))
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result((result, info))
+    
+    @property
+    def pending(self) -> int:
+        """Requests waiting in batches whose window is still open."""
+        return sum(len(batch.calls) for batch in self._open.values())
+    
+    def stats(self) -> Dict:
+        """Requests served, simulator jobs used and batch window statistics."""
+        return {
+            "window_ms": self.window_ms,
+            "requests": self._requests,
+            "jobs": self._jobs,
+            "requests_per_job": round(self._requests / self._jobs, 2) if self._jobs else 0.0,
+            "largest_batch": self._largest_batch,
+            "average_window_ms": round(self._window_total_ms / self._jobs, 3) if self._jobs else 0.0,
+        }
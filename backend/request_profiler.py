@@ -0,0 +1,150 @@
+import asyncio
+import contextvars
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import re
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+# Set while a profiled request is served: worker-side profiles of its
+# simulator jobs are appended here (None: the request is not profiled)
+job_profiles: contextvars.ContextVar[Optional[List[Dict]]] = contextvars.ContextVar("job_profiles", default=None)
+
+
+def profile_call(call):
+    """
+    Worker side: run call() under cProfile.
+
+    Returns:
+        (call's return value, the profile's raw pstats table), which pickles
+        and goes back to the API process with the job's result
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = call()
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+class _RawStats:
+    # pstats.Stats accepts any object with create_stats() and a stats table
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class RequestProfiler:
+    """
+    ASGI middleware that profiles selected requests with cProfile.
+
+    A request is profiled when it carries an X-Profile header or a
+    ?profile= query flag equal to token, or when it is picked at
+    sample_rate. Without a token clients cannot ask for profiles (so
+    nobody can load the server with them), and only sampling applies. Its own time on the event
+    loop is profiled in the API process, and each simulator job it runs is
+    profiled inside its worker, so QuantumService and Qiskit show up too.
+    Both are merged into one <time>-<method>-<path>.prof file (pstats
+    format, read by snakeviz, tuna, flameprof and python -m pstats), whose
+    name is returned in the X-Profile response header. Only the newest
+    max_files profiles are kept.
+
+    The event-loop profile also sees whatever else the loop runs meanwhile,
+    so only one request is profiled at a time; others are served as usual.
+    Profiled requests are not coalesced with other requests, so that their
+    simulator job is their own.
+
+    Not installed at all unless QUANTUM_PROFILE_DIR is set, so it costs
+    nothing when disabled.
+
+    Args:
+        app: The ASGI app to wrap
+        directory: Where profiles are written (created if missing)
+        sample_rate: Share of requests profiled without being asked (0 to 1)
+        max_files: Profiles kept on disk; the oldest are deleted
+        token: Value the header or query flag must carry (None: ignore them)
+    """
+
+    def __init__(self, app, directory: str, sample_rate: float = 0.0, max_files: int = 50,
+                 token: Optional[str] = None):
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.token = token
+        self.busy = False
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def options_from_env() -> Optional[Dict]:
+        """
+        Middleware options from QUANTUM_PROFILE_DIR, QUANTUM_PROFILE_SAMPLE_RATE,
+        QUANTUM_PROFILE_MAX_FILES and QUANTUM_PROFILE_TOKEN (None if no directory is set).
+        """
+        directory = os.environ.get("QUANTUM_PROFILE_DIR")
+        if not directory:
+            return None
+        return {
+            "directory": directory,
+            "sample_rate": float(os.environ.get("QUANTUM_PROFILE_SAMPLE_RATE", 0.0)),
+            "max_files": int(os.environ.get("QUANTUM_PROFILE_MAX_FILES", 50)),
+            "token": os.environ.get("QUANTUM_PROFILE_TOKEN") or None,
+        }
+
+    def _requested(self, scope) -> bool:
+        if self.token is None:
+            return False
+        values = [value.decode("latin-1") for name, value in scope["headers"] if name == b"x-profile"]
+        values += parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", [])
+        return any(hmac.compare_digest(value.encode(), self.token.encode()) for value in values)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.busy:
+            return await self.app(scope, receive, send)
+        if not self._requested(scope) and not (self.sample_rate and random.random() < self.sample_rate):
+            return await self.app(scope, receive, send)
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{scope['method']}-{slug}.prof"
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile", name.encode())]}
+            await send(message)
+
+        jobs: List[Dict] = []
+        token = job_profiles.set(jobs)
+        self.busy = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            profiler.disable()
+            self.busy = False
+            job_profiles.reset(token)
+            await asyncio.to_thread(self._write, name, profiler, jobs)
+
+    def _write(self, name: str, profiler: cProfile.Profile, jobs: List[Dict]) -> None:
+        stats = pstats.Stats(profiler)
+        for job in jobs:
+            stats.add(_RawStats(job))
+        stats.dump_stats(os.path.join(self.directory, name))
+
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".prof")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in profiles[:max(0, len(profiles) - self.max_files)]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # Removed by another API worker sharing the directory
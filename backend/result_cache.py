@@ -0,0 +1,107 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like result, in bytes."""
+    if isinstance(value, (bytes, str)):
+        return 48 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(8 + estimate_size(item) for item in value)
+    return 28  # int, float, bool, None
+
+
+class ResultCache:
+    """
+    Bounded LRU cache for seeded simulation results.
+
+    A seeded run is reproducible, so its result is fully determined by the
+    method, circuit key, shots and seed; replaying a seeded demo or fixture
+    then costs a dictionary lookup instead of a simulator job. Entries expire
+    after ttl seconds and the least recently used ones are evicted once the
+    estimated size of all entries exceeds max_bytes.
+
+    Cached values are shared between requests and must not be mutated.
+
+    Args:
+        max_bytes: Memory budget for cached results (0 disables the cache)
+        ttl: Seconds an entry stays valid
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (value, size, expires at)
+        self._entries: OrderedDict = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Configure from QUANTUM_CACHE_MAX_BYTES and QUANTUM_CACHE_TTL."""
+        return cls(
+            max_bytes=int(os.environ.get("QUANTUM_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+            ttl=float(os.environ.get("QUANTUM_CACHE_TTL", 3600)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, size, expires = entry
+        if time.monotonic() >= expires:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + self.ttl)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict:
+        """Entries, size and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
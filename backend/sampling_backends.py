@@ -0,0 +1,283 @@
+import threading
+
+import numpy as np
+from typing import Dict, List, Optional
+
+from circuit_registry import ENTANGLED_STATES, CircuitKey, CircuitRegistry
+from metrics import label_job, phase
+from simulator_profiles import load_profiles, select_profile
+
+
+def memory_to_bits(memory: List[str], num_bits: int) -> np.ndarray:
+    """
+    Convert Qiskit memory strings into a (shots, num_bits) uint8 array.
+    
+    Qiskit writes classical bit 0 last, so columns are reversed to make
+    column i hold classical bit i.
+    """
+    chars = np.frombuffer("".join(memory).encode("ascii"), dtype=np.uint8)
+    return (chars.reshape(len(memory), num_bits)[:, ::-1] - ord("0")).astype(np.uint8)
+
+
+def bits_to_memory(bits: np.ndarray) -> List[str]:
+    """Inverse of memory_to_bits: one Qiskit-ordered bitstring per shot."""
+    chars = np.ascontiguousarray(bits[:, ::-1] + ord("0"), dtype=np.uint8)
+    return [row.decode("ascii") for row in chars.view(f"S{bits.shape[1]}").ravel()]
+
+
+def pack_bits(bits: np.ndarray) -> bytes:
+    """
+    Pack a (shots, num_bits) 0/1 array into bytes, row by row.
+    
+    Bit k of the flattened array is bit 7 - k % 8 of byte k // 8 (most
+    significant bit first); the last byte is padded with zeros.
+    """
+    return np.packbits(bits.astype(np.uint8, copy=False).ravel()).tobytes()
+
+
+def sample_entangled_bits(kind: str, n_qubits: int, shots: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw (shots, n_qubits) outcomes of a GHZ or W state from its closed form.
+    
+    A GHZ state measures all 0s or all 1s with probability 1/2 each; a W
+    state measures exactly one qubit, chosen uniformly, as 1. Memory is
+    shots × n_qubits bytes, never a 2^n statevector.
+    """
+    if kind == "ghz":
+        return np.repeat(rng.integers(0, 2, size=(shots, 1), dtype=np.uint8), n_qubits, axis=1)
+    bits = np.zeros((shots, n_qubits), dtype=np.uint8)
+    bits[np.arange(shots), rng.integers(0, n_qubits, size=shots)] = 1
+    return bits
+
+
+class AerBackend:
+    """
+    Samples registered circuits with Qiskit Aer.
+
+    Circuits are transpiled for the simulator once by the registry. Each
+    simulator profile (see simulator_profiles) has its own AerSimulator,
+    configured with the profile's parallelism options, and every job runs on
+    the smallest profile that fits its shots and experiments. Runs on one
+    simulator are serialized because the outcome reservoir refills from its
+    own thread; runs on different profiles do not wait for each other.
+    A seed is passed to Aer as seed_simulator, making the run reproducible.
+
+    Each run names its simulation method explicitly: the registry classifies
+    every circuit once, Clifford-only circuits (coins, Bell states) run on the
+    stabilizer method and the rest (e.g. the ry rotations of the biased
+    measurement states) on statevector.
+
+    GHZ states are Clifford and run on the stabilizer method, whose
+    measurements cost O(n²) per shot. Runs above MAX_STABILIZER_WORK, and W
+    states (not Clifford) wider than MAX_STATEVECTOR_QUBITS, are drawn from
+    their closed-form distribution instead, as the analytic backend does.
+    """
+
+    name = "aer"
+
+    # Widest non-Clifford entangled state simulated with a statevector
+    MAX_STATEVECTOR_QUBITS = 20
+    # Largest shots × n² simulated on the stabilizer method (about a second)
+    MAX_STABILIZER_WORK = 20_000_000
+
+    def __init__(self):
+        from qiskit_aer import AerSimulator
+
+        self.profiles = load_profiles()
+        self.simulators = {profile.name: AerSimulator(**profile.options) for profile in self.profiles}
+        self._locks = {profile.name: threading.Lock() for profile in self.profiles}
+        # Profiles only change run options, so any simulator serves as the transpile target
+        self.circuits = CircuitRegistry(self.simulators[self.profiles[0].name])
+
+    def simulation_method(self, key: CircuitKey) -> str:
+        """"stabilizer" or "statevector", as classified by the registry ("analytic" for wide W states)."""
+        if self._is_closed_form(key, 1):
+            return "analytic"
+        return self.circuits.simulation_method(key)
+
+    def _is_closed_form(self, key: CircuitKey, shots: int) -> bool:
+        if key[0] not in ENTANGLED_STATES:
+            return False
+        n_qubits = int(key[1])
+        if self.circuits.simulation_method(key) == "stabilizer":
+            return shots * n_qubits ** 2 > self.MAX_STABILIZER_WORK
+        return n_qubits > self.MAX_STATEVECTOR_QUBITS
+
+    def _sample_closed_form(self, key: CircuitKey, shots: int, seed: Optional[int]) -> np.ndarray:
+        label_job("simulation_method", "analytic")
+        with phase("simulate"):
+            return sample_entangled_bits(key[0], int(key[1]), shots, np.random.default_rng(seed))
+
+    def _execute(self, keys: List[CircuitKey], shots: int, seed: Optional[int], **options):
+        circuits = [self.circuits.transpiled(key) for key in keys]
+        # One method per job: stabilizer only if every circuit in it is Clifford
+        methods = {self.circuits.simulation_method(key) for key in keys}
+        options["method"] = methods.pop() if len(methods) == 1 else "statevector"
+        label_job("simulation_method", options["method"])
+        if seed is not None:
+            options["seed_simulator"] = seed
+        # Every parameter binding is an experiment of its own
+        bindings = max((len(values) for binds in options.get("parameter_binds", []) for values in binds.values()),
+                       default=1)
+        profile = select_profile(self.profiles, shots, len(keys) * bindings)
+        label_job("simulator_profile", profile.name)
+        with self._locks[profile.name], phase("simulate"):
+            return self.simulators[profile.name].run(circuits, shots=shots, **options).result()
+
+    def counts(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> Dict[str, int]:
+        """Run a registered circuit and return its counts."""
+        if self._is_closed_form(key, shots):
+            labels, sampled = np.unique(self.memory(key, shots, seed), return_counts=True)
+            return {str(label): int(count) for label, count in zip(labels, sampled)}
+        return self._execute([key], shots, seed).get_counts(0)
+
+    def counts_many(self, keys: List[CircuitKey], shots: int, seed: Optional[int] = None) -> List[Dict[str, int]]:
+        """Run several registered circuits as one multi-circuit Aer job."""
+        result = self._execute(keys, shots, seed)
+        return [result.get_counts(i) for i in range(len(keys))]
+
+    def sweep_counts(self, key: CircuitKey, bindings: Dict[str, np.ndarray], shots: int,
+                     seed: Optional[int] = None) -> List[Dict[str, int]]:
+        """
+        Run a parameterized circuit once per binding, as one Aer job.
+
+        The transpiled template is bound inside Aer (parameter_binds), so no
+        circuit is built or transpiled per point.
+        """
+        parameters = {parameter.name: parameter for parameter in self.circuits.transpiled(key).parameters}
+        binds = {parameters[name]: np.asarray(values, dtype=float).tolist() for name, values in bindings.items()}
+        points = len(next(iter(binds.values())))
+        result = self._execute([key], shots, seed, parameter_binds=[binds])
+        return [result.get_counts(i) for i in range(points)]
+
+    def memory(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> List[str]:
+        """Run a registered circuit and return the per-shot outcomes."""
+        if self._is_closed_form(key, shots):
+            return bits_to_memory(self._sample_closed_form(key, shots, seed))
+        return self._execute([key], shots, seed, memory=True).get_memory(0)
+
+    def bits(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> np.ndarray:
+        """Per-shot outcomes as a (shots, num_clbits) array of 0/1."""
+        if self._is_closed_form(key, shots):
+            return self._sample_closed_form(key, shots, seed)
+        return memory_to_bits(self.memory(key, shots, seed), self.circuits.circuit(key).num_clbits)
+
+
+class AnalyticBackend:
+    """
+    Samples registered circuits from their exact outcome distribution.
+
+    Every circuit in the registry acts on one or two qubits and measures qubit
+    i into classical bit i, so the distribution is just |amplitude|² of a 2- or
+    4-element statevector. It is computed once per circuit key; shots are then
+    drawn with NumPy, returning counts and memory in Qiskit's bit order.
+    
+    Coin flips on more qubits than a statevector can reasonably hold are
+    sampled directly as independent fair bits, which is exactly their
+    distribution. GHZ and W states are likewise drawn from their closed form
+    at any width.
+    
+    A seeded call draws from its own generator created from the seed, so it
+    is reproducible and independent of the shared one.
+    """
+
+    name = "analytic"
+
+    # Above this many qubits coin flips skip the statevector entirely
+    MAX_STATEVECTOR_COINS = 16
+
+    def __init__(self, seed: Optional[int] = None):
+        self.circuits = CircuitRegistry()
+        self._rng = np.random.default_rng(seed)
+        # numpy Generators are not thread-safe
+        self._lock = threading.Lock()
+        self._distributions: Dict[CircuitKey, tuple] = {}
+
+    def simulation_method(self, key: CircuitKey) -> str:
+        return "analytic"
+
+    def _is_large_coin(self, key: CircuitKey) -> bool:
+        return key[0] == "coin" and self.circuits.circuit(key).num_qubits > self.MAX_STATEVECTOR_COINS
+
+    def _is_closed_form(self, key: CircuitKey) -> bool:
+        return key[0] in ENTANGLED_STATES or self._is_large_coin(key)
+
+    def _distribution(self, key: CircuitKey) -> tuple:
+        distribution = self._distributions.get(key)
+        if distribution is None:
+            probabilities = self.circuits.probabilities(key)
+            num_bits = self.circuits.circuit(key).num_clbits
+            labels = np.array([format(i, f"0{num_bits}b") for i in range(len(probabilities))])
+            distribution = (probabilities, labels)
+            self._distributions[key] = distribution
+        return distribution
+
+    def _draw(self, seed: Optional[int], draw):
+        # Call draw(generator) with the shared generator, or a fresh seeded one
+        label_job("simulation_method", "analytic")
+        if seed is not None:
+            with phase("simulate"):
+                return draw(np.random.default_rng(seed))
+        with self._lock, phase("simulate"):
+            return draw(self._rng)
+
+    def counts(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> Dict[str, int]:
+        """Draw counts from the exact distribution (zero counts omitted, as in Aer)."""
+        if self._is_closed_form(key):
+            labels, sampled = np.unique(self.memory(key, shots, seed), return_counts=True)
+            return {str(label): int(count) for label, count in zip(labels, sampled)}
+        probabilities, labels = self._distribution(key)
+        sampled = self._draw(seed, lambda rng: rng.multinomial(shots, probabilities))
+        return {str(labels[i]): int(count) for i, count in enumerate(sampled) if count}
+
+    def counts_many(self, keys: List[CircuitKey], shots: int, seed: Optional[int] = None) -> List[Dict[str, int]]:
+        """Draw counts for several circuits (one multinomial draw each, seeded seed + i)."""
+        return [
+            self.counts(key, shots, None if seed is None else seed + i)
+            for i, key in enumerate(keys)
+        ]
+
+    def sweep_counts(self, key: CircuitKey, bindings: Dict[str, np.ndarray], shots: int,
+                     seed: Optional[int] = None) -> List[Dict[str, int]]:
+        """Draw counts for every binding of a parameterized circuit (one vectorized multinomial draw)."""
+        probabilities = self.circuits.sweep_probabilities(key, bindings)
+        num_bits = self.circuits.circuit(key).num_clbits
+        labels = [format(i, f"0{num_bits}b") for i in range(probabilities.shape[1])]
+        sampled = self._draw(seed, lambda rng: rng.multinomial(shots, probabilities))
+        return [
+            {label: int(count) for label, count in zip(labels, row) if count}
+            for row in sampled
+        ]
+
+    def memory(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> List[str]:
+        """Draw per-shot outcomes from the exact distribution."""
+        if self._is_closed_form(key):
+            return bits_to_memory(self.bits(key, shots, seed))
+        probabilities, labels = self._distribution(key)
+        indices = self._draw(seed, lambda rng: rng.choice(len(probabilities), size=shots, p=probabilities))
+        return labels[indices].tolist()
+
+    def bits(self, key: CircuitKey, shots: int, seed: Optional[int] = None) -> np.ndarray:
+        """Per-shot outcomes as a (shots, num_clbits) array of 0/1."""
+        if key[0] in ENTANGLED_STATES:
+            return self._draw(seed, lambda rng: sample_entangled_bits(key[0], int(key[1]), shots, rng))
+        num_bits = self.circuits.circuit(key).num_clbits
+        if self._is_large_coin(key):
+            return self._draw(seed, lambda rng: rng.integers(0, 2, size=(shots, num_bits), dtype=np.uint8))
+        probabilities, _ = self._distribution(key)
+        indices = self._draw(seed, lambda rng: rng.choice(len(probabilities), size=shots, p=probabilities))
+        return ((indices[:, None] >> np.arange(num_bits)) & 1).astype(np.uint8)
+
+
+BACKENDS = {
+    AerBackend.name: AerBackend,
+    AnalyticBackend.name: AnalyticBackend,
+}
+
+
+def create_backend(name: str):
+    """Instantiate a sampling backend by name ("aer" or "analytic")."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sampling backend: {name}. Must be one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
@@ -0,0 +1,367 @@
+import fcntl
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from circuit_registry import BELL_STATES, COIN_CIRCUITS, MEASUREMENT_BASES, STATE_PREPARATIONS, CircuitKey
+
+# Name of the shared-memory block, passed from the launcher to every API worker
+POOL_ENV = "QUANTUM_OUTCOME_POOL"
+
+_MAGIC = b"QOPOOL01"
+_HEADER_SIZE = 4096
+# Each counter gets a cache line of its own, so the sampler and the workers
+# never write to the same line
+_LINE = 8  # int64s per 64-byte cache line
+
+# Control words (int64) after the magic
+_STOP, _SLOTS, _KEYS, _CAPACITY, _LAYOUT_LENGTH = range(5)
+
+# A ring byte is an outcome index (low bits) tagged with the lap it was written
+# for: _WRITTEN is set once written, _ODD_LAP when counter // capacity is odd
+_WRITTEN = 0x80
+_ODD_LAP = 0x40
+_TAG = _WRITTEN | _ODD_LAP
+
+
+def _pool_keys() -> List[Tuple[CircuitKey, int]]:
+    """Circuit key and number of classical bits of every single-shot circuit."""
+    keys = [(("coin", name, None), num_qubits) for name, (num_qubits, _) in COIN_CIRCUITS.items()]
+    keys += [(("bell", state, None), 2) for state in BELL_STATES]
+    keys += [(("measure", state, basis), 1) for state in STATE_PREPARATIONS for basis in MEASUREMENT_BASES]
+    return keys
+
+
+class SharedOutcomePool:
+    """
+    Pre-simulated single-shot outcomes in shared memory, for several API workers.
+
+    The launcher creates the pool and starts one sampler process, the only
+    process that runs the simulator for single shots. Every API worker
+    attaches to the pool by name and claims a slot: a ring buffer per circuit
+    key holding outcome indices (one byte per shot). Each ring has exactly one
+    writer (the sampler) and one reader (the worker that owns the slot):
+
+    - the sampler writes outcomes past the write counter, then advances it
+    - the worker reads the outcome at its read counter, then advances it
+
+    Counters only grow (the ring position is counter % capacity), and each is
+    an aligned 8-byte word written by a single process. Neither side takes a
+    lock. Python cannot order the outcome bytes before the counter store, and
+    weakly ordered CPUs (ARM) may make the counter visible first, so the
+    counter is only a hint: every byte also carries the lap (counter //
+    capacity, odd or even) it was written for, in the same single-byte store
+    as the outcome. A worker only takes an outcome whose tag matches its read
+    counter; one still showing the previous lap (or never written) is treated
+    as not there yet. The read counter is stored after that check, so the
+    sampler cannot overwrite an outcome before it has been read. The sampler
+    polls the counters, which double as the refill signal: a ring whose fill
+    level (written - read) drops below low_water is topped up to capacity,
+    with one simulator run per circuit key covering every worker that needs it.
+
+    A draw from an empty ring returns None and the caller falls back to a
+    simulator job, so a worker never blocks on the sampler.
+
+    Args:
+        shm: The shared-memory block
+        owner: Whether this process created the block (and unlinks it on close)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        self._control = np.ndarray((_LINE,), dtype=np.int64, buffer=shm.buf, offset=len(_MAGIC))
+        self.slots = int(self._control[_SLOTS])
+        self.capacity = int(self._control[_CAPACITY])
+        self.low_water = self.capacity // 2
+
+        layout_start = len(_MAGIC) + _LINE * 8
+        layout = json.loads(bytes(shm.buf[layout_start:layout_start + int(self._control[_LAYOUT_LENGTH])]))
+        self.keys: List[CircuitKey] = [tuple(key) for key, _ in layout]
+        self._index = {key: i for i, key in enumerate(self.keys)}
+        # Outcome index -> Qiskit bitstring (classical bit 0 last), per key
+        self._labels = [[format(v, f"0{num_bits}b") for v in range(1 << num_bits)] for _, num_bits in layout]
+        self._num_bits = [num_bits for _, num_bits in layout]
+
+        counters = (self.slots, len(self.keys), _LINE)
+        offset = _HEADER_SIZE
+        self._written = np.ndarray(counters, dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self._written.nbytes
+        self._read = np.ndarray(counters, dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self._read.nbytes
+        self._owners = np.ndarray((self.slots, _LINE), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self._owners.nbytes
+        self._data = np.ndarray((self.slots, len(self.keys), self.capacity), dtype=np.uint8,
+                                buffer=shm.buf, offset=offset)
+
+        self.slot: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._sampler = None
+        # Held while claiming a slot (closing any descriptor of the file would
+        # drop the process's fcntl locks on it)
+        self._lock_file = None
+
+    @staticmethod
+    def _size(slots: int, num_keys: int, capacity: int) -> int:
+        return _HEADER_SIZE + (2 * slots * num_keys + slots) * _LINE * 8 + slots * num_keys * capacity
+
+    @classmethod
+    def create(cls, slots: int, capacity: int = 16_384) -> "SharedOutcomePool":
+        """Allocate a pool with one slot per API worker and capacity outcomes per ring."""
+        if slots < 1 or capacity < 2:
+            raise ValueError("A shared outcome pool needs at least one slot and a capacity of 2")
+        keys = _pool_keys()
+        layout = json.dumps([[list(key), num_bits] for key, num_bits in keys]).encode()
+        if len(_MAGIC) + _LINE * 8 + len(layout) > _HEADER_SIZE:
+            raise ValueError("Too many circuit keys for the pool header")
+
+        # A new block is zero-filled: every counter starts at 0 and no slot is owned
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(slots, len(keys), capacity))
+        shm.buf[:len(_MAGIC)] = _MAGIC
+        control = np.ndarray((_LINE,), dtype=np.int64, buffer=shm.buf, offset=len(_MAGIC))
+        control[[_SLOTS, _KEYS, _CAPACITY, _LAYOUT_LENGTH]] = [slots, len(keys), capacity, len(layout)]
+        layout_start = len(_MAGIC) + _LINE * 8
+        shm.buf[layout_start:layout_start + len(layout)] = layout
+        del control
+        open(cls._lock_path(shm.name), "w").close()
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedOutcomePool":
+        """
+        Open an existing pool by name.
+
+        Raises:
+            ValueError: If the block is not an outcome pool
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if bytes(shm.buf[:len(_MAGIC)]) != _MAGIC:
+            shm.close()
+            raise ValueError(f"Shared memory block {name} is not an outcome pool")
+        return cls(shm)
+
+    @classmethod
+    def from_env(cls) -> Optional["SharedOutcomePool"]:
+        """Attach to the pool named in QUANTUM_OUTCOME_POOL (None if unset)."""
+        name = os.environ.get(POOL_ENV)
+        return cls.attach(name) if name else None
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @staticmethod
+    def _lock_path(name: str) -> str:
+        return os.path.join(tempfile.gettempdir(), f"{name.lstrip('/')}.lock")
+
+    def _lock(self) -> None:
+        if self._lock_file is None:
+            self._lock_file = open(self._lock_path(self.name), "a")
+        fcntl.lockf(self._lock_file, fcntl.LOCK_EX)
+
+    def _unlock(self) -> None:
+        fcntl.lockf(self._lock_file, fcntl.LOCK_UN)
+
+    def _tag(self, counter: int) -> int:
+        return _WRITTEN | (_ODD_LAP if (counter // self.capacity) & 1 else 0)
+
+    def __enter__(self) -> "SharedOutcomePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release this process's slot; the creator also stops the sampler and frees the block."""
+        self.release()
+        if self.owner:
+            self._control[_STOP] = 1
+            if self._sampler is not None:
+                self._sampler.join(timeout=5)
+                if self._sampler.is_alive():
+                    self._sampler.terminate()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        # numpy views keep the buffer exported; drop them before closing
+        self._control = self._written = self._read = self._owners = self._data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+            try:
+                os.remove(self._lock_path(self.name))
+            except FileNotFoundError:
+                pass
+
+    # ==================== API Worker Side ====================
+
+    def claim(self) -> int:
+        """
+        Take a free slot for this process (or one left by a process that died).
+
+        Claims are rare (once per worker start), so they are serialized with
+        a file lock rather than made lock-free.
+
+        Raises:
+            RuntimeError: If every slot is owned by a live process
+        """
+        pid = os.getpid()
+        self._lock()
+        try:
+            for slot in range(self.slots):
+                owner = int(self._owners[slot, 0])
+                if owner == 0 or owner == pid or not _alive(owner):
+                    # Outcomes left in the rings are still valid, unused shots
+                    self._owners[slot, 0] = pid
+                    self.slot = slot
+                    return slot
+        finally:
+            self._unlock()
+        raise RuntimeError(f"All {self.slots} outcome pool slots are in use")
+
+    def release(self) -> None:
+        if self.slot is not None and self._owners is not None:
+            self._owners[self.slot, 0] = 0
+        self.slot = None
+
+    def draw(self, key: CircuitKey) -> Optional[str]:
+        """
+        Take one outcome for a circuit key as a Qiskit bitstring.
+
+        Returns None if this process holds no slot, the key is not pooled or
+        its ring is empty; the caller then runs a simulator job instead.
+        """
+        k = self._index.get(key)
+        slot = self.slot
+        if slot is None or k is None:
+            return None
+        read = int(self._read[slot, k, 0])
+        value = 0
+        if read != int(self._written[slot, k, 0]):
+            value = int(self._data[slot, k, read % self.capacity])
+        # An empty ring, or a counter that became visible before its outcome
+        if value & _TAG != self._tag(read):
+            self.misses += 1
+            return None
+        # Advancing the read counter hands the position back to the sampler
+        self._read[slot, k, 0] = read + 1
+        self.hits += 1
+        return self._labels[k][value & ~_TAG]
+
+    def fill_levels(self) -> Dict[str, int]:
+        """Outcomes left per circuit key in this process's slot."""
+        if self.slot is None:
+            return {}
+        levels = self._written[self.slot, :, 0] - self._read[self.slot, :, 0]
+        return {
+            "/".join(part for part in key if part is not None): int(level)
+            for key, level in zip(self.keys, levels)
+        }
+
+    def stats(self) -> Dict:
+        """Slot, hit/miss counters and fill levels of this process."""
+        draws = self.hits + self.misses
+        return {
+            "enabled": True,
+            "name": self.name,
+            "slot": self.slot,
+            "slots": self.slots,
+            "workers": int(np.count_nonzero(self._owners[:, 0])),
+            "capacity": self.capacity,
+            "low_water": self.low_water,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / draws, 4) if draws else 0.0,
+            "fill": self.fill_levels(),
+        }
+
+    # ==================== Sampler Side ====================
+
+    def start_sampler(self, backend: str = "aer", poll_ms: float = 2.0) -> None:
+        """Start the process that keeps every claimed slot filled."""
+        context = multiprocessing.get_context("spawn")
+        self._sampler = context.Process(
+            target=_run_sampler, args=(self.name, backend, poll_ms, os.getpid()),
+            name="outcome-sampler", daemon=True,
+        )
+        self._sampler.start()
+
+    def refill(self, sample) -> int:
+        """
+        Top up every ring of a claimed slot that is below low_water.
+
+        Args:
+            sample: Callable (key index, shots) -> array of outcome indices
+
+        Returns:
+            Number of outcomes written
+        """
+        claimed = self._owners[:, 0] != 0
+        fill = self._written[:, :, 0] - self._read[:, :, 0]
+        needed = np.where(claimed[:, None] & (fill < self.low_water), self.capacity - fill, 0)
+        written = 0
+        for k in np.flatnonzero(needed.sum(axis=0)):
+            # One simulator run per key, split between the slots that need it
+            outcomes = sample(k, int(needed[:, k].sum()))
+            offset = 0
+            for slot in np.flatnonzero(needed[:, k]):
+                count = int(needed[slot, k])
+                self._write(slot, k, outcomes[offset:offset + count])
+                offset += count
+            written += offset
+        return written
+
+    def _write(self, slot: int, k: int, outcomes: np.ndarray) -> None:
+        start = int(self._written[slot, k, 0])
+        # The worker may have read more since refill() looked; never overwrite unread outcomes
+        outcomes = outcomes[:self.capacity - (start - int(self._read[slot, k, 0]))]
+        odd_laps = (np.arange(start, start + len(outcomes)) // self.capacity) & 1
+        tagged = outcomes | (_WRITTEN | odd_laps * _ODD_LAP).astype(np.uint8)
+        position = start % self.capacity
+        first = min(len(tagged), self.capacity - position)
+        ring = self._data[slot, k]
+        ring[position:position + first] = tagged[:first]
+        ring[:len(tagged) - first] = tagged[first:]
+        self._written[slot, k, 0] = start + len(tagged)
+
+    def sample_indices(self, backend, k: int, shots: int) -> np.ndarray:
+        """Sample a pooled circuit and return outcome indices (bit i = classical bit i)."""
+        bits = backend.bits(self.keys[k], shots)
+        return (bits.astype(np.uint8) << np.arange(self._num_bits[k], dtype=np.uint8)).sum(axis=1, dtype=np.uint8)
+
+    @property
+    def stopping(self) -> bool:
+        return bool(self._control[_STOP])
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _run_sampler(name: str, backend_name: str, poll_ms: float, parent: int) -> None:
+    from sampling_backends import create_backend
+
+    pool = SharedOutcomePool.attach(name)
+    backend = create_backend(backend_name)
+    try:
+        # Exits when the launcher asks it to, or when the launcher is gone
+        while not pool.stopping and os.getppid() == parent:
+            if not pool.refill(lambda k, shots: pool.sample_indices(backend, k, shots)):
+                time.sleep(poll_ms / 1000)
+    except KeyboardInterrupt:
+        pass  # Ctrl+C reaches the whole process group; the launcher shuts down
+    finally:
+        pool.close()
@@ -0,0 +1,87 @@
+import json
+import math
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import Request
+
+from circuit_registry import CircuitKey
+
+MAX_STREAM_SHOTS = 10_000_000
+MAX_CHUNK_SIZE = 100_000
+
+# The first chunk is small so the client sees data almost immediately;
+# chunks then double in size up to the requested chunk size
+FIRST_CHUNK_SIZE = 1_000
+
+
+def _snapshot(counts: Dict[str, int], expected: Dict[str, float], shots_done: int) -> Dict:
+    """Running statistics after shots_done shots."""
+    percentages = {
+        outcome: round((count / shots_done) * 100, 4)
+        for outcome, count in counts.items()
+    }
+    # Largest gap between observed and theoretical percentage (percentage points)
+    max_abs_error = max(
+        abs(count / shots_done - expected[outcome]) for outcome, count in counts.items()
+    ) * 100
+    # Largest binomial standard error of the observed percentages
+    standard_error = max(
+        math.sqrt(p * (1 - p) / shots_done) for p in expected.values()
+    ) * 100
+    return {
+        "shots_done": shots_done,
+        "counts": dict(counts),
+        "percentages": percentages,
+        "max_abs_error": round(max_abs_error, 4),
+        "standard_error": round(standard_error, 4),
+    }
+
+
+async def stream_counts(executor, request: Request, key: CircuitKey,
+                        total_shots: int, chunk_size: int, seed: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Run a registered circuit in chunks and yield NDJSON progress lines.
+    
+    Only the running counts are kept, so memory use does not depend on the
+    number of shots. The stream stops as soon as the client disconnects.
+    With a seed, chunk i runs with seed + i, so the whole stream is reproducible.
+    
+    Lines:
+        {"event": "start", ...}  - expected percentages, before any simulation
+        {"event": "chunk", ...}  - running counts, percentages, errors and the
+                                   chunk's simulation method
+        {"event": "done", ...}   - same as a chunk line, for the final chunk
+    """
+    expected = await executor.run("expected_distribution", key)
+    counts = {outcome: 0 for outcome in expected}
+    
+    yield json.dumps({
+        "event": "start",
+        "total_shots": total_shots,
+        "chunk_size": chunk_size,
+        "expected_percentages": {outcome: round(p * 100, 4) for outcome, p in expected.items()},
+    }) + "\n"
+    
+    shots_done = 0
+    chunk = 0
+    size = min(FIRST_CHUNK_SIZE, chunk_size)
+    while shots_done < total_shots:
+        if await request.is_disconnected():
+            return
+        
+        shots = min(size, total_shots - shots_done)
+        chunk_seed = None if seed is None else seed + chunk
+        chunk_counts, labels = await executor.run_labeled("sample_counts", key, shots, chunk_seed)
+        for outcome, count in chunk_counts.items():
+            counts[outcome] = counts.get(outcome, 0) + count
+        shots_done += shots
+        chunk += 1
+        size = min(size * 2, chunk_size)
+        
+        yield json.dumps({
+            "event": "done" if shots_done == total_shots else "chunk",
+            "chunk": chunk,
+            "total_shots": total_shots,
+            "simulation_method": labels.get("simulation_method"),
+            **_snapshot(counts, expected, shots_done),
+        }) + "\n"
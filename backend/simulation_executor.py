@@ -0,0 +1,240 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from request_profiler import job_profiles, profile_call
+
+
+class SimulationQueueFull(Exception):
+    """Raised when every worker is busy and the job queue is at its limit."""
+
+
+class SimulationTimeout(Exception):
+    """Raised when a simulation job does not finish within the job timeout."""
+
+
+# ==================== Worker Process ====================
+
+_warm_up_report: Dict = {}
+_workers_ready = None
+
+
+def _init_worker(warm_up: str, workers_ready) -> None:
+    # Build the worker's own QuantumService (and AerSimulator) before the first job
+    global _warm_up_report, _workers_ready
+    start = time.perf_counter()
+    from quantum_service import get_quantum_service
+    service = get_quantum_service()
+    module_import = time.perf_counter() - start
+
+    _warm_up_report = {
+        "pid": os.getpid(),
+        "phases": {"module_import": round(module_import, 4), **service.warm_up(warm_up)},
+    }
+
+    _workers_ready = workers_ready
+    with workers_ready.get_lock():
+        workers_ready.value += 1
+
+
+def _get_warm_up_report(workers: int, timeout: float) -> Dict:
+    # Hold this worker until every worker has warmed up, so that each of the
+    # report jobs submitted by SimulationExecutor.warm_up lands on a different one
+    deadline = time.monotonic() + timeout
+    while _workers_ready.value < workers and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return _warm_up_report
+
+
+def _call(method: str, args: tuple, profile: bool = False) -> Tuple[Any, Dict[str, float], Dict[str, str], Optional[Dict]]:
+    from metrics import collect_labels, collect_phases
+    from quantum_service import get_quantum_service
+
+    # The per-phase timings and job labels (and the job's cProfile table, if
+    # its request is profiled) travel back to the API process with the result
+    def run():
+        with collect_phases() as phases, collect_labels() as labels:
+            result = getattr(get_quantum_service(), method)(*args)
+        return result, phases, labels
+
+    if not profile:
+        return (*run(), None)
+    (result, phases, labels), stats = profile_call(run)
+    return result, phases, labels, stats
+
+
+# ==================== Executor ====================
+
+class SimulationExecutor:
+    """
+    Runs QuantumService methods off the event loop in a bounded process pool.
+
+    Each worker process owns its own QuantumService, so AerSimulator instances
+    are never shared between processes. Workers are started with the "spawn"
+    method: forking a parent that already has Aer's OpenMP threads and the
+    reservoir refill thread running is not safe.
+
+    Args:
+        workers: Number of worker processes (0 runs jobs in a thread of this process)
+        queue_depth: Jobs allowed to wait for a free worker before new ones are rejected
+        timeout: Seconds a caller waits for a job before giving up
+        warm_up: QuantumService.warm_up mode each worker runs when it starts
+
+    Set observer to a callable(method, args, phases, round_trip_seconds, labels)
+    to be told about every finished job; phases is None if the job failed.
+    labels holds what the worker attached with metrics.label_job(), such as
+    the simulation method.
+    """
+
+    def __init__(self, workers: int = 2, queue_depth: int = 64, timeout: float = 30.0,
+                 warm_up: str = "circuits"):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.warm_up_mode = warm_up
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+        self._workers_ready = None
+        self.observer: Optional[Callable[[str, tuple, Optional[Dict[str, float]], float, Dict[str, str]], None]] = None
+
+    @classmethod
+    def from_env(cls) -> "SimulationExecutor":
+        """Configure from QUANTUM_WORKERS, QUANTUM_QUEUE_DEPTH, QUANTUM_JOB_TIMEOUT and QUANTUM_WARMUP."""
+        return cls(
+            workers=int(os.environ.get("QUANTUM_WORKERS", min(4, os.cpu_count() or 1))),
+            queue_depth=int(os.environ.get("QUANTUM_QUEUE_DEPTH", 64)),
+            timeout=float(os.environ.get("QUANTUM_JOB_TIMEOUT", 30)),
+            warm_up=os.environ.get("QUANTUM_WARMUP", "circuits"),
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of jobs running or waiting at once."""
+        return max(self.workers, 1) + self.queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a free worker."""
+        return max(0, self._in_flight - max(self.workers, 1))
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        context = multiprocessing.get_context("spawn")
+        # Number of workers that have finished warming up, shared with every worker
+        self._workers_ready = context.Value("i", 0)
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.warm_up_mode, self._workers_ready),
+            )
+        else:
+            # Single thread: the in-process backend serializes simulator runs anyway
+            self._pool = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="simulation",
+                initializer=_init_worker,
+                initargs=(self.warm_up_mode, self._workers_ready),
+            )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, method: str, *args) -> Any:
+        """
+        Call a QuantumService method in a worker and await its result.
+
+        Raises:
+            SimulationQueueFull: If the pool and its queue are saturated
+            SimulationTimeout: If the job takes longer than the timeout
+            ValueError: Propagated from the service for invalid arguments
+        """
+        result, _ = await self.run_labeled(method, *args)
+        return result
+
+    async def run_labeled(self, method: str, *args) -> Tuple[Any, Dict[str, str]]:
+        """
+        Like run(), but also return the job's labels (e.g. {"simulation_method": "stabilizer"}).
+
+        Raises:
+            SimulationQueueFull: If the pool and its queue are saturated
+            SimulationTimeout: If the job takes longer than the timeout
+            ValueError: Propagated from the service for invalid arguments
+        """
+        if self._in_flight >= self.capacity:
+            raise SimulationQueueFull(
+                f"Simulation queue is full ({self._in_flight} jobs in flight)"
+            )
+
+        if self._pool is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        profiles = job_profiles.get()
+        job = self._pool.submit(_call, method, args, profiles is not None)
+
+        # A timed-out job keeps its worker busy until it finishes, so the slot
+        # is released when the job completes rather than when the caller gives up
+        self._in_flight += 1
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                pass  # Event loop already closed during shutdown
+
+        job.add_done_callback(release)
+
+        phases = None
+        labels: Dict[str, str] = {}
+        try:
+            result, phases, labels, stats = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+            if stats is not None:
+                profiles.append(stats)
+        except asyncio.TimeoutError:
+            raise SimulationTimeout(f"Simulation did not finish within {self.timeout:g}s")
+        finally:
+            if self.observer is not None:
+                self.observer(method, args, phases, time.perf_counter() - start, labels)
+        return result, labels
+
+    async def warm_up(self, on_ready: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Start every worker and wait until each has finished warming up.
+
+        Workers warm up in their initializer, before they accept any job; one
+        report job per worker makes the pool start them all and returns
+        each worker's phase timings.
+
+        Args:
+            on_ready: Called with each worker's report as soon as it arrives
+        """
+        if self._pool is None:
+            self.start()
+        workers = max(self.workers, 1)
+        jobs = [
+            asyncio.wrap_future(self._pool.submit(_get_warm_up_report, workers, self.timeout))
+            for _ in range(workers)
+        ]
+        reports = []
+        for job in asyncio.as_completed(jobs):
+            report = await job
+            reports.append(report)
+            if on_ready is not None:
+                on_ready(report)
+        return reports
+
+    def _release(self) -> None:
+        self._in_flight -= 1
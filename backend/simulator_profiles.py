@@ -0,0 +1,128 @@
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+# Profile fields other than Aer options
+ROUTING_FIELDS = ("max_shots", "max_experiments")
+
+
+class SimulatorProfile(NamedTuple):
+    """
+    One AerSimulator configuration and the jobs routed to it.
+
+    A job goes to the smallest profile whose limits hold it (None: no limit).
+    options are passed to AerSimulator as they are, e.g. max_parallel_threads,
+    max_parallel_shots, max_parallel_experiments or shot_branching_enable.
+    """
+    name: str
+    max_shots: Optional[int]
+    max_experiments: Optional[int]
+    options: Dict
+
+    def fits(self, shots: int, experiments: int) -> bool:
+        return ((self.max_shots is None or shots <= self.max_shots)
+                and (self.max_experiments is None or experiments <= self.max_experiments))
+
+    def describe(self) -> Dict:
+        return {"max_shots": self.max_shots, "max_experiments": self.max_experiments, "options": dict(self.options)}
+
+
+def thread_budget() -> int:
+    """
+    OpenMP threads one worker process may use: QUANTUM_AER_THREADS, or the
+    CPUs divided between the QUANTUM_WORKERS simulation workers, so that
+    parallel batches in different workers do not oversubscribe the cores.
+    """
+    if "QUANTUM_AER_THREADS" in os.environ:
+        return max(1, int(os.environ["QUANTUM_AER_THREADS"]))
+    cpus = os.cpu_count() or 1
+    workers = int(os.environ.get("QUANTUM_WORKERS", min(4, cpus)))
+    return max(1, cpus // max(1, workers))
+
+
+def default_profiles(threads: int) -> Dict[str, Dict]:
+    """
+    interactive: single shots and tiny batches on one thread, so they do not
+    pay OpenMP thread start-up for microseconds of work.
+    batch: one circuit, many shots, parallel over the worker's threads.
+    multi_experiment: several circuits (or parameter bindings) in one job,
+    run in parallel with each other rather than parallel within each one.
+
+    Our circuits measure only at the end, so Aer samples every shot from one
+    final state and shot branching (useful for mid-circuit measurements)
+    stays off; a profile can turn it on with shot_branching_enable.
+    """
+    return {
+        "interactive": {
+            "max_shots": 64,
+            "max_experiments": 1,
+            "options": {"max_parallel_threads": 1, "max_parallel_experiments": 1, "max_parallel_shots": 1},
+        },
+        "batch": {
+            "max_shots": None,
+            "max_experiments": 1,
+            "options": {"max_parallel_threads": threads, "max_parallel_experiments": 1, "max_parallel_shots": 0},
+        },
+        "multi_experiment": {
+            "max_shots": None,
+            "max_experiments": None,
+            "options": {"max_parallel_threads": threads, "max_parallel_experiments": 0, "max_parallel_shots": 1},
+        },
+    }
+
+
+def load_profiles(overrides: Optional[str] = None) -> List[SimulatorProfile]:
+    """
+    The default profiles, tuned by QUANTUM_AER_PROFILES (or overrides).
+
+    The override is a JSON object of profile name -> fields. Fields of an
+    existing profile replace its defaults (options are merged key by key);
+    a new name adds a profile. null for a profile removes it.
+    For example {"batch": {"options": {"max_parallel_threads": 2}},
+    "interactive": {"max_shots": 256}}.
+
+    Returns:
+        Profiles in routing order (smallest first)
+
+    Raises:
+        ValueError: If the override is not valid JSON or names an unknown field
+    """
+    if overrides is None:
+        overrides = os.environ.get("QUANTUM_AER_PROFILES", "")
+    profiles = default_profiles(thread_budget())
+
+    if overrides.strip():
+        try:
+            changes = json.loads(overrides)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"QUANTUM_AER_PROFILES is not valid JSON: {e}")
+        if not isinstance(changes, dict):
+            raise ValueError("QUANTUM_AER_PROFILES must be a JSON object of profile name -> fields")
+        for name, fields in changes.items():
+            if fields is None:
+                profiles.pop(name, None)
+                continue
+            unknown = set(fields) - set(ROUTING_FIELDS) - {"options"}
+            if unknown:
+                raise ValueError(f"Unknown field(s) in simulator profile {name}: {', '.join(sorted(unknown))}")
+            profile = profiles.setdefault(name, {"max_shots": None, "max_experiments": None, "options": {}})
+            profile.update({field: fields[field] for field in ROUTING_FIELDS if field in fields})
+            profile["options"] = {**profile["options"], **fields.get("options", {})}
+
+    if not profiles:
+        raise ValueError("QUANTUM_AER_PROFILES removed every simulator profile")
+
+    def size(profile: SimulatorProfile):
+        # Unlimited sorts last
+        return (profile.max_experiments is None, profile.max_experiments or 0,
+                profile.max_shots is None, profile.max_shots or 0)
+
+    return sorted((SimulatorProfile(name, **fields) for name, fields in profiles.items()), key=size)
+
+
+def select_profile(profiles: List[SimulatorProfile], shots: int, experiments: int = 1) -> SimulatorProfile:
+    """The first (smallest) profile that fits the job, or the largest if none does."""
+    for profile in profiles:
+        if profile.fits(shots, experiments):
+            return profile
+    return profiles[-1]
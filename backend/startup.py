@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+
+class StartupTracker:
+    """
+    Tracks the warm-up phase for the readiness probe and the startup report.
+
+    The API answers liveness checks as soon as the event loop runs; warm-up
+    (rendering diagrams, starting workers, loading Qiskit and running every
+    registered circuit in each of them) happens in the background, and the
+    service only reports ready once it has finished.
+
+    Args:
+        started: perf_counter() value taken before the app's imports
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: Dict[str, float] = {}
+        self.workers: List[Dict] = []
+        self.steps_total = 0
+        self.steps_done = 0
+        self.ready = False
+        self.error: Optional[str] = None
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = round(seconds, 4)
+
+    def start(self, simulation, diagrams, diagram_formats: List[str]) -> asyncio.Task:
+        """Begin warming up in the background; the task sets ready when done."""
+        # One step for the diagrams, one per worker
+        self.steps_total = 1 + max(simulation.workers, 1)
+        return asyncio.create_task(self._warm_up(simulation, diagrams, diagram_formats))
+
+    async def _warm_up(self, simulation, diagrams, diagram_formats: List[str]) -> None:
+        try:
+            start = time.perf_counter()
+            await asyncio.to_thread(diagrams.render, diagram_formats)
+            self.record("diagrams", time.perf_counter() - start)
+            self.steps_done += 1
+
+            start = time.perf_counter()
+            await simulation.warm_up(on_ready=self._worker_ready)
+            self.record("workers", time.perf_counter() - start)
+
+            self.record("until_ready", time.perf_counter() - self.started)
+            self.ready = True
+        except Exception as e:
+            self.error = repr(e)
+
+    def _worker_ready(self, report: Dict) -> None:
+        self.workers.append(report)
+        self.steps_done += 1
+
+    def readiness(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "progress": round(self.steps_done / self.steps_total, 3) if self.steps_total else 0.0,
+            "steps_done": self.steps_done,
+            "steps_total": self.steps_total,
+            "error": self.error,
+        }
+
+    def report(self) -> Dict:
+        """
+        Startup time broken down by phase.
+
+        phases: this process (app_import, diagrams, workers, until_ready)
+        workers: each worker's module_import, import (Qiskit), construct and
+            first_run (and reservoir) timings
+        """
+        return {
+            **self.readiness(),
+            "phases": dict(self.phases),
+            "workers": list(self.workers),
+        }
@@ -0,0 +1,214 @@
+import pytest
+
+import admission_control
+from admission_control import AdmissionController, AdmissionRejected, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission_control.time, "monotonic", clock)
+    return clock
+
+
+def controller(**kwargs):
+    options = dict(shots_per_second=1000, max_concurrent=4, client_rate=100, client_burst=200,
+                   request_cost=10, bulk_share=0.5)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+# ==================== TokenBucket ====================
+
+def test_bucket_starts_full_and_refills_at_rate(clock):
+    bucket = TokenBucket(rate=10, burst=100)
+
+    assert bucket.wait(100, now=clock.now) == 0.0
+    bucket.take(100)
+    assert bucket.wait(50, now=clock.now) == 5.0
+    assert bucket.wait(50, now=clock.now + 2) == 3.0
+    assert bucket.wait(50, now=clock.now + 5) == 0.0
+    # Refilling stops at burst
+    assert bucket.wait(100, now=clock.now + 60) == 0.0
+    assert bucket.tokens == 100
+
+
+def test_bucket_wait_keeps_the_reserve(clock):
+    bucket = TokenBucket(rate=10, burst=100)
+    bucket.take(60)
+
+    assert bucket.wait(40, now=clock.now) == 0.0
+    assert bucket.wait(40, reserve=20, now=clock.now) == 2.0
+
+
+def test_oversized_request_waits_for_a_full_bucket_and_leaves_it_in_debt(clock):
+    bucket = TokenBucket(rate=10, burst=100)
+    bucket.take(40)
+
+    # Partly drained: it needs the 40 missing tokens back first
+    assert bucket.wait(1000, now=clock.now) == 4.0
+    assert bucket.wait(1000, now=clock.now + 4) == 0.0
+    bucket.take(1000)
+    assert bucket.tokens == -900
+
+    # The excess is paid back at rate before anything else fits
+    assert bucket.wait(1, now=clock.now + 4) == 90.1
+    assert bucket.wait(100, now=clock.now + 4 + 90) == 10.0
+    assert bucket.wait(100, now=clock.now + 4 + 100) == 0.0
+
+
+def test_bucket_ignores_times_before_it_was_created(clock):
+    bucket = TokenBucket(rate=10, burst=100)
+
+    assert bucket.wait(100, now=clock.now - 1) == 0.0
+    assert bucket.updated == clock.now
+
+
+# ==================== AdmissionController ====================
+
+def test_acquire_charges_budgets_and_release_frees_the_slot(clock):
+    admission = controller()
+
+    release = admission.acquire("alice", 50)
+    assert (admission.in_flight, admission.in_flight_bulk, admission.admitted) == (1, 1, 1)
+    assert admission.shots.tokens == 950
+    assert admission._clients["alice"].tokens == 150
+
+    release()
+    release()  # Idempotent
+    assert (admission.in_flight, admission.in_flight_bulk) == (0, 0)
+
+
+def test_small_requests_are_charged_request_cost_per_client(clock):
+    admission = controller()
+
+    admission.acquire("alice", 1)()
+
+    assert admission._clients["alice"].tokens == 190
+    assert admission.shots.tokens == 999
+
+
+def test_client_over_quota_gets_429_with_retry_after(clock):
+    admission = controller()
+    admission.acquire("alice", 200)()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.acquire("alice", 50)
+
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after == 0.5
+    assert rejected.value.retry_after_header == "1"
+    assert admission.rejected_client == 1
+    # Other clients have their own bucket
+    admission.acquire("bob", 50)()
+    # And alice is admitted again once hers has refilled
+    clock.now += 0.5
+    admission.acquire("alice", 50)()
+
+
+def test_fresh_client_can_use_its_whole_burst(clock, monkeypatch):
+    # The client's bucket is created after acquire() read the time
+    def ticking():
+        clock.now += 0.001
+        return clock.now
+
+    monkeypatch.setattr(admission_control.time, "monotonic", ticking)
+    admission = controller()
+
+    admission.acquire("new", 200)()
+
+    assert admission.rejected_client == 0
+
+
+def test_oversized_request_is_charged_in_full_per_client(clock):
+    admission = controller(shots_per_second=0)
+    admission.acquire("alice", 150)()
+
+    # Only 50 of alice's 200 are left: an oversized request is rejected until her bucket is full
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.acquire("alice", 1000)
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after == 1.5
+
+    clock.now += 1.5
+    admission.acquire("alice", 1000)()
+    assert admission._clients["alice"].tokens == -800
+
+    # She then waits for all 1000 shots to be paid for, not just the burst
+    clock.now += 8
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.acquire("alice", 50)
+    assert rejected.value.retry_after == pytest.approx(0.5)
+    clock.now += 0.5
+    admission.acquire("alice", 50)()
+
+
+def test_concurrency_limit_sheds_bulk_first(clock):
+    admission = controller(client_rate=0)
+    held = [admission.acquire(f"c{i}", 10) for i in range(2)]
+
+    # Bulk requests may only hold bulk_share of the slots
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.acquire("c2", 10)
+    assert rejected.value.status_code == 503
+
+    # Single shots can still use the rest
+    held += [admission.acquire("c2", 1), admission.acquire("c3", 1)]
+    with pytest.raises(AdmissionRejected):
+        admission.acquire("c4", 1)
+    assert admission.rejected_overload == 2
+
+    held[0]()
+    admission.acquire("c4", 1)
+
+
+def test_global_shot_budget_keeps_a_reserve_for_single_shots(clock):
+    admission = controller(client_rate=0)
+    admission.acquire("a", 500)()
+
+    # Bulk may not dig into the half of the bucket reserved for single shots
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.acquire("b", 10)
+    assert rejected.value.status_code == 503
+    assert rejected.value.retry_after == pytest.approx(0.01)
+
+    admission.acquire("c", 1)()
+    clock.now += 0.02
+    admission.acquire("b", 10)()
+
+
+def test_admit_releases_on_error(clock):
+    admission = controller()
+
+    with pytest.raises(RuntimeError):
+        with admission.admit("alice", 10):
+            assert admission.in_flight == 1
+            raise RuntimeError
+
+    assert admission.in_flight == 0
+
+
+def test_disabled_controller_admits_everything(clock):
+    admission = controller(enabled=False, max_concurrent=1)
+
+    for _ in range(5):
+        admission.acquire("alice", 10**9)
+
+    assert admission.in_flight == 0
+    assert admission.stats()["enabled"] is False
+
+
+def test_least_recently_seen_client_buckets_are_dropped(clock):
+    admission = controller(max_clients=2)
+    for client in ["a", "b", "a", "c"]:
+        admission.acquire(client, 1)()
+
+    assert list(admission._clients) == ["a", "c"]
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from quantum_service import QuantumService
+from sampling_backends import bits_to_memory, memory_to_bits, pack_bits
+
+
+def test_memory_to_bits_puts_classical_bit_0_first():
+    bits = memory_to_bits(["001", "110", "100"], 3)
+
+    assert bits.dtype == np.uint8
+    assert bits.tolist() == [[1, 0, 0], [0, 1, 1], [0, 0, 1]]
+
+
+def test_bits_to_memory_round_trips():
+    memory = ["0110", "1000", "0001", "1111", "0000"]
+
+    assert bits_to_memory(memory_to_bits(memory, 4)) == memory
+
+
+def test_pack_bits_is_row_major_and_msb_first():
+    bits = np.array([[1, 0, 1], [1, 0, 0], [0, 0, 1]])
+
+    # 101 100 00|1 + seven padding zeros
+    assert pack_bits(bits) == bytes([0b10110000, 0b10000000])
+
+
+def test_pack_bits_uses_one_bit_per_shot_and_coin():
+    bits = np.ones((10_000, 1), dtype=np.uint8)
+
+    assert pack_bits(bits) == b"\xff" * 1250
+    assert pack_bits(np.zeros((9, 2), dtype=np.uint8)) == bytes(3)
+
+
+def test_pack_bits_accepts_bool_and_wider_arrays():
+    bits = np.array([[True, False], [False, True]])
+
+    assert pack_bits(bits) == pack_bits(bits.astype(np.int64)) == bytes([0b10010000])
+
+
+class MemoryBackend:
+    """Backend with fixed per-shot memory, and circuits that only report their width and distribution."""
+
+    def __init__(self, memory):
+        self._memory = memory
+        self.circuits = SimpleNamespace(
+            circuit=lambda key: SimpleNamespace(num_clbits=len(memory[0])),
+            expected_distribution=lambda key: {"00": 0.5, "11": 0.5},
+        )
+
+    def memory(self, key, shots, seed=None):
+        assert shots == len(self._memory)
+        return list(self._memory)
+
+
+def service_with_memory(memory):
+    service = QuantumService("analytic")
+    service._backend = MemoryBackend(memory)
+    return service
+
+
+def test_sequence_for_coins_is_in_coin_order():
+    # Qiskit strings end with coin 1: "01" is coin 1 tails (1), coin 2 heads (0)
+    service = service_with_memory(["01", "11", "00", "10"])
+
+    result, sequence = service.sample_with_sequence("double_coin_flip_batch", (4,))
+
+    assert sequence == {"shots": 4, "bits_per_shot": 2, "data": bytes([0b10110001])}
+    assert result["total_shots"] == 4
+
+
+def test_sequence_for_bell_states_keeps_qiskit_order():
+    service = service_with_memory(["01", "01", "10"])
+
+    _, sequence = service.sample_with_sequence("bell_state_batch", ("phi_plus", 3))
+
+    assert sequence == {"shots": 3, "bits_per_shot": 2, "data": bytes([0b01011000])}
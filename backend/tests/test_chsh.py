@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from quantum_service import QuantumService
+
+TSIRELSON = 2 * np.sqrt(2)
+
+
+@pytest.fixture(scope="module")
+def service():
+    return QuantumService("analytic")
+
+
+def product_counts(alice, bob, shots):
+    # |0⟩|0⟩ measured along a and b: each side is +1 with probability cos²(angle/2), independently
+    counts = []
+    for a in alice:
+        for b in bob:
+            pa, pb = np.cos(a / 2) ** 2, np.cos(b / 2) ** 2
+            probabilities = [pa * pb, pa * (1 - pb), (1 - pa) * pb, (1 - pa) * (1 - pb)]
+            sampled = np.round(np.array(probabilities) * shots).astype(int)
+            counts.append(dict(zip(["00", "01", "10", "11"], sampled.tolist())))
+    return counts
+
+
+@pytest.mark.parametrize("state", ["phi_plus", "psi_minus"])
+def test_default_angles_reach_the_quantum_bound(service, state):
+    result = service.chsh_experiment(state, exact=True)
+
+    assert result["expected_S"] == pytest.approx(TSIRELSON, abs=1e-6)
+    assert result["expected_correlators"] == pytest.approx([1 / np.sqrt(2)] * 3 + [-1 / np.sqrt(2)], abs=1e-6)
+    assert result["quantum_bound"] == round(TSIRELSON, 6)
+
+
+def test_aligned_angles_stay_classical(service):
+    result = service.chsh_experiment("phi_plus", alice=[0.0, 0.0], bob=[0.0, 0.0], exact=True)
+
+    assert result["expected_S"] == pytest.approx(2.0)
+
+
+def test_seeded_run_violates_the_classical_bound(service):
+    result = service.chsh_experiment("psi_minus", shots=100_000, seed=11)
+
+    assert result["shots_per_setting"] == 100_000
+    assert result["S"] == pytest.approx(TSIRELSON, abs=5 * result["S_error"])
+    assert result["violation_sigmas"] > 50
+    assert result == service.chsh_experiment("psi_minus", shots=100_000, seed=11)
+
+
+@pytest.mark.parametrize("alice, bob", [
+    ([0.0, np.pi / 2], [np.pi / 4, -np.pi / 4]),
+    ([0.0, np.pi], [0.0, np.pi]),
+    ([0.3, 2.1], [1.2, -0.7]),
+])
+def test_product_states_never_exceed_two(alice, bob):
+    result = QuantumService._chsh_statistics(product_counts(alice, bob, 1_000_000))
+
+    assert abs(result["S"]) <= 2 + 1e-3
+
+
+def test_perfectly_correlated_settings_have_no_error():
+    counts = [{"00": 50, "11": 50}] * 3 + [{"01": 50, "10": 50}]
+
+    result = QuantumService._chsh_statistics(counts)
+
+    assert result["correlators"] == [1.0, 1.0, 1.0, -1.0]
+    assert result["S"] == 4.0
+    assert result["S_error"] == 0.0
+    assert result["violation_sigmas"] is None
+
+
+def test_merged_chunks_equal_one_run_of_all_their_shots(service):
+    chunks = [service.chsh_experiment("phi_plus", shots=shots, seed=seed)
+              for shots, seed in ((1000, 1), (3000, 2), (500, 3))]
+
+    merged = QuantumService.merge_chsh(chunks)
+
+    summed = [{outcome: sum(chunk["counts"][i][outcome] for chunk in chunks) for outcome in ("00", "01", "10", "11")}
+              for i in range(4)]
+    assert merged["shots_per_setting"] == 4500
+    assert merged["counts"] == summed
+    assert {k: merged[k] for k in ("S", "S_error", "correlators")} == \
+        {k: QuantumService._chsh_statistics(summed)[k] for k in ("S", "S_error", "correlators")}
+    assert merged["expected_S"] == chunks[0]["expected_S"]
+
+
+def test_shots_and_angles_are_validated(service):
+    with pytest.raises(ValueError, match="per job"):
+        service.chsh_experiment("phi_plus", shots=QuantumService.CHSH_CHUNK_SHOTS + 1)
+    with pytest.raises(ValueError, match="two finite angles"):
+        service.chsh_experiment("phi_plus", alice=[0.0], exact=True)
+    with pytest.raises(ValueError):
+        service.chsh_experiment("ghz", exact=True)
+
+
+class AnalyticSimulation:
+    """Runs jobs inline on an analytic QuantumService, recording their shots per setting."""
+
+    workers = 2
+    timeout = 5.0
+
+    def __init__(self):
+        self.service = QuantumService("analytic")
+        self.sizes = []
+
+    async def run_labeled(self, method, *args):
+        self.sizes.append(args[3])
+        return getattr(self.service, method)(*args), {"simulation_method": "stabilizer"}
+
+
+def test_experiments_run_in_chunks_that_fit_a_partly_drained_client_bucket(monkeypatch):
+    import asyncio
+
+    import main
+    from admission_control import AdmissionController
+
+    simulation = AnalyticSimulation()
+    admission = AdmissionController(shots_per_second=0, client_rate=100_000, client_burst=4000)
+    monkeypatch.setattr(main, "simulation", simulation)
+    monkeypatch.setattr(main, "admission", admission)
+
+    async def experiment():
+        # Right after another request: a chunk needing the whole bucket would get a 429
+        admission.acquire("unknown", 1500)()
+        return await main.chsh(("phi_plus", None, None), 1200, 7)
+
+    result, method = asyncio.run(experiment())
+
+    # Half of 4000 shots over four settings: chunks of 500, paced by the bucket
+    # (later chunks may be turned away and retried while they wait for the bucket)
+    assert sorted(simulation.sizes) == [200, 500, 500]
+    assert admission.admitted == 4
+    assert result["shots_per_setting"] == 1200
+    assert sum(sum(counts.values()) for counts in result["counts"]) == 4 * 1200
+    assert method == "stabilizer"
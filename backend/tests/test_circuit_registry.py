@@ -0,0 +1,78 @@
+import pytest
+
+from circuit_registry import BELL_STATES, COIN_CIRCUITS, MEASUREMENT_BASES, STATE_PREPARATIONS, CircuitRegistry
+
+SHOTS = 2000
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    from qiskit_aer import AerSimulator
+    return AerSimulator()
+
+
+@pytest.fixture(scope="module")
+def registry(simulator):
+    return CircuitRegistry(simulator)
+
+
+def run(simulator, registry, key):
+    return simulator.run(registry.transpiled(key), shots=SHOTS, seed_simulator=7).result().get_counts()
+
+
+def test_every_circuit_is_built_up_front(registry):
+    expected = (
+        [CircuitRegistry.coin_key(name) for name in COIN_CIRCUITS]
+        + [CircuitRegistry.bell_key(state) for state in BELL_STATES]
+        + [CircuitRegistry.measure_key(state, basis) for state in STATE_PREPARATIONS for basis in MEASUREMENT_BASES]
+    )
+    assert sorted(registry.keys) == sorted(expected)
+
+
+def test_lookups_return_the_same_circuit(registry):
+    key = CircuitRegistry.bell_key("phi_plus")
+
+    assert registry.circuit(key) is registry.circuit(key)
+    assert registry.transpiled(key) is registry.transpiled(key)
+    assert registry.circuit(key).num_clbits == 2
+
+
+@pytest.mark.parametrize("state, outcomes", [
+    ("phi_plus", {"00", "11"}),
+    ("phi_minus", {"00", "11"}),
+    ("psi_plus", {"01", "10"}),
+    ("psi_minus", {"01", "10"}),
+])
+def test_bell_circuits_are_correlated(simulator, registry, state, outcomes):
+    counts = run(simulator, registry, CircuitRegistry.bell_key(state))
+
+    assert set(counts) == outcomes
+
+
+@pytest.mark.parametrize("state, basis, outcomes", [
+    ("definite_0", "z", {"0"}),
+    ("definite_1", "z", {"1"}),
+    ("equal", "x", {"0"}),
+    ("definite_0", "x", {"0", "1"}),
+    ("biased_1", "z", {"0", "1"}),
+])
+def test_measurement_circuits_prepare_and_rotate(simulator, registry, state, basis, outcomes):
+    counts = run(simulator, registry, CircuitRegistry.measure_key(state, basis))
+
+    assert set(counts) == outcomes
+
+
+def test_biased_state_favours_its_outcome(simulator, registry):
+    counts = run(simulator, registry, CircuitRegistry.measure_key("biased_0", "z"))
+
+    assert counts["0"] / SHOTS == pytest.approx(0.75, abs=0.05)
+
+
+@pytest.mark.parametrize("make_key", [
+    lambda: CircuitRegistry.bell_key("phi_zero"),
+    lambda: CircuitRegistry.measure_key("sideways", "z"),
+    lambda: CircuitRegistry.measure_key("equal", "w"),
+])
+def test_key_helpers_reject_unknown_names(make_key):
+    with pytest.raises(ValueError):
+        make_key()
@@ -0,0 +1,76 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from circuit_registry import CircuitRegistry
+from quantum_service import QuantumService
+
+DOUBLE = CircuitRegistry.coin_key("double")
+BIASED = CircuitRegistry.measure_key("biased_0", "z")
+
+
+@pytest.fixture(scope="module")
+def service():
+    return QuantumService("analytic")
+
+
+def test_running_percentages_follow_the_sequence(service, monkeypatch):
+    # Coin 1 is column 0: shots are 10, 10, 00, 11 (coin 1 first)
+    bits = np.array([[1, 0], [1, 0], [0, 0], [1, 1]], dtype=np.uint8)
+    monkeypatch.setattr(service.backend, "bits", lambda key, shots, seed=None: bits)
+
+    curve = service.convergence_curve(DOUBLE, 4, points=4)
+
+    assert curve["checkpoints"] == [1, 2, 3, 4]
+    assert curve["percentages"] == {
+        "00": [0.0, 0.0, 33.3333, 25.0],
+        "01": [0.0, 0.0, 0.0, 0.0],
+        "10": [100.0, 100.0, 66.6667, 50.0],
+        "11": [0.0, 0.0, 0.0, 25.0],
+    }
+    assert curve["expected_percentages"] == {"00": 25.0, "01": 25.0, "10": 25.0, "11": 25.0}
+    assert curve["deviation"]["10"] == [75.0, 75.0, 41.6667, 25.0]
+    assert curve["max_abs_deviation"] == [75.0, 75.0, 41.6667, 25.0]
+
+
+def test_checkpoints_are_log_spaced_and_end_at_the_last_shot(service):
+    curve = service.convergence_curve(BIASED, 10_000, points=5, seed=1)
+
+    assert curve["checkpoints"] == [1, 10, 100, 1000, 10_000]
+    assert curve["total_shots"] == 10_000
+
+
+def test_close_checkpoints_are_merged(service):
+    curve = service.convergence_curve(BIASED, 20, points=50, seed=1)
+
+    checkpoints = curve["checkpoints"]
+    assert checkpoints == sorted(set(checkpoints))
+    assert checkpoints[0] == 1 and checkpoints[-1] == 20
+    assert len(checkpoints) == 20
+
+
+def test_last_point_equals_the_final_counts_of_the_same_run(service):
+    curve = service.convergence_curve(BIASED, 5000, points=20, seed=42)
+    memory = service.backend.memory(BIASED, 5000, seed=42)
+
+    final = Counter(memory)
+    assert curve["percentages"]["0"][-1] == round(final["0"] / 5000 * 100, 4)
+    assert curve["percentages"]["1"][-1] == round(final["1"] / 5000 * 100, 4)
+    assert curve["expected_percentages"] == pytest.approx({"0": 75.0, "1": 25.0}, abs=1e-3)
+
+
+def test_bands_narrow_around_the_expected_percentage(service):
+    curve = service.convergence_curve(BIASED, 10_000, points=5, confidence=0.95, seed=1)
+
+    lower, upper = curve["bands"]["0"]["lower"], curve["bands"]["0"]["upper"]
+    widths = [high - low for low, high in zip(lower, upper)]
+    assert widths == sorted(widths, reverse=True)
+    # 1.96 * sqrt(0.75 * 0.25 / 10000) = 0.85 percentage points
+    assert upper[-1] == pytest.approx(75.8487, abs=1e-3)
+
+
+@pytest.mark.parametrize("confidence", [0, 1, 1.5])
+def test_confidence_is_validated(service, confidence):
+    with pytest.raises(ValueError):
+        service.convergence_curve(BIASED, 100, confidence=confidence)
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from starlette.requests import Request
+
+from diagram_assets import CACHE_CONTROL, DIAGRAMS, LESSON_DIAGRAMS, DiagramAssets
+
+
+@pytest.fixture(scope="module")
+def assets():
+    assets = DiagramAssets()
+    assets.render(["text"])
+    return assets
+
+
+def request(if_none_match=None):
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_every_diagram_and_lesson_is_rendered(assets):
+    assert assets.rendered and assets.formats == ["text"]
+    for name in DIAGRAMS:
+        assert assets.has(name, "text") and assets.has(name, "json")
+        assert not assets.has(name, "svg")
+    for lesson in LESSON_DIAGRAMS:
+        assert assets.has(lesson, "bundle")
+
+
+def test_asset_is_served_with_etag_and_cache_headers(assets):
+    response = assets.response(request(), "bell_phi_plus", "text")
+
+    assert response.status_code == 200
+    assert response.media_type == "text/plain"
+    assert "q_0" in response.body.decode()
+    assert response.headers["cache-control"] == CACHE_CONTROL
+    assert response.headers["etag"].startswith('"')
+
+
+def test_json_format_matches_the_text_drawing(assets):
+    text = assets.response(request(), "single_coin", "text").body.decode()
+    body = json.loads(assets.response(request(), "single_coin", "json").body)
+
+    assert body == {"circuit_diagram": text}
+
+
+@pytest.mark.parametrize("header", ["{etag}", "W/{etag}", '"other", {etag}', "*"])
+def test_matching_if_none_match_gets_304(assets, header):
+    etag = assets.response(request(), "double_coin", "text").headers["etag"]
+
+    response = assets.response(request(header.format(etag=etag)), "double_coin", "text")
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+
+
+def test_stale_etag_gets_the_body(assets):
+    response = assets.response(request('"stale"'), "double_coin", "text")
+
+    assert response.status_code == 200 and response.body
+
+
+def test_lesson_bundle_holds_its_diagrams(assets):
+    bundle = json.loads(assets.response(request(), "entanglement", "bundle").body)
+
+    assert bundle["lesson"] == "entanglement"
+    assert list(bundle["diagrams"]) == LESSON_DIAGRAMS["entanglement"]
+    assert set(bundle["diagrams"]["bell_psi_minus"]) == {"text"}
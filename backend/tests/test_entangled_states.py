@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from circuit_registry import MAX_ENTANGLED_QUBITS, CircuitRegistry
+from quantum_service import QuantumService
+from sampling_backends import sample_entangled_bits
+
+
+@pytest.fixture(scope="module")
+def service():
+    return QuantumService("analytic")
+
+
+def test_ghz_qubits_always_agree():
+    bits = sample_entangled_bits("ghz", 50, 1000, np.random.default_rng(7))
+
+    assert bits.shape == (1000, 50)
+    assert set(bits.sum(axis=1).tolist()) == {0, 50}
+
+
+def test_w_state_has_exactly_one_excitation():
+    bits = sample_entangled_bits("w", 20, 1000, np.random.default_rng(7))
+
+    assert (bits.sum(axis=1) == 1).all()
+    # Every qubit gets its share of the single 1
+    assert (bits.sum(axis=0) > 0).all()
+
+
+def test_statistics_come_from_the_hamming_weights():
+    bits = np.array([[0, 0, 0], [1, 1, 1], [1, 0, 0], [1, 1, 0]], dtype=np.uint8)
+
+    result = QuantumService._entangled_state_batch_result(bits, "ghz")
+
+    assert result["all_equal_percentage"] == 50.0
+    assert result["parity"] == {"even_percentage": 50.0, "odd_percentage": 50.0, "expectation": 0.0}
+    assert result["hamming_weights"] == {"0": 1, "1": 1, "2": 1, "3": 1}
+    assert result["one_percentages"] == [75.0, 50.0, 25.0]
+    # Agreeing pairs per shot: 3, 3, 1, 1 out of 3
+    assert result["pairwise_agreement"]["mean"] == round(8 / 12 * 100, 2)
+    assert result["pairwise_agreement"]["nearest_neighbour"] == [75.0, 75.0]
+    assert result["pairwise_agreement"]["matrix"][0] == [100.0, 75.0, 50.0]
+
+
+def test_wide_registers_skip_the_pairwise_matrix():
+    n = QuantumService.PAIRWISE_MATRIX_QUBITS + 1
+    bits = np.zeros((2, n), dtype=np.uint8)
+
+    result = QuantumService._entangled_state_batch_result(bits, "ghz")
+
+    assert "matrix" not in result["pairwise_agreement"]
+    assert len(result["pairwise_agreement"]["nearest_neighbour"]) == n - 1
+
+
+def test_seeded_batches_match_the_closed_form(service):
+    ghz = service.entangled_state_batch("ghz", n_qubits=MAX_ENTANGLED_QUBITS, shots=2000, seed=3)
+    w = service.entangled_state_batch("w", n_qubits=4, shots=2000, seed=3)
+
+    assert ghz["all_equal_percentage"] == ghz["expected"]["all_equal_percentage"] == 100.0
+    assert set(ghz["hamming_weights"]) == {"0", str(MAX_ENTANGLED_QUBITS)}
+    assert w["hamming_weights"] == {"1": 2000}
+    assert w["parity"]["odd_percentage"] == 100.0
+    assert w["expected"]["pairwise_agreement"] == 50.0
+    assert service.entangled_state_batch("ghz", n_qubits=5, shots=100, seed=3) == \
+        service.entangled_state_batch("ghz", n_qubits=5, shots=100, seed=3)
+
+
+@pytest.mark.parametrize("kind, n_qubits", [("cluster", 3), ("ghz", 1), ("w", MAX_ENTANGLED_QUBITS + 1)])
+def test_unknown_states_and_sizes_are_rejected(kind, n_qubits):
+    with pytest.raises(ValueError):
+        CircuitRegistry.entangled_key(kind, n_qubits)
+
+
+def test_bell_expectations_are_computed_from_the_circuits(service):
+    result = service.bell_state_batch("psi_minus", shots=100, seed=1)
+
+    assert result["expected_percentages"] == pytest.approx({"00": 0.0, "01": 50.0, "10": 50.0, "11": 0.0})
+    assert result["counts"]["00"] == result["counts"]["11"] == 0
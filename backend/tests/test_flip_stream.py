@@ -0,0 +1,149 @@
+import asyncio
+import json
+from contextlib import contextmanager
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from admission_control import AdmissionRejected
+from flip_stream import FRAME_INTERVAL, MAX_FLIP_RATE, FlipStreamServer, stream_key
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.runs = []
+
+    async def run_labeled(self, method, key, shots):
+        assert method == "sample_outcomes"
+        self.runs.append((key, shots))
+        return ["1"] * shots, {"simulation_method": "stabilizer"}
+
+
+class FakeAdmission:
+    """Sheds the first `rejections` batches, then admits everything."""
+
+    def __init__(self, rejections=0):
+        self.rejections = rejections
+
+    @contextmanager
+    def admit(self, client, shots):
+        if self.rejections:
+            self.rejections -= 1
+            raise AdmissionRejected(503, "Simulator is busy", 0.01)
+        yield
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        text = await self.incoming.get()
+        if text is None:
+            raise WebSocketDisconnect()
+        return text
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    def send(self, **message):
+        self.incoming.put_nowait(json.dumps(message))
+
+    def events(self, event):
+        return [message for message in self.sent if message["event"] == event]
+
+
+def run_session(script, admission=None):
+    """Serve one fake connection while script(websocket) talks to it; returns (server, websocket, executor)."""
+    executor = FakeExecutor()
+    server = FlipStreamServer(executor, admission or FakeAdmission())
+    websocket = FakeWebSocket()
+
+    async def main():
+        serving = asyncio.create_task(server.serve(websocket))
+        await script(websocket)
+        websocket.incoming.put_nowait(None)
+        await asyncio.wait_for(serving, 1)
+
+    asyncio.run(main())
+    return server, websocket, executor
+
+
+def test_sender_stops_a_window_ahead_of_the_last_ack():
+    observed = {}
+
+    async def script(websocket):
+        websocket.send(action="subscribe", circuit="coin", rate=MAX_FLIP_RATE, window=2)
+        await asyncio.sleep(10 * FRAME_INTERVAL)
+        observed["before_ack"] = len(websocket.events("outcomes"))
+        websocket.send(action="ack", frame=1)
+        await asyncio.sleep(10 * FRAME_INTERVAL)
+        observed["after_ack"] = len(websocket.events("outcomes"))
+
+    server, websocket, executor = run_session(script)
+
+    assert observed == {"before_ack": 2, "after_ack": 3}
+    frames = websocket.events("outcomes")
+    assert [frame["frame"] for frame in frames] == [1, 2, 3]
+    # A frame carries FRAME_INTERVAL worth of outcomes at the subscribed rate
+    assert all(len(frame["outcomes"]) == int(MAX_FLIP_RATE * FRAME_INTERVAL) for frame in frames)
+    assert frames[0]["simulation_method"] == "stabilizer"
+    assert server.stats()["frames"] == 3
+    assert server.stats()["open_connections"] == 0
+
+
+def test_paused_streams_send_nothing():
+    observed = {}
+
+    async def script(websocket):
+        websocket.send(action="subscribe", rate=MAX_FLIP_RATE, window=64)
+        await asyncio.sleep(2 * FRAME_INTERVAL)
+        websocket.send(action="pause")
+        await asyncio.sleep(FRAME_INTERVAL)
+        observed["paused"] = len(websocket.events("outcomes"))
+        await asyncio.sleep(4 * FRAME_INTERVAL)
+        observed["later"] = len(websocket.events("outcomes"))
+
+    _, websocket, _ = run_session(script)
+
+    assert observed["paused"] == observed["later"] > 0
+    assert websocket.events("paused")
+
+
+def test_shed_batches_are_reported_and_retried():
+    async def script(websocket):
+        websocket.send(action="subscribe", circuit="bell", state="psi_minus", rate=100)
+        await asyncio.sleep(4 * FRAME_INTERVAL)
+
+    _, websocket, executor = run_session(script, FakeAdmission(rejections=1))
+
+    assert websocket.events("throttled") == [{"event": "throttled", "detail": "Simulator is busy", "retry_after": 0.01}]
+    assert executor.runs[0] == (("bell", "psi_minus", None), 200)
+    assert websocket.events("outcomes")
+
+
+def test_invalid_messages_get_an_error_and_keep_the_connection():
+    async def script(websocket):
+        websocket.send(action="jump")
+        websocket.incoming.put_nowait("[1, 2]")
+        websocket.send(action="ack", frame="3")
+        websocket.send(action="subscribe", circuit="coin", state="triple")
+        await asyncio.sleep(FRAME_INTERVAL)
+
+    _, websocket, executor = run_session(script)
+
+    assert len(websocket.events("error")) == 4
+    assert executor.runs == []
+
+
+@pytest.mark.parametrize("message, key", [
+    ({}, ("coin", "single", None)),
+    ({"circuit": "bell"}, ("bell", "phi_plus", None)),
+    ({"circuit": "measure", "state": "biased_0", "basis": "x"}, ("measure", "biased_0", "x")),
+])
+def test_stream_keys(message, key):
+    assert stream_key(message) == key
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from load_test import LESSON_MIX, Sample, capacity, compare, pick, summarize_step
+
+
+def step(concurrency, rps, p95_ms, error_rate=0.0, endpoints=None):
+    return {"concurrency": concurrency, "rps": rps, "p95_ms": p95_ms, "error_rate": error_rate,
+            "endpoints": endpoints or {}}
+
+
+RAMP = [
+    step(1, 100.0, 10.0),
+    step(2, 190.0, 11.0),
+    step(4, 300.0, 20.0),
+    step(8, 320.0, 60.0),
+    step(16, 330.0, 200.0, error_rate=0.05),
+    step(32, 0.0, None, error_rate=1.0),
+]
+
+
+def test_summary_counts_statuses_and_times_only_successes():
+    samples = [Sample("GET /", 200, 0.010)] * 8 + [Sample("GET /", 503, 0.001), Sample("POST /api/x", 0, 5.0)]
+
+    summary = summarize_step(4, samples, wall_seconds=2.0)
+
+    assert summary["requests"] == 10
+    assert summary["rps"] == 4.0
+    assert summary["error_rate"] == 0.2
+    assert summary["shed"] == 1
+    assert summary["statuses"] == {"0": 1, "200": 8, "503": 1}
+    assert summary["p95_ms"] == pytest.approx(10.0)
+    assert summary["endpoints"]["GET /"] == {"requests": 9, "errors": 1, "p50_ms": 10.0, "p95_ms": 10.0,
+                                             "p99_ms": 10.0}
+    assert summary["endpoints"]["POST /api/x"]["p95_ms"] is None
+
+
+def test_sustainable_throughput_respects_the_slo():
+    result = capacity(RAMP, slo_ms=50.0, max_error_rate=0.01)
+
+    assert result["sustainable_rps"] == 300.0
+    assert result["sustainable_concurrency"] == 4
+    assert result["peak_rps"] == 330.0
+
+
+def test_a_looser_slo_still_excludes_steps_with_errors():
+    result = capacity(RAMP, slo_ms=500.0, max_error_rate=0.01)
+
+    assert result["sustainable_concurrency"] == 8
+
+
+def test_knee_has_the_best_throughput_per_latency():
+    result = capacity(RAMP, slo_ms=50.0, max_error_rate=0.01)
+
+    # rps / p95: 10, 17.3, 15, 5.3, 1.65
+    assert result["knee_concurrency"] == 2
+    assert result["knee_p95_ms"] == 11.0
+
+
+def test_no_step_within_the_slo_means_no_capacity():
+    result = capacity(RAMP, slo_ms=1.0, max_error_rate=0.0)
+
+    assert result["sustainable_rps"] == 0.0
+    assert result["sustainable_concurrency"] is None
+
+
+def report(sustainable_rps, p95_ms):
+    steps = [step(4, sustainable_rps, p95_ms, endpoints={"GET /": {"p95_ms": p95_ms}})]
+    return {"capacity": {"sustainable_rps": sustainable_rps}, "steps": steps}
+
+
+def test_compare_flags_a_drop_beyond_the_threshold():
+    baseline = report(300.0, 20.0)
+
+    slower = compare(report(200.0, 30.0), baseline, threshold=0.25)
+    assert slower["regressed"] is True
+    assert slower["sustainable_ratio"] == 0.667
+    assert slower["endpoint_p95_ratios"] == {"GET /": {"4": 1.5}}
+
+    assert compare(report(240.0, 25.0), baseline, threshold=0.25)["regressed"] is False
+
+
+def test_compare_skips_levels_the_baseline_did_not_run():
+    baseline = report(300.0, 20.0)
+    baseline["steps"][0]["concurrency"] = 8
+
+    assert compare(report(300.0, 20.0), baseline, threshold=0.25)["endpoint_p95_ratios"] == {}
+
+
+def test_the_mix_is_reproducible_and_covers_every_endpoint():
+    first, second = random.Random(3), random.Random(3)
+    assert [pick(first) for _ in range(20)] == [pick(second) for _ in range(20)]
+
+    rng = random.Random(0)
+    endpoints = {pick(rng).endpoint for _ in range(5000)}
+    assert endpoints == {make(random.Random(0)).endpoint for _, make in LESSON_MIX}
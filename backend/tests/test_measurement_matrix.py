@@ -0,0 +1,62 @@
+import pytest
+
+from quantum_service import QuantumService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = QuantumService("analytic")
+    jobs = []
+    counts_many = service.backend.counts_many
+
+    def recording_counts_many(keys, shots, seed=None):
+        jobs.append(list(keys))
+        return counts_many(keys, shots, seed)
+
+    monkeypatch.setattr(service.backend, "counts_many", recording_counts_many)
+    service.jobs = jobs
+    return service
+
+
+def test_whole_matrix_runs_as_one_job(service):
+    result = service.measure_qubit_matrix(shots=500)
+
+    assert len(service.jobs) == 1 and len(service.jobs[0]) == 15
+    assert result["circuits"] == 15
+    assert [(row["state"], row["basis"]) for row in result["measurements"][:3]] == [
+        ("equal", "z"), ("equal", "x"), ("equal", "y")
+    ]
+    assert all(sum(row["counts"]) == 500 for row in result["measurements"])
+    assert result["bell_states"] == []
+
+
+def test_rows_hold_counts_and_exact_probabilities(service):
+    result = service.measure_qubit_matrix(states=["definite_1", "biased_0"], bases=["z", "x"],
+                                          bell_states=["psi_minus"], shots=400)
+
+    rows = {(row["state"], row["basis"]): row for row in result["measurements"]}
+    assert rows["definite_1", "z"]["counts"] == [0, 400]
+    assert rows["definite_1", "z"]["expected_probabilities"] == [0.0, 1.0]
+    assert rows["definite_1", "x"]["expected_probabilities"] == [0.5, 0.5]
+    assert rows["biased_0", "z"]["expected_probabilities"] == [0.75, 0.25]
+
+    [bell] = result["bell_states"]
+    assert bell["state"] == "psi_minus"
+    assert bell["counts"][0] == bell["counts"][3] == 0
+    assert bell["expected_probabilities"] == [0.0, 0.5, 0.5, 0.0]
+    assert len(service.jobs) == 1 and len(service.jobs[0]) == 5
+
+
+def test_seeded_matrix_is_reproducible(service):
+    assert service.measure_qubit_matrix(shots=100, seed=3) == service.measure_qubit_matrix(shots=100, seed=3)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"states": ["sideways"]},
+    {"bases": ["w"]},
+    {"bell_states": ["phi_zero"]},
+    {"states": [], "bell_states": []},
+])
+def test_invalid_selections_are_rejected(service, kwargs):
+    with pytest.raises(ValueError):
+        service.measure_qubit_matrix(**kwargs)
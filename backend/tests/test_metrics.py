@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from metrics import ApiMetrics, Histogram, collect_labels, collect_phases, label_job, phase, shot_bucket
+
+
+class FakeResponse:
+    status_code = 200
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+def lines_of(metrics, name):
+    return [line for line in metrics.render().splitlines() if line.startswith(name)]
+
+
+@pytest.mark.parametrize("shots, bucket", [(None, "none"), (1, "1"), (2, "10"), (10_000, "10000"), (10**7, "+Inf")])
+def test_shot_bucket(shots, bucket):
+    assert shot_bucket(shots) == bucket
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = Histogram("latency_seconds", "Latency.", ("endpoint",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/api/x")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{endpoint="/api/x",le="0.1"} 1',
+        'latency_seconds_bucket{endpoint="/api/x",le="1"} 3',
+        'latency_seconds_bucket{endpoint="/api/x",le="+Inf"} 4',
+        'latency_seconds_sum{endpoint="/api/x"} 4.050000',
+        'latency_seconds_count{endpoint="/api/x"} 4',
+    ]
+
+
+def test_requests_are_counted_by_endpoint_and_status():
+    metrics = ApiMetrics()
+
+    async def main():
+        await metrics.track_request("/api/a", "POST", lambda: asyncio.sleep(0, FakeResponse()))
+        with pytest.raises(Unavailable):
+            async def fail():
+                raise Unavailable()
+            await metrics.track_request("/api/a", "POST", fail)
+
+    asyncio.run(main())
+
+    assert lines_of(metrics, "quantum_http_requests_total{") == [
+        'quantum_http_requests_total{endpoint="/api/a",method="POST",status="200"} 1',
+        'quantum_http_requests_total{endpoint="/api/a",method="POST",status="503"} 1',
+    ]
+    assert 'quantum_http_request_duration_seconds_count{endpoint="/api/a",phase="total"} 2' in metrics.render()
+    assert lines_of(metrics, "quantum_http_requests_in_flight ") == ["quantum_http_requests_in_flight 0"]
+
+
+def test_jobs_are_split_into_queue_and_worker_phases():
+    metrics = ApiMetrics()
+    phases = {"construct": 0.001, "simulate": 0.002, "postprocess": 0.001, "total": 0.004}
+
+    metrics.observe_job("bell_state_batch", "bell/phi_plus", 100, phases, round_trip=0.010)
+    metrics.observe_job("bell_state_batch", "bell/phi_plus", 100, None, round_trip=0.010)
+
+    jobs = lines_of(metrics, "quantum_jobs_total{")
+    assert len(jobs) == 2
+    assert 'status="ok"} 1' in jobs[0] + jobs[1] and 'status="error"} 1' in jobs[0] + jobs[1]
+    rendered = metrics.render()
+    for name in ("queue", "construct", "simulate", "postprocess"):
+        assert f'shots="100",phase="{name}"}} 1' in rendered
+    assert 'phase="queue"} 0.006000' in rendered
+
+
+def test_callback_metrics_are_read_at_scrape_time():
+    metrics = ApiMetrics()
+    value = [1]
+    metrics.add_gauge("quantum_things", "Things.", lambda: value[0])
+    metrics.add_counter("quantum_hits_total", "Hits.", lambda: 2 * value[0])
+    value[0] = 5
+
+    rendered = metrics.render()
+
+    assert "# TYPE quantum_things gauge\nquantum_things 5\n" in rendered
+    assert "# TYPE quantum_hits_total counter\nquantum_hits_total 10\n" in rendered
+
+
+def test_label_values_are_escaped():
+    metrics = ApiMetrics()
+    metrics.requests.inc('/api/"x"\n', "GET", "200")
+
+    assert 'endpoint="/api/\\"x\\"\\n"' in metrics.render()
+
+
+def test_phases_and_labels_are_collected_per_job():
+    with collect_phases() as timings, collect_labels() as labels:
+        with phase("simulate"):
+            pass
+        label_job("simulation_method", "stabilizer")
+
+    assert set(timings) == {"simulate", "postprocess", "total"}
+    assert timings["total"] >= timings["simulate"]
+    assert labels == {"simulation_method": "stabilizer"}
+    # Outside a job, phases and labels go nowhere
+    label_job("simulation_method", "statevector")
+    assert labels == {"simulation_method": "stabilizer"}
+
+
+def test_metrics_endpoint_counts_requests_by_route_template():
+    import httpx
+    import main
+
+    async def scrape():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = await client.get("/metrics")
+            await client.get("/health/live")
+            await client.get("/api/diagrams/nope")
+            return before, await client.get("/metrics")
+
+    before, after = asyncio.run(scrape())
+
+    def value(response, series):
+        matches = [line for line in response.text.splitlines() if line.startswith(series + " ")]
+        return float(matches[0].split()[-1]) if matches else 0.0
+
+    assert after.headers["content-type"].startswith("text/plain; version=0.0.4")
+    live = 'quantum_http_requests_total{endpoint="/health/live",method="GET",status="200"}'
+    assert value(after, live) == value(before, live) + 1
+    # Path parameters are labeled by their template, not the requested path
+    diagram = 'quantum_http_requests_total{endpoint="/api/diagrams/{name}",method="GET",status="503"}'
+    assert value(after, diagram) == value(before, diagram) + 1
+    assert "# TYPE quantum_simulation_jobs_in_flight gauge" in after.text
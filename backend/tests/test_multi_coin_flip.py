@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from circuit_registry import MAX_COIN_QUBITS, CircuitRegistry
+from quantum_service import QuantumService
+
+
+def test_counts_are_aggregated_by_outcome_with_coin_1_first():
+    # Columns are coins 1..3
+    bits = np.array([[1, 0, 0], [1, 0, 0], [0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+
+    result = QuantumService._multi_coin_flip_batch_result(bits)
+
+    assert result["representation"] == "dense"
+    assert len(result["counts"]) == 8
+    assert {label: count for label, count in result["counts"].items() if count} == {"100": 2, "001": 1, "111": 1}
+    assert result["distinct_outcomes"] == 3
+    assert result["percentages"]["100"] == 50.0
+    assert result["marginals"] == {"ones": [3, 1, 2], "one_percentages": [75.0, 25.0, 50.0]}
+    assert result["theoretical_probability"] == 12.5
+
+
+def test_wide_registers_list_only_observed_outcomes():
+    n = QuantumService.DENSE_COUNT_QUBITS + 1
+    bits = np.zeros((3, n), dtype=np.uint8)
+    bits[0, -1] = 1
+
+    result = QuantumService._multi_coin_flip_batch_result(bits)
+
+    assert result["representation"] == "sparse"
+    assert result["counts"] == {"0" * n: 2, "0" * (n - 1) + "1": 1}
+
+
+def test_63_coins_fit_the_integer_index():
+    bits = np.ones((2, MAX_COIN_QUBITS), dtype=np.uint8)
+
+    result = QuantumService._multi_coin_flip_batch_result(bits)
+
+    assert result["counts"] == {"1" * MAX_COIN_QUBITS: 2}
+    assert result["marginals"]["ones"] == [2] * MAX_COIN_QUBITS
+
+
+def test_multi_coin_flip_batch_samples_fair_coins():
+    service = QuantumService("analytic")
+
+    result = service.multi_coin_flip_batch(n_qubits=4, shots=4000)
+
+    assert result["n_qubits"] == 4 and result["total_shots"] == 4000
+    assert sum(result["counts"].values()) == 4000
+    for percentage in result["marginals"]["one_percentages"]:
+        assert percentage == pytest.approx(50, abs=5)
+
+
+@pytest.mark.parametrize("n_qubits", [0, MAX_COIN_QUBITS + 1])
+def test_coin_count_is_validated(n_qubits):
+    with pytest.raises(ValueError):
+        CircuitRegistry.multi_coin_key(n_qubits)
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from outcome_reservoir import OutcomeReservoir
+
+
+class FakeSampler:
+    """Hands out numbered outcomes so draws can be traced back to their refill."""
+
+    def __init__(self):
+        self.calls = []
+        self.next = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, key, shots):
+        with self.lock:
+            self.calls.append((key, shots))
+            outcomes = [str(self.next + i) for i in range(shots)]
+            self.next += shots
+        return outcomes
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "background refill did not finish"
+        time.sleep(0.005)
+
+
+def test_first_draw_is_one_shot_and_the_buffer_fills_in_background():
+    sampler = FakeSampler()
+    reservoir = OutcomeReservoir(sampler, capacity=10, low_water=2)
+
+    assert reservoir.draw(("coin", 1)) in {"0", "10"}
+
+    wait_for(lambda: reservoir.stats() == {"coin/1": 10})
+    assert sorted(sampler.calls) == [(("coin", 1), 1), (("coin", 1), 10)]
+    drawn = [reservoir.draw(("coin", 1)) for _ in range(3)]
+    assert len(sampler.calls) == 2
+    assert len(set(drawn)) == 3
+
+
+def test_fill_buffers_capacity_per_key():
+    sampler = FakeSampler()
+    reservoir = OutcomeReservoir(sampler, capacity=5, low_water=1)
+
+    reservoir.fill(("coin", 1))
+    reservoir.fill(("bell", 2))
+    reservoir.fill(("coin", 1))  # Already full
+    assert sampler.calls == [(("coin", 1), 5), (("bell", 2), 5)]
+    assert reservoir.stats() == {"coin/1": 5, "bell/2": 5}
+
+    assert [reservoir.draw(("coin", 1)) for _ in range(2)] == ["0", "1"]
+    assert reservoir.draw(("bell", 2)) == "5"
+
+
+def test_dropping_below_low_water_refills_to_capacity_in_background():
+    sampler = FakeSampler()
+    reservoir = OutcomeReservoir(sampler, capacity=10, low_water=5)
+    reservoir.fill(("coin", 1))
+
+    drawn = [reservoir.draw(("coin", 1)) for _ in range(6)]
+    assert drawn == ["0", "1", "2", "3", "4", "5"]
+
+    wait_for(lambda: len(sampler.calls) == 2 and reservoir.stats()["coin/1"] == 10)
+    assert sampler.calls[1] == (("coin", 1), 6)
+    # Buffered outcomes are served before the refill
+    assert reservoir.draw(("coin", 1)) == "6"
+
+
+def test_drained_buffer_does_not_wait_for_the_refill():
+    release = threading.Event()
+
+    class SlowSampler(FakeSampler):
+        def __call__(self, key, shots):
+            if shots > 1:
+                release.wait(5)
+            return super().__call__(key, shots)
+
+    sampler = SlowSampler()
+    reservoir = OutcomeReservoir(sampler, capacity=50, low_water=0)
+
+    # While the refill is stuck, every draw is a one-shot run, and only one refill is queued
+    assert [reservoir.draw("k") for _ in range(3)] == ["0", "1", "2"]
+    assert sampler.calls == [("k", 1)] * 3
+    release.set()
+    wait_for(lambda: reservoir.stats() == {"k": 50})
+    assert sampler.calls[3:] == [("k", 50)]
+
+
+@pytest.mark.parametrize("low_water", [-1, 10, 11])
+def test_low_water_must_be_below_capacity(low_water):
+    with pytest.raises(ValueError):
+        OutcomeReservoir(FakeSampler(), capacity=10, low_water=low_water)
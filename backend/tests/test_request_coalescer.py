@@ -0,0 +1,216 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from circuit_registry import CircuitRegistry
+from quantum_service import QuantumService
+from request_coalescer import CoalesceInfo, RequestCoalescer
+
+SINGLE = CircuitRegistry.coin_key("single")
+DOUBLE = CircuitRegistry.coin_key("double")
+
+
+class ScriptedBackend:
+    """Backend whose per-shot memory is a fixed script, consumed in order."""
+
+    def __init__(self, outcomes):
+        self.outcomes = iter(outcomes)
+        self.memory_calls = []
+        self.counts_calls = []
+
+    def simulation_method(self, key):
+        return "scripted"
+
+    def memory(self, key, shots, seed=None):
+        self.memory_calls.append((key, shots))
+        return [next(self.outcomes) for _ in range(shots)]
+
+    def counts(self, key, shots, seed=None):
+        self.counts_calls.append((key, shots))
+        return dict(Counter(self.memory(key, shots, seed)))
+
+
+def scripted_service(outcomes, reservoir_capacity=4, filled=()):
+    service = QuantumService("analytic", reservoir_capacity=reservoir_capacity, reservoir_low_water=0)
+    service._backend = ScriptedBackend(outcomes)
+    for key in filled:
+        service.reservoir.fill(key)
+    return service
+
+
+class ServiceExecutor:
+    """Runs jobs inline on a service, recording the calls it receives."""
+
+    def __init__(self, service):
+        self.service = service
+        self.jobs = []
+
+    async def run_labeled(self, method, *args):
+        self.jobs.append((method, args))
+        return getattr(self.service, method)(*args), {"simulation_method": "scripted"}
+
+
+# ==================== QuantumService.run_coalesced ====================
+
+def test_run_coalesced_splits_one_memory_run_between_callers():
+    # Reservoir fill (capacity 4) first, then the shared run of 4 + 6 shots
+    service = scripted_service(["1", "0", "0", "0"] + ["0"] * 4 + ["1"] * 6, filled=[SINGLE])
+
+    results = service.run_coalesced([
+        ("quantum_coin_flip_batch", (4,)),
+        ("quantum_coin_flip", ()),
+        ("quantum_coin_flip_batch", (6,)),
+    ])
+
+    assert service.backend.memory_calls == [(SINGLE, 4), (SINGLE, 10)]
+    assert results[0]["total_shots"] == 4 and results[0]["zeros"] == 4 and results[0]["ones"] == 0
+    assert results[1] == 1
+    assert results[2]["total_shots"] == 6 and results[2]["zeros"] == 0 and results[2]["ones"] == 6
+
+
+def test_run_coalesced_serves_single_shots_from_the_reservoir():
+    service = scripted_service(["1", "0", "1", "1"], filled=[SINGLE])
+
+    results = service.run_coalesced([("quantum_coin_flip", ())] * 3)
+
+    assert results == [1, 0, 1]
+    assert service.backend.memory_calls == [(SINGLE, 4)]
+    assert service.reservoir.stats() == {"coin/single": 1}
+
+
+def test_run_coalesced_runs_a_lone_batch_through_counts():
+    service = scripted_service(["0"] * 3 + ["1"] * 2)
+
+    [result] = service.run_coalesced([("quantum_coin_flip_batch", (5,))])
+
+    assert service.backend.counts_calls == [(SINGLE, 5)]
+    assert result["zeros"] == 3 and result["ones"] == 2
+
+
+def test_run_coalesced_rejects_calls_for_different_circuits():
+    service = scripted_service([])
+
+    with pytest.raises(ValueError):
+        service.run_coalesced([("quantum_coin_flip_batch", (2,)), ("double_coin_flip_batch", (2,))])
+
+
+# ==================== RequestCoalescer ====================
+
+def test_concurrent_requests_share_one_job_and_get_their_own_slice():
+    service = scripted_service(["0"] * 2 + ["1"] * 3)
+    executor = ServiceExecutor(service)
+    coalescer = RequestCoalescer(executor, window_ms=5)
+
+    async def main():
+        return await asyncio.gather(
+            coalescer.call("quantum_coin_flip_batch", 2),
+            coalescer.call("quantum_coin_flip_batch", 3),
+        )
+
+    (first, first_info), (second, second_info) = asyncio.run(main())
+
+    assert executor.jobs == [
+        ("run_coalesced", ([("quantum_coin_flip_batch", (2,)), ("quantum_coin_flip_batch", (3,))],))
+    ]
+    assert (first["zeros"], first["ones"]) == (2, 0)
+    assert (second["zeros"], second["ones"]) == (0, 3)
+    assert first_info == second_info
+    assert first_info.merged_requests == 2 and first_info.simulation_method == "scripted"
+    assert coalescer.stats()["requests_per_job"] == 2.0
+
+
+def test_a_lone_request_runs_its_own_method():
+    executor = ServiceExecutor(scripted_service(["1"] * 4))
+    coalescer = RequestCoalescer(executor, window_ms=1)
+
+    result, info = asyncio.run(coalescer.call("quantum_coin_flip_batch", 4))
+
+    assert executor.jobs == [("quantum_coin_flip_batch", (4,))]
+    assert result["ones"] == 4
+    assert info.merged_requests == 1
+
+
+def test_requests_for_different_circuits_are_not_merged():
+    executor = ServiceExecutor(scripted_service(["0"] * 4 + ["00"] * 4))
+    coalescer = RequestCoalescer(executor, window_ms=5)
+
+    async def main():
+        return await asyncio.gather(
+            coalescer.call("quantum_coin_flip_batch", 4),
+            coalescer.call("double_coin_flip_batch", 4),
+        )
+
+    asyncio.run(main())
+
+    assert sorted(method for method, _ in executor.jobs) == ["double_coin_flip_batch", "quantum_coin_flip_batch"]
+    assert executor.service.backend.counts_calls == [(SINGLE, 4), (DOUBLE, 4)]
+
+
+def test_a_full_batch_is_sent_before_its_window_closes():
+    executor = ServiceExecutor(scripted_service(["0"] * 8))
+    coalescer = RequestCoalescer(executor, window_ms=5, max_batch_shots=5)
+
+    async def main():
+        return await asyncio.gather(*(coalescer.call("quantum_coin_flip_batch", 2) for _ in range(4)))
+
+    results = asyncio.run(main())
+
+    assert [len(args[0]) for method, args in executor.jobs] == [2, 2]
+    assert [info.merged_requests for _, info in results] == [2, 2, 2, 2]
+
+
+def test_zero_window_calls_straight_through():
+    executor = ServiceExecutor(scripted_service(["1"] * 3))
+    coalescer = RequestCoalescer(executor, window_ms=0)
+
+    result, info = asyncio.run(coalescer.call("quantum_coin_flip_batch", 3))
+
+    assert executor.jobs == [("quantum_coin_flip_batch", (3,))]
+    assert info == CoalesceInfo(1, 0.0, "scripted")
+
+
+def test_a_failed_job_fails_every_caller():
+    class FailingExecutor:
+        async def run_labeled(self, method, *args):
+            raise RuntimeError("simulator crashed")
+
+    coalescer = RequestCoalescer(FailingExecutor(), window_ms=5)
+
+    async def main():
+        return await asyncio.gather(
+            coalescer.call("quantum_coin_flip_batch", 2),
+            coalescer.call("quantum_coin_flip_batch", 3),
+            return_exceptions=True,
+        )
+
+    assert [str(error) for error in asyncio.run(main())] == ["simulator crashed"] * 2
+
+
+def test_running_batches_are_referenced_until_they_finish():
+    class GatedExecutor(ServiceExecutor):
+        async def run_labeled(self, method, *args):
+            await gate.wait()
+            return await super().run_labeled(method, *args)
+
+    executor = GatedExecutor(scripted_service(["1"] * 5))
+    coalescer = RequestCoalescer(executor, window_ms=1)
+    gate = None
+    observed = {}
+
+    async def main():
+        nonlocal gate
+        gate = asyncio.Event()
+        calls = asyncio.gather(*(coalescer.call("quantum_coin_flip_batch", shots) for shots in (2, 3)))
+        await asyncio.sleep(0.01)
+        # The window has closed and the job is waiting on the executor: only the coalescer holds its task
+        observed["running"] = len(coalescer._tasks)
+        gate.set()
+        await calls
+        await asyncio.sleep(0)
+        observed["done"] = len(coalescer._tasks)
+
+    asyncio.run(main())
+
+    assert observed == {"running": 1, "done": 0}
+    assert len(executor.jobs) == 1
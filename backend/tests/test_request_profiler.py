@@ -0,0 +1,90 @@
+import asyncio
+import os
+import pstats
+
+import httpx
+import pytest
+
+from request_profiler import RequestProfiler, profile_call
+
+TOKEN = "s3cret"
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def get(profiler, url, headers=None):
+    async def main():
+        transport = httpx.ASGITransport(app=profiler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(url, headers=headers)
+    return asyncio.run(main())
+
+
+def profiles(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".prof"))
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return RequestProfiler(app, str(tmp_path), token=TOKEN)
+
+
+@pytest.mark.parametrize("url, headers", [
+    ("/api/x", None),
+    ("/api/x", {"X-Profile": "1"}),
+    ("/api/x", {"X-Profile": TOKEN + "x"}),
+    ("/api/x?profile=guess", None),
+])
+def test_requests_without_the_token_are_not_profiled(profiler, tmp_path, url, headers):
+    response = get(profiler, url, headers)
+
+    assert response.status_code == 200
+    assert "x-profile" not in response.headers
+    assert profiles(tmp_path) == []
+
+
+@pytest.mark.parametrize("url, headers", [
+    ("/api/quantum-coin-flip", {"X-Profile": TOKEN}),
+    (f"/api/quantum-coin-flip?profile={TOKEN}", None),
+])
+def test_the_token_profiles_a_request(profiler, tmp_path, url, headers):
+    response = get(profiler, url, headers)
+
+    name = response.headers["x-profile"]
+    assert response.text == "ok"
+    assert name.endswith("-GET-api_quantum_coin_flip.prof")
+    assert profiles(tmp_path) == [name]
+    pstats.Stats(str(tmp_path / name))
+
+
+def test_sampled_requests_are_profiled_without_a_token(tmp_path):
+    profiler = RequestProfiler(app, str(tmp_path), sample_rate=1.0)
+
+    assert "x-profile" in get(profiler, "/").headers
+    assert profiles(tmp_path)[0].endswith("-GET-root.prof")
+
+
+def test_profiles_beyond_max_files_are_deleted(tmp_path):
+    profiler = RequestProfiler(app, str(tmp_path), sample_rate=1.0, max_files=2)
+
+    for i in range(4):
+        get(profiler, f"/step/{i}")
+
+    assert len(profiles(tmp_path)) == 2
+
+
+def test_worker_profiles_are_returned_with_the_result():
+    result, stats = profile_call(lambda: sum(range(100)))
+
+    assert result == 4950
+    assert any(function == "<lambda>" for _, _, function in stats)
+
+
+def test_without_a_token_the_header_is_ignored(tmp_path):
+    profiler = RequestProfiler(app, str(tmp_path))
+
+    assert "x-profile" not in get(profiler, "/?profile=1", {"X-Profile": "1"}).headers
+    assert profiles(tmp_path) == []
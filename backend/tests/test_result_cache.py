@@ -0,0 +1,119 @@
+import pytest
+
+import result_cache
+from result_cache import ResultCache, estimate_size
+
+# estimate_size() of each value: 100 bytes
+VALUE = "x" * 52
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_estimate_size():
+    assert estimate_size(VALUE) == 100
+    assert estimate_size(3) == 28
+    assert estimate_size({"a": 1}) == 64 + 49 + 28
+    assert estimate_size([1, 2]) == 56 + 2 * (8 + 28)
+
+
+def test_get_returns_what_was_put_and_counts_hits_and_misses():
+    cache = ResultCache(max_bytes=1000)
+
+    assert cache.get("a") is None
+    cache.put("a", VALUE)
+    assert cache.get("a") == VALUE
+    assert cache.get("a") == VALUE
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.6667)
+    assert (stats["entries"], stats["bytes"]) == (1, 100)
+
+
+def test_least_recently_used_entry_is_evicted_when_over_budget():
+    cache = ResultCache(max_bytes=300)
+    for key in "abc":
+        cache.put(key, VALUE)
+    cache.get("a")  # b is now the least recently used
+
+    cache.put("d", VALUE)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) == VALUE for key in "acd")
+    assert cache.evictions == 1
+    assert (len(cache), cache.bytes) == (3, 300)
+
+
+def test_one_large_entry_can_evict_several():
+    cache = ResultCache(max_bytes=300)
+    for key in "abc":
+        cache.put(key, VALUE)
+
+    cache.put("big", "x" * 152)  # 200 bytes
+
+    assert [key for key in "abc" if cache.get(key) is not None] == ["c"]
+    assert cache.evictions == 2
+    assert cache.bytes == 300
+
+
+def test_replacing_a_key_does_not_double_count_it():
+    cache = ResultCache(max_bytes=300)
+    cache.put("a", VALUE)
+    cache.put("a", "y" * 52)
+
+    assert cache.get("a") == "y" * 52
+    assert (len(cache), cache.bytes) == (1, 100)
+
+
+def test_values_larger_than_the_budget_are_not_cached():
+    cache = ResultCache(max_bytes=300)
+    cache.put("a", VALUE)
+
+    cache.put("huge", "x" * 1000)
+
+    assert cache.get("huge") is None
+    assert cache.get("a") == VALUE
+    assert cache.evictions == 0
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(max_bytes=1000, ttl=10)
+    cache.put("a", VALUE)
+
+    clock.now += 9.9
+    assert cache.get("a") == VALUE
+    clock.now += 0.1
+    assert cache.get("a") is None
+
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 1, 1)
+    assert (len(cache), cache.bytes) == (0, 0)
+
+
+def test_putting_again_restarts_the_ttl(clock):
+    cache = ResultCache(max_bytes=1000, ttl=10)
+    cache.put("a", VALUE)
+    clock.now += 8
+    cache.put("a", VALUE)
+    clock.now += 8
+
+    assert cache.get("a") == VALUE
+
+
+def test_zero_budget_disables_the_cache():
+    cache = ResultCache(max_bytes=0)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
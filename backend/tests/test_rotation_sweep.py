@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from quantum_service import QuantumService
+
+THETAS = np.linspace(0, 2 * np.pi, 9)
+
+
+@pytest.fixture(scope="module")
+def service():
+    return QuantumService("analytic")
+
+
+def test_z_basis_follows_the_born_rule(service):
+    result = service.measure_qubit_sweep(THETAS.tolist(), exact=True)
+
+    assert result["points"] == 9
+    assert result["swept"] == ["theta"]
+    assert result["angles"]["phi"] == 0.0
+    assert result["expected_probabilities"]["0"] == pytest.approx(np.cos(THETAS / 2) ** 2, abs=1e-6)
+    assert result["expected_probabilities"]["1"] == pytest.approx(np.sin(THETAS / 2) ** 2, abs=1e-6)
+    assert "counts" not in result
+
+
+def test_x_and_y_bases_see_the_phase(service):
+    phis = np.linspace(0, 2 * np.pi, 7)
+
+    x = service.measure_qubit_sweep(np.pi / 2, phis.tolist(), basis="x", exact=True)
+    y = service.measure_qubit_sweep(np.pi / 2, phis.tolist(), basis="y", exact=True)
+
+    # On the equator P(+) = (1 + cos φ)/2 and P(+i) = (1 + sin φ)/2
+    assert x["expected_probabilities"]["0"] == pytest.approx((1 + np.cos(phis)) / 2, abs=1e-6)
+    assert y["expected_probabilities"]["0"] == pytest.approx((1 + np.sin(phis)) / 2, abs=1e-6)
+
+
+def test_custom_axis_depends_on_the_angle_between_state_and_axis(service):
+    axes = THETAS.tolist()
+
+    result = service.measure_qubit_sweep(np.pi / 3, basis="custom", basis_theta=axes, exact=True)
+
+    assert result["swept"] == ["basis_theta"]
+    assert result["expected_probabilities"]["0"] == pytest.approx(np.cos((np.pi / 3 - THETAS) / 2) ** 2, abs=1e-6)
+
+
+def test_sampled_points_track_the_curve(service):
+    result = service.measure_qubit_sweep(THETAS.tolist(), shots=20_000, seed=5)
+
+    assert result["shots_per_point"] == 20_000
+    assert [z + o for z, o in zip(result["counts"]["0"], result["counts"]["1"])] == [20_000] * 9
+    assert result["max_abs_deviation"] < 0.02
+    assert result == service.measure_qubit_sweep(THETAS.tolist(), shots=20_000, seed=5)
+
+
+def test_sweep_size_limits(service):
+    QuantumService._sweep_bindings([0.0] * QuantumService.MAX_SWEEP_POINTS)
+    with pytest.raises(ValueError, match="between 1 and"):
+        QuantumService._sweep_bindings([0.0] * (QuantumService.MAX_SWEEP_POINTS + 1))
+    with pytest.raises(ValueError, match="between 1 and"):
+        QuantumService._sweep_bindings([])
+
+    shots = QuantumService.MAX_SWEEP_SHOTS // 10
+    with pytest.raises(ValueError, match="points × shots"):
+        service.measure_qubit_sweep([0.0] * 11, shots=shots)
+    # The exact curve draws no shots, so it is not limited by them
+    assert service.measure_qubit_sweep([0.0] * 11, shots=shots, exact=True)["points"] == 11
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"theta": [0.0, 1.0], "phi": [0.0]}, "same number"),
+    ({"theta": 0.0, "basis": "w"}, "Unknown basis"),
+    ({"theta": 0.0, "basis": "z", "basis_theta": 1.0}, "basis='custom'"),
+    ({"theta": [0.0, float("nan")]}, "finite"),
+])
+def test_invalid_sweeps_are_rejected(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        QuantumService._sweep_bindings(**kwargs)
@@ -0,0 +1,59 @@
+import pytest
+
+from circuit_registry import BELL_STATES, COIN_CIRCUITS, MEASUREMENT_BASES, STATE_PREPARATIONS, CircuitRegistry
+from sampling_backends import AnalyticBackend, AerBackend, create_backend
+
+SHOTS = 100_000
+# About six standard errors of a frequency at this many shots
+TOLERANCE = 0.01
+
+KEYS = (
+    [CircuitRegistry.coin_key(name) for name in COIN_CIRCUITS]
+    + [CircuitRegistry.bell_key(state) for state in BELL_STATES]
+    + [CircuitRegistry.measure_key(state, basis) for state in STATE_PREPARATIONS for basis in MEASUREMENT_BASES]
+)
+
+
+def key_id(key):
+    return "/".join(part for part in key if part is not None)
+
+
+@pytest.fixture(scope="module")
+def aer():
+    return AerBackend()
+
+
+@pytest.fixture(scope="module")
+def analytic():
+    return AnalyticBackend(seed=1)
+
+
+@pytest.mark.parametrize("key", KEYS, ids=key_id)
+def test_analytic_distribution_matches_aer(aer, analytic, key):
+    probabilities, labels = analytic._distribution(key)
+    counts = aer.counts(key, SHOTS)
+
+    assert set(counts) <= set(labels)
+    for label, probability in zip(labels, probabilities):
+        assert counts.get(label, 0) / SHOTS == pytest.approx(probability, abs=TOLERANCE), label
+
+
+@pytest.mark.parametrize("key", KEYS, ids=key_id)
+def test_analytic_samples_follow_their_distribution(analytic, key):
+    probabilities, labels = analytic._distribution(key)
+    counts = analytic.counts(key, SHOTS)
+
+    assert sum(counts.values()) == SHOTS
+    for label, probability in zip(labels, probabilities):
+        assert counts.get(label, 0) / SHOTS == pytest.approx(probability, abs=TOLERANCE), label
+
+
+def test_analytic_memory_uses_qiskit_bit_order(analytic):
+    # psi_plus only ever gives 01 or 10, phi_plus 00 or 11
+    assert set(analytic.memory(CircuitRegistry.bell_key("psi_plus"), 200)) == {"01", "10"}
+    assert set(analytic.memory(CircuitRegistry.bell_key("phi_plus"), 200)) == {"00", "11"}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("photonic")
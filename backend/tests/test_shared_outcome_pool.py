@@ -0,0 +1,145 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from shared_outcome_pool import SharedOutcomePool
+
+SINGLE = ("coin", "single", None)
+DOUBLE = ("coin", "double", None)
+
+
+class Sampler:
+    """Outcome indices counting up, per key index, so the draw order can be checked."""
+
+    def __init__(self):
+        self.calls = []
+        self.next = {}
+
+    def __call__(self, k, shots):
+        self.calls.append((k, shots))
+        start = self.next.get(k, 0)
+        self.next[k] = start + shots
+        return (np.arange(start, start + shots) % 4).astype(np.uint8)
+
+
+@pytest.fixture
+def pool():
+    pool = SharedOutcomePool.create(slots=2, capacity=4)
+    yield pool
+    pool.close()
+
+
+def test_draw_returns_none_until_a_slot_is_claimed_and_filled(pool):
+    assert pool.draw(SINGLE) is None
+    assert pool.claim() == 0
+    assert pool.draw(SINGLE) is None
+    assert pool.draw(("coin", "unknown", None)) is None
+    assert (pool.hits, pool.misses) == (0, 1)
+
+
+def test_refill_fills_claimed_slots_and_draws_decode_to_bitstrings(pool):
+    pool.claim()
+    sampler = Sampler()
+
+    written = pool.refill(sampler)
+
+    # Every key of the one claimed slot is filled to capacity, one run per key
+    assert written == 4 * len(pool.keys)
+    assert sampler.calls == [(k, 4) for k in range(len(pool.keys))]
+    assert pool.fill_levels()["coin/double"] == 4
+    k = pool.keys.index(DOUBLE)
+    # Outcome index bit i is classical bit i, Qiskit strings end with bit 0
+    assert [pool.draw(DOUBLE) for _ in range(4)] == ["00", "01", "10", "11"]
+    assert pool.draw(DOUBLE) is None
+    assert pool.fill_levels()["coin/double"] == 0
+    assert sampler.next[k] == 4
+
+
+def test_rings_are_topped_up_below_low_water_and_wrap_around(pool):
+    pool.claim()
+    sampler = Sampler()
+    pool.refill(sampler)
+
+    assert [pool.draw(DOUBLE) for _ in range(2)] == ["00", "01"]
+    # Half full is not below low_water (capacity // 2)
+    assert pool.refill(sampler) == 0
+    pool.draw(DOUBLE)
+    assert pool.refill(sampler) == 3
+
+    # The new outcomes wrap around the ring after the unread one
+    assert [pool.draw(DOUBLE) for _ in range(4)] == ["11", "00", "01", "10"]
+    assert pool.draw(DOUBLE) is None
+
+
+def test_write_never_overwrites_unread_outcomes(pool):
+    slot = pool.claim()
+    k = pool.keys.index(SINGLE)
+    pool._write(slot, k, np.array([1, 1, 1], dtype=np.uint8))
+
+    pool._write(slot, k, np.array([0, 0, 0], dtype=np.uint8))
+
+    assert [pool.draw(SINGLE) for _ in range(5)] == ["1", "1", "1", "0", None]
+
+
+def test_draw_waits_for_an_outcome_whose_counter_is_visible_first(pool):
+    slot = pool.claim()
+    k = pool.keys.index(DOUBLE)
+
+    # As a weakly ordered CPU may show it: the write counter before the outcome
+    pool._written[slot, k, 0] = 1
+    assert pool.draw(DOUBLE) is None
+    assert pool._read[slot, k, 0] == 0
+
+    pool._written[slot, k, 0] = 0
+    pool._write(slot, k, np.array([2, 3, 0, 1], dtype=np.uint8))
+    assert [pool.draw(DOUBLE) for _ in range(4)] == ["10", "11", "00", "01"]
+    # Second lap: the ring still holds the first lap's outcomes
+    pool._written[slot, k, 0] = 5
+    assert pool.draw(DOUBLE) is None
+    assert pool.misses == 2
+
+    pool._written[slot, k, 0] = 4
+    pool._write(slot, k, np.array([3], dtype=np.uint8))
+    assert pool.draw(DOUBLE) == "11"
+
+
+def test_attached_handles_share_the_rings(pool):
+    other = SharedOutcomePool.attach(pool.name)
+    try:
+        other.claim()
+        pool.refill(Sampler())
+        assert other.draw(DOUBLE) == "00"
+        assert pool.stats()["workers"] == 1
+    finally:
+        other.close()
+    # Closing a worker's handle frees its slot
+    assert pool.stats()["workers"] == 0
+
+
+def test_claim_skips_live_owners_and_fails_when_full(pool):
+    pool._owners[0, 0] = os.getppid()
+    assert pool.claim() == 1
+
+    pool._owners[1, 0] = os.getppid()
+    pool.slot = None
+    with pytest.raises(RuntimeError):
+        pool.claim()
+
+
+def test_attach_rejects_other_shared_memory():
+    block = shared_memory.SharedMemory(create=True, size=64)
+    try:
+        with pytest.raises(ValueError):
+            SharedOutcomePool.attach(block.name)
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_create_validates_its_size():
+    with pytest.raises(ValueError):
+        SharedOutcomePool.create(slots=0)
+    with pytest.raises(ValueError):
+        SharedOutcomePool.create(slots=1, capacity=1)
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from shot_streaming import FIRST_CHUNK_SIZE, stream_counts
+
+KEY = ("coin", "single", None)
+
+
+class FakeExecutor:
+    """Every shot comes out "0"; records the (shots, seed) of each chunk."""
+
+    def __init__(self):
+        self.chunks = []
+
+    async def run(self, method, key):
+        assert method == "expected_distribution"
+        return {"0": 0.5, "1": 0.5}
+
+    async def run_labeled(self, method, key, shots, seed):
+        assert method == "sample_counts"
+        self.chunks.append((shots, seed))
+        return {"0": shots}, {"simulation_method": "stabilizer"}
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after=None):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.disconnect_after is not None and self.checks > self.disconnect_after
+
+
+def collect(executor, request, total_shots, chunk_size, seed=None):
+    async def main():
+        return [json.loads(line) async for line in stream_counts(executor, request, KEY, total_shots, chunk_size, seed)]
+    return asyncio.run(main())
+
+
+def test_stream_starts_small_and_doubles_up_to_the_chunk_size():
+    executor = FakeExecutor()
+
+    lines = collect(executor, FakeRequest(), 20_000, 4_000)
+
+    assert [shots for shots, _ in executor.chunks] == [FIRST_CHUNK_SIZE, 2000, 4000, 4000, 4000, 4000, 1000]
+    assert lines[0] == {
+        "event": "start", "total_shots": 20_000, "chunk_size": 4_000,
+        "expected_percentages": {"0": 50.0, "1": 50.0},
+    }
+    assert [line["event"] for line in lines[1:]] == ["chunk"] * 6 + ["done"]
+    assert [line["shots_done"] for line in lines[1:]] == [1000, 3000, 7000, 11000, 15000, 19000, 20000]
+
+
+def test_chunks_carry_running_statistics():
+    lines = collect(FakeExecutor(), FakeRequest(), 3000, 2000)
+
+    done = lines[-1]
+    assert done["counts"] == {"0": 3000, "1": 0}
+    assert done["percentages"] == {"0": 100.0, "1": 0.0}
+    assert done["max_abs_error"] == 50.0
+    # sqrt(0.25 / 3000) in percentage points
+    assert done["standard_error"] == 0.9129
+    assert done["simulation_method"] == "stabilizer"
+    assert done["chunk"] == 2
+
+
+def test_seeded_stream_seeds_each_chunk():
+    executor = FakeExecutor()
+
+    collect(executor, FakeRequest(), 4000, 1000, seed=10)
+
+    assert [seed for _, seed in executor.chunks] == [10, 11, 12, 13]
+
+
+def test_stream_stops_when_the_client_disconnects():
+    executor = FakeExecutor()
+
+    lines = collect(executor, FakeRequest(disconnect_after=2), 100_000, 1000)
+
+    assert len(executor.chunks) == 2
+    assert lines[-1]["event"] == "chunk"
@@ -0,0 +1,57 @@
+import pytest
+from qiskit import QuantumCircuit
+
+from circuit_registry import CircuitRegistry, classify_circuit
+from metrics import collect_labels
+from sampling_backends import AerBackend
+
+
+@pytest.fixture(scope="module")
+def aer():
+    return AerBackend()
+
+
+def test_clifford_circuits_are_classified_as_stabilizer():
+    qc = QuantumCircuit(2, 2)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.measure([0, 1], [0, 1])
+
+    assert classify_circuit(qc) == "stabilizer"
+
+
+def test_any_non_clifford_gate_needs_a_statevector():
+    qc = QuantumCircuit(1, 1)
+    qc.ry(0.3, 0)
+    qc.measure(0, 0)
+
+    assert classify_circuit(qc) == "statevector"
+
+
+def test_registry_classifies_every_circuit_it_registers():
+    registry = CircuitRegistry()
+
+    assert registry.simulation_method(CircuitRegistry.coin_key("double")) == "stabilizer"
+    assert registry.simulation_method(CircuitRegistry.bell_key("psi_minus")) == "stabilizer"
+    assert registry.simulation_method(CircuitRegistry.measure_key("definite_1", "x")) == "stabilizer"
+    assert registry.simulation_method(CircuitRegistry.measure_key("biased_0", "z")) == "statevector"
+
+
+def test_aer_runs_are_labelled_with_the_method_used(aer):
+    with collect_labels() as labels:
+        aer.counts(CircuitRegistry.bell_key("phi_plus"), 10, seed=1)
+    assert labels["simulation_method"] == "stabilizer"
+
+    with collect_labels() as labels:
+        aer.counts(CircuitRegistry.measure_key("biased_1", "z"), 10, seed=1)
+    assert labels["simulation_method"] == "statevector"
+
+
+def test_a_mixed_job_falls_back_to_statevector(aer):
+    keys = [CircuitRegistry.coin_key("single"), CircuitRegistry.measure_key("biased_0", "x")]
+
+    with collect_labels() as labels:
+        counts = aer.counts_many(keys, 20, seed=3)
+
+    assert labels["simulation_method"] == "statevector"
+    assert [sum(c.values()) for c in counts] == [20, 20]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from metrics import collect_labels
+from sampling_backends import AerBackend
+from simulator_profiles import load_profiles, select_profile, thread_budget
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    for name in ("QUANTUM_AER_PROFILES", "QUANTUM_AER_THREADS", "QUANTUM_WORKERS"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def names(profiles):
+    return [profile.name for profile in profiles]
+
+
+def test_jobs_go_to_the_smallest_profile_that_holds_them():
+    profiles = load_profiles()
+
+    assert names(profiles) == ["interactive", "batch", "multi_experiment"]
+    assert select_profile(profiles, 1).name == "interactive"
+    assert select_profile(profiles, 64).name == "interactive"
+    assert select_profile(profiles, 65).name == "batch"
+    assert select_profile(profiles, 1, experiments=4).name == "multi_experiment"
+
+
+def test_threads_are_shared_between_workers(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    monkeypatch.setenv("QUANTUM_WORKERS", "2")
+    assert thread_budget() == 4
+    assert load_profiles()[1].options["max_parallel_threads"] == 4
+
+    monkeypatch.setenv("QUANTUM_AER_THREADS", "3")
+    assert thread_budget() == 3
+
+
+def test_overrides_merge_options_add_and_remove_profiles():
+    profiles = load_profiles(json.dumps({
+        "interactive": None,
+        "batch": {"max_shots": 1000, "options": {"shot_branching_enable": True}},
+        "huge": {"max_experiments": 1, "options": {"max_parallel_threads": 16}},
+    }))
+
+    assert names(profiles) == ["batch", "huge", "multi_experiment"]
+    batch = profiles[0]
+    assert batch.max_shots == 1000
+    assert batch.options["shot_branching_enable"] is True
+    assert batch.options["max_parallel_experiments"] == 1
+    assert select_profile(profiles, 5000).name == "huge"
+
+
+def test_jobs_too_large_for_every_profile_use_the_last_one():
+    profiles = load_profiles(json.dumps({"batch": None, "multi_experiment": None}))
+
+    assert select_profile(profiles, 10_000, experiments=3).name == "interactive"
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ("{", "not valid JSON"),
+    ("[1]", "JSON object"),
+    ('{"batch": {"threads": 2}}', "Unknown field"),
+    ('{"interactive": null, "batch": null, "multi_experiment": null}', "every simulator profile"),
+])
+def test_bad_overrides_are_rejected(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        load_profiles(overrides)
+
+
+def test_aer_runs_are_labelled_with_their_profile():
+    aer = AerBackend()
+    key = ("coin", "single", None)
+
+    with collect_labels() as labels:
+        aer.counts(key, 1, seed=1)
+    assert labels["simulator_profile"] == "interactive"
+
+    with collect_labels() as labels:
+        aer.counts(key, 1000, seed=1)
+    assert labels["simulator_profile"] == "batch"
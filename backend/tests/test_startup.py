@@ -0,0 +1,68 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from startup import StartupTracker
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeDiagrams:
+    def __init__(self):
+        self.formats = None
+
+    def render(self, formats):
+        self.formats = formats
+
+
+class FakeSimulation:
+    def __init__(self, workers=2, error=None):
+        self.workers = workers
+        self.error = error
+
+    async def warm_up(self, on_ready):
+        for i in range(self.workers):
+            on_ready({"worker": i, "first_run": 0.01})
+        if self.error is not None:
+            raise self.error
+
+
+def warm_up(simulation):
+    tracker = StartupTracker()
+    diagrams = FakeDiagrams()
+
+    async def main():
+        assert not tracker.ready
+        await tracker.start(simulation, diagrams, ["text"])
+
+    asyncio.run(main())
+    return tracker, diagrams
+
+
+def test_ready_once_diagrams_and_every_worker_are_warm():
+    tracker, diagrams = warm_up(FakeSimulation(workers=2))
+
+    assert diagrams.formats == ["text"]
+    assert tracker.readiness() == {"ready": True, "progress": 1.0, "steps_done": 3, "steps_total": 3, "error": None}
+    report = tracker.report()
+    assert set(report["phases"]) == {"diagrams", "workers", "until_ready"}
+    assert [worker["worker"] for worker in report["workers"]] == [0, 1]
+
+
+def test_failed_warm_up_is_reported_and_never_ready():
+    tracker, _ = warm_up(FakeSimulation(workers=1, error=RuntimeError("no simulator")))
+
+    readiness = tracker.readiness()
+    assert not readiness["ready"]
+    assert readiness["error"] == "RuntimeError('no simulator')"
+    assert readiness["progress"] == 1.0
+
+
+def test_service_modules_import_without_qiskit():
+    code = (
+        "import sys, quantum_service, sampling_backends, circuit_registry;"
+        "quantum_service.QuantumService();"
+        "assert not [m for m in sys.modules if m.split('.')[0] in ('qiskit', 'qiskit_aer')], 'Qiskit imported'"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND, check=True)
@@ -60,6 +60,71 @@ async function fetchApi(endpoint, options = {}) {
     }
 }
 
+/**
+ * Unpack the per-shot outcomes a batch endpoint returns with `sequence: 'base64'`
+ * @param {{data: string, shots: number, bits_per_shot: number}} sequence
+ * @returns {string[]} One outcome label per shot, e.g. '0' or '01' (coin 1 first)
+ */
+export function decodeShotSequence({ data, shots, bits_per_shot }) {
+    const bytes = Uint8Array.from(atob(data), (char) => char.charCodeAt(0));
+    const outcomes = new Array(shots);
+    
+    for (let shot = 0; shot < shots; shot++) {
+        let label = '';
+        for (let i = 0; i < bits_per_shot; i++) {
+            // Bits are packed most significant bit first
+            const bit = shot * bits_per_shot + i;
+            label += (bytes[bit >> 3] >> (7 - (bit & 7))) & 1;
+        }
+        outcomes[shot] = label;
+    }
+    
+    return outcomes;
+}
+
+/**
+ * Open a live stream of measurement outcomes over one WebSocket
+ * (instead of one POST per flip). Every received frame is acknowledged
+ * after onOutcomes returns, which is what lets the server send more.
+ * @param {{circuit?: string, state?: string, basis?: string, rate?: number}} subscription -
+ *     circuit 'coin' (state 'single' or 'double'), 'bell' or 'measure'; rate in outcomes per second
+ * @param {{onOutcomes: (outcomes: string[]) => void, onEvent?: (message: object) => void, onError?: (error: Error) => void}} handlers
+ * @returns {{pause: () => void, resume: () => void, setRate: (rate: number) => void, close: () => void}}
+ */
+export function openFlipStream(subscription, { onOutcomes, onEvent = () => {}, onError = () => {} }) {
+    const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/ws/flips`);
+    const send = (message) => {
+        if (socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify(message));
+        }
+    };
+
+    socket.onopen = () => send({ action: 'subscribe', ...subscription });
+    socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.event === 'outcomes') {
+            onOutcomes(message.outcomes);
+            send({ action: 'ack', frame: message.frame });
+        } else if (message.event === 'error') {
+            onError(new ApiError(message.detail, 400, message));
+        } else {
+            onEvent(message);
+        }
+    };
+    socket.onerror = () => onError(new ApiError(
+        'Network error: Unable to open the live flip stream. Make sure the backend is running on port 8000.',
+        0,
+        {}
+    ));
+
+    return {
+        pause: () => send({ action: 'pause' }),
+        resume: () => send({ action: 'resume' }),
+        setRate: (rate) => send({ action: 'rate', rate }),
+        close: () => socket.close(),
+    };
+}
+
 /**
  * Single Quantum Coin Flip API (1 Qubit)
  */
@@ -73,11 +138,12 @@ export const quantumCoinApi = {
     /**
      * Perform multiple quantum coin flips
      * @param {number} shots - Number of flips (1-10000)
-     * @returns {Promise<{total_shots, zeros, ones, zero_percentage, one_percentage}>}
+     * @param {{sequence?: boolean}} options - sequence: also return every flip (see decodeShotSequence)
+     * @returns {Promise<{total_shots, zeros, ones, zero_percentage, one_percentage, sequence?}>}
      */
-    flipBatch: (shots = 100) => fetchApi('/api/quantum-coin-flip-batch', {
+    flipBatch: (shots = 100, { sequence = false } = {}) => fetchApi('/api/quantum-coin-flip-batch', {
         method: 'POST',
-        body: JSON.stringify({ shots }),
+        body: JSON.stringify(sequence ? { shots, sequence: 'base64' } : { shots }),
     }),
     
     /**
@@ -100,11 +166,12 @@ export const doubleCoinApi = {
     /**
      * Perform multiple double quantum coin flips
      * @param {number} shots - Number of flips (1-10000)
-     * @returns {Promise<{total_shots, counts, percentages, labels}>}
+     * @param {{sequence?: boolean}} options - sequence: also return every flip (see decodeShotSequence)
+     * @returns {Promise<{total_shots, counts, percentages, labels, sequence?}>}
      */
-    flipBatch: (shots = 100) => fetchApi('/api/double-coin-flip-batch', {
+    flipBatch: (shots = 100, { sequence = false } = {}) => fetchApi('/api/double-coin-flip-batch', {
         method: 'POST',
-        body: JSON.stringify({ shots }),
+        body: JSON.stringify(sequence ? { shots, sequence: 'base64' } : { shots }),
     }),
     
     /**